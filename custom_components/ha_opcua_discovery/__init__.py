@@ -5,17 +5,28 @@ from __future__ import annotations
 import asyncio
 import functools
 import logging
+import time
 from datetime import timedelta
+from collections.abc import Iterable, Sequence
 from typing import Any, Callable
 
 from asyncua import Client, ua
 from asyncua.common import ua_utils
 from asyncua.ua import NodeClass
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    CALLBACK_TYPE,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.exceptions import HomeAssistantError, ConfigEntryNotReady
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_component import DEFAULT_SCAN_INTERVAL
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.helpers import config_validation as cv
 import voluptuous as vol
@@ -32,43 +43,174 @@ from .const import (
     FIELD_NODE_HUB,
     FIELD_NODE_ID,
     FIELD_VALUE,
+    CONF_HUB_DISCOVERY_CONCURRENCY,
+    DEFAULT_DISCOVERY_CONCURRENCY,
+    CONF_HUB_SESSIONS,
+    DEFAULT_SESSIONS,
+    CONF_HUB_UPDATE_MODE,
+    CONF_HUB_PUBLISHING_INTERVAL,
+    CONF_HUB_SAMPLING_INTERVAL,
+    CONF_HUB_QUEUE_SIZE,
+    UPDATE_MODE_POLLING,
+    UPDATE_MODE_SUBSCRIPTION,
+    DEFAULT_PUBLISHING_INTERVAL,
+    DEFAULT_SAMPLING_INTERVAL,
+    DEFAULT_QUEUE_SIZE,
+    CONF_HUB_DISCOVERY_CACHE,
+    DEFAULT_DISCOVERY_CACHE,
+    PLATFORM_SENSOR,
+    PLATFORM_SWITCH,
+    PLATFORMS,
+    SERVICE_SET_VALUES,
+    FIELD_VALUES,
+    CONF_HUB_POLLING_GROUPS,
+    DIAGNOSTICS_CONTEXT,
+    CONF_HUB_ARRAY_MODE,
+    ARRAY_MODE_ELEMENTS,
+    DEFAULT_ARRAY_MODE,
+    CONF_HUB_HISTORY_BACKFILL,
+    DEFAULT_HISTORY_BACKFILL,
+    CONF_HUB_REGISTER_NODES,
+    DEFAULT_REGISTER_NODES,
+    UPDATE_MODE_ADAPTIVE,
+    CONF_HUB_MIN_SCAN_INTERVAL,
+    CONF_HUB_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    CONF_HUB_EVENT_NOTIFIERS,
+    CONF_HUB_EVENT_FIELDS,
+    DEFAULT_EVENT_FIELDS,
+    EVENT_QUEUE_SIZE,
+    PRIORITY_BACKGROUND,
+    PRIORITY_WRITE,
+    CONF_HUB_WORKER_PROCESS,
+    DEFAULT_WORKER_PROCESS,
+    SERVICE_RESCAN,
+    SIGNAL_NODES_ADDED,
+    CONF_HUB_RESCAN_ON_MODEL_CHANGE,
+    DEFAULT_RESCAN_ON_MODEL_CHANGE,
+)
+from .adaptive_interval import AdaptiveInterval
+from .connection import (
+    REQUEST_ERRORS,
+    OpcuaConnection,
+    _read_parameters,
+    _read_value_id,
+    async_acquire_connection,
+    async_release_connection,
+    is_transport_error,
 )
+from .discovery_cache import CACHE_ERRORS, DiscoveryCache
+from .discovery_filter import DiscoveryFilter
+from .event_stream import EventStream, notifier_node_id
+from .history_backfill import HistoryBackfill
+from .metrics import HubMetrics, ReadRecord
+from .model_change import ModelChangeWatcher
+from .node_health import NodeHealth
+from .node_registry import UNAVAILABLE, NodeRegistry
+from .polling_group import PollingGroup
+from .worker import OpcuaWorker
 
 _LOGGER = logging.getLogger(__name__)
 
+# Variant types of the values, or array elements, that are exposed as entities
+_SCALAR_VARIANT_TYPES = {
+    ua.VariantType.Boolean,
+    ua.VariantType.SByte,
+    ua.VariantType.Byte,
+    ua.VariantType.Int16,
+    ua.VariantType.UInt16,
+    ua.VariantType.Int32,
+    ua.VariantType.UInt32,
+    ua.VariantType.Int64,
+    ua.VariantType.UInt64,
+    ua.VariantType.Float,
+    ua.VariantType.Double,
+    ua.VariantType.String,
+}
+
+VALUE_SCHEMA = vol.Any(
+    float,
+    int,
+    str,
+    cv.byte,
+    cv.boolean,
+    cv.time,
+)
+
 SERVICE_SET_VALUE_SCHEMA = vol.Schema(
     {
         vol.Required(FIELD_NODE_HUB): cv.string,
         vol.Required(FIELD_NODE_ID): cv.string,
-        vol.Required(FIELD_VALUE): vol.Any(
-            float,
-            int,
-            str,
-            cv.byte,
-            cv.boolean,
-            cv.time,
+        vol.Required(FIELD_VALUE): VALUE_SCHEMA,
+    }
+)
+
+SERVICE_SET_VALUES_SCHEMA = vol.Schema(
+    {
+        vol.Required(FIELD_NODE_HUB): cv.string,
+        vol.Required(FIELD_VALUES): vol.All(
+            cv.ensure_list,
+            [
+                vol.Schema(
+                    {
+                        vol.Required(FIELD_NODE_ID): cv.string,
+                        vol.Required(FIELD_VALUE): VALUE_SCHEMA,
+                    }
+                )
+            ],
         ),
     }
 )
 
+SERVICE_RESCAN_SCHEMA = vol.Schema(
+    {
+        vol.Required(FIELD_NODE_HUB): cv.string,
+    }
+)
+
+
+def _get_entry_option(entry: ConfigEntry, key: str, default: Any = None) -> Any:
+    """Return an entry setting, options taking precedence over the initial data."""
+    return entry.options.get(key, entry.data.get(key, default))
+
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up asyncua from a config entry."""
     hass.data.setdefault(DOMAIN, {})
 
     hub_id = entry.data[CONF_HUB_ID]
+    hub_url = entry.options.get(CONF_HUB_URL, entry.data.get(CONF_HUB_URL))
+
+    # Entries of the same endpoint and credentials share one connection
+    connection = async_acquire_connection(
+        hass,
+        hub_url,
+        username=entry.options.get(
+            CONF_HUB_USERNAME, entry.data.get(CONF_HUB_USERNAME)
+        ),
+        password=entry.options.get(
+            CONF_HUB_PASSWORD, entry.data.get(CONF_HUB_PASSWORD)
+        ),
+        sessions=_get_entry_option(entry, CONF_HUB_SESSIONS, DEFAULT_SESSIONS),
+    )
 
     hub = OpcuaHub(
         hub_name=hub_id,
-        hub_url=entry.options.get(CONF_HUB_URL, entry.data.get(CONF_HUB_URL)),
+        hub_url=hub_url,
         root_node_id=entry.options.get(
             CONF_HUB_ROOT_NODE, entry.data.get(CONF_HUB_ROOT_NODE)
         ),
-        username=entry.options.get(
-            CONF_HUB_USERNAME, entry.data.get(CONF_HUB_USERNAME)
+        discovery_concurrency=_get_entry_option(
+            entry, CONF_HUB_DISCOVERY_CONCURRENCY, DEFAULT_DISCOVERY_CONCURRENCY
         ),
-        password=entry.options.get(
-            CONF_HUB_PASSWORD, entry.data.get(CONF_HUB_PASSWORD)
+        connection=connection,
+        discovery_filter=DiscoveryFilter.from_config({**entry.data, **entry.options}),
+        register_nodes=_get_entry_option(
+            entry, CONF_HUB_REGISTER_NODES, DEFAULT_REGISTER_NODES
+        ),
+        worker_process=_get_entry_option(
+            entry, CONF_HUB_WORKER_PROCESS, DEFAULT_WORKER_PROCESS
         ),
     )
 
@@ -82,21 +224,49 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 entry.data.get(CONF_HUB_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
             )
         ),
+        update_mode=_get_entry_option(entry, CONF_HUB_UPDATE_MODE, UPDATE_MODE_POLLING),
+        publishing_interval=_get_entry_option(
+            entry, CONF_HUB_PUBLISHING_INTERVAL, DEFAULT_PUBLISHING_INTERVAL
+        ),
+        sampling_interval=_get_entry_option(
+            entry, CONF_HUB_SAMPLING_INTERVAL, DEFAULT_SAMPLING_INTERVAL
+        ),
+        queue_size=_get_entry_option(entry, CONF_HUB_QUEUE_SIZE, DEFAULT_QUEUE_SIZE),
+        polling_groups=_get_entry_option(entry, CONF_HUB_POLLING_GROUPS),
+        array_mode=_get_entry_option(entry, CONF_HUB_ARRAY_MODE, DEFAULT_ARRAY_MODE),
+        history_backfill=_get_entry_option(
+            entry, CONF_HUB_HISTORY_BACKFILL, DEFAULT_HISTORY_BACKFILL
+        ),
+        min_scan_interval=_get_entry_option(
+            entry, CONF_HUB_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+        ),
+        max_scan_interval=_get_entry_option(
+            entry, CONF_HUB_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+        ),
+        event_notifiers=_get_entry_option(entry, CONF_HUB_EVENT_NOTIFIERS),
+        event_fields=_get_entry_option(
+            entry, CONF_HUB_EVENT_FIELDS, DEFAULT_EVENT_FIELDS
+        ),
+        rescan_on_model_change=_get_entry_option(
+            entry, CONF_HUB_RESCAN_ON_MODEL_CHANGE, DEFAULT_RESCAN_ON_MODEL_CHANGE
+        ),
     )
 
     hass.data[DOMAIN][hub_id] = coordinator
 
-    # Connect to the OPC-UA Server
-    connected = await hub.connect()
-    if not connected:
-        raise ConfigEntryNotReady("Failed to connect to OPC UA server")
+    try:
+        await _async_load_nodes(hass, entry, hub, coordinator)
+        await coordinator.async_config_entry_first_refresh()
+    except BaseException:
+        # Release the shared connection of an entry that failed to set up
+        hass.data[DOMAIN].pop(hub_id, None)
+        await hub.unsubscribe()
+        await hub.stop_worker()
+        await async_release_connection(hass, connection)
+        raise
 
-    # Fetch nodes from root node ID
-    nodes = await hub.discover_nodes()
-    coordinator.set_nodes(nodes)
-
-    await coordinator.async_config_entry_first_refresh()
-    await hass.config_entries.async_forward_entry_setups(entry, ["sensor", "switch"])
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    coordinator.async_start_polling_groups()
 
     async def _handle_set_value(service):
         try:
@@ -104,11 +274,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             if not hub_id_ or hub_id_ not in hass.data[DOMAIN]:
                 raise HomeAssistantError(f"Hub '{hub_id_}' not found.")
 
-            hub_ = hass.data[DOMAIN][hub_id_].hub
+            coordinator_ = hass.data[DOMAIN][hub_id_]
             node_id = service.data[FIELD_NODE_ID]
             value = service.data[FIELD_VALUE]
 
-            success = await hub_.set_value(nodeid=node_id, value=value)
+            success = await coordinator_.async_write_value(node_id, value)
             if not success:
                 raise HomeAssistantError(f"Failed to set value on node '{node_id}'.")
 
@@ -123,223 +293,690 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         schema=SERVICE_SET_VALUE_SCHEMA,
     )
 
+    async def _handle_set_values(service: ServiceCall) -> ServiceResponse:
+        try:
+            hub_id_ = service.data.get(FIELD_NODE_HUB)
+            if not hub_id_ or hub_id_ not in hass.data[DOMAIN]:
+                raise HomeAssistantError(f"Hub '{hub_id_}' not found.")
+
+            coordinator_ = hass.data[DOMAIN][hub_id_]
+            values = [
+                (item[FIELD_NODE_ID], item[FIELD_VALUE])
+                for item in service.data[FIELD_VALUES]
+            ]
+
+            statuses = await coordinator_.async_write_values(values)
+
+        except Exception as e:
+            _LOGGER.exception("Service call to opcua_set_values failed")
+            raise HomeAssistantError(f"Failed to call opcua_set_values: {e}")
+
+        if service.return_response:
+            return {"results": statuses}
+        return None
+
+    hass.services.async_register(
+        domain=DOMAIN,
+        service=SERVICE_SET_VALUES,
+        service_func=_handle_set_values,
+        schema=SERVICE_SET_VALUES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def _handle_rescan(service: ServiceCall) -> ServiceResponse:
+        try:
+            hub_id_ = service.data.get(FIELD_NODE_HUB)
+            if not hub_id_ or hub_id_ not in hass.data[DOMAIN]:
+                raise HomeAssistantError(f"Hub '{hub_id_}' not found.")
+
+            changes = await hass.data[DOMAIN][hub_id_].async_rescan()
+
+        except Exception as e:
+            _LOGGER.exception("Service call to opcua_rescan failed")
+            raise HomeAssistantError(f"Failed to call opcua_rescan: {e}")
+
+        if service.return_response:
+            return changes
+        return None
+
+    hass.services.async_register(
+        domain=DOMAIN,
+        service=SERVICE_RESCAN,
+        service_func=_handle_rescan,
+        schema=SERVICE_RESCAN_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
     return True
 
 
+async def _async_load_nodes(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    hub: OpcuaHub,
+    coordinator: AsyncuaCoordinator,
+) -> None:
+    """Connect the hub and hand its nodes to the coordinator."""
+    # Connect to the OPC-UA Server
+    connected = await hub.connect()
+    if not connected:
+        raise ConfigEntryNotReady("Failed to connect to OPC UA server")
+
+    # Fetch nodes from root node ID, reusing the previous discovery when valid
+    nodes = None
+    cache = DiscoveryCache(hass, entry.data[CONF_HUB_ID])
+    use_cache = _get_entry_option(
+        entry, CONF_HUB_DISCOVERY_CACHE, DEFAULT_DISCOVERY_CACHE
+    )
+    if use_cache:
+        coordinator.discovery_cache = cache
+        try:
+            nodes = await cache.async_load(hub)
+        except CACHE_ERRORS as e:
+            _LOGGER.warning(f"Failed to load the discovery cache: {e}")
+
+    if nodes is None:
+        nodes = await hub.discover_nodes()
+        if use_cache:
+            try:
+                await cache.async_save(hub, nodes)
+            except CACHE_ERRORS as e:
+                _LOGGER.warning(f"Failed to save the discovery cache: {e}")
+    coordinator.set_nodes(nodes)
+    await hub.register_nodes()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload config entry and disconnect OPC UA client."""
-    unload_ok = await hass.config_entries.async_unload_platforms(
-        entry, ["sensor", "switch"]
-    )
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hub_id = entry.data[CONF_HUB_ID]
         coordinator = hass.data[DOMAIN].pop(hub_id, None)
         if coordinator:
-            await coordinator.hub.disconnect()
+            coordinator.async_stop_polling_groups()
+            coordinator.async_stop_history_backfill()
+            if coordinator.model_change_watcher:
+                coordinator.model_change_watcher.async_cancel()
+            # Other entries may still use the connection
+            await coordinator.hub.unsubscribe()
+            await coordinator.hub.stop_worker()
+            await async_release_connection(hass, coordinator.hub.connection)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the discovery cache of a deleted config entry."""
+    await DiscoveryCache(hass, entry.data[CONF_HUB_ID]).async_remove()
+
+
+def _browse_description(
+    node_id: ua.NodeId, reference_type_id: ua.NodeId, node_class_mask: int
+) -> ua.BrowseDescription:
+    """Describe a forward browse of the references of a node."""
+    description = ua.BrowseDescription()
+    description.NodeId = node_id
+    description.BrowseDirection = ua.BrowseDirection.Forward
+    description.ReferenceTypeId = reference_type_id
+    description.IncludeSubtypes = True
+    description.NodeClassMask = node_class_mask
+    description.ResultMask = ua.BrowseResultMask.All
+    return description
+
+
+def _is_supported_array(variant: ua.Variant | None) -> bool:
+    """Return whether a value is a one-dimensional array of a supported type."""
+    return (
+        variant is not None
+        and variant.is_array
+        and variant.VariantType in _SCALAR_VARIANT_TYPES
+        and (not variant.Dimensions or len(variant.Dimensions) == 1)
+    )
+
+
+def _to_variant(value: Any, variant_type: ua.VariantType) -> ua.Variant:
+    """Convert a value written by a service or an entity to the node type."""
+    return ua_utils.string_to_variant(
+        value if isinstance(value, str) else str(value), variant_type
+    )
+
+
+# Raised by _to_variant for values that do not parse as the node type, the
+# ua.UaError of malformed ids and the NotImplementedError of unsupported types
+# are RuntimeErrors
+_CONVERSION_ERRORS = (LookupError, TypeError, ValueError, RuntimeError)
+
+
 class OpcuaHub:
     """OPC UA Hub client."""
 
-    def __init__(self, hub_name, hub_url, root_node_id, username=None, password=None):
+    def __init__(
+        self,
+        hub_name,
+        hub_url,
+        root_node_id,
+        username=None,
+        password=None,
+        discovery_concurrency=DEFAULT_DISCOVERY_CONCURRENCY,
+        sessions=DEFAULT_SESSIONS,
+        connection: OpcuaConnection | None = None,
+        discovery_filter: DiscoveryFilter | None = None,
+        register_nodes: bool = DEFAULT_REGISTER_NODES,
+        worker_process: bool = DEFAULT_WORKER_PROCESS,
+    ):
         self._hub_name = hub_name
         self._hub_url = hub_url
-        self._username = username
-        self._password = password
         self.root_node_id = root_node_id
+        self._discovery_concurrency = max(1, discovery_concurrency)
+        self.discovery_filter = discovery_filter or DiscoveryFilter()
+        self._register_nodes = register_nodes
+        self.discovery_stats = {}
+        self.registry = NodeRegistry()
         self._monitor_task = None  # Track the monitor task
 
         self.device_info = DeviceInfo(configuration_url=hub_url)
 
-        self.client = None  # Initially no client
-        self._connected = False
-        self._lock = asyncio.Lock()
+        # Hubs of the same endpoint share the connection from the registry,
+        # which holds a reference for this hub
+        if connection is None:
+            connection = OpcuaConnection(hub_url, username, password, sessions)
+            connection.references += 1
+        self.connection = connection
+
+        self.node_health = NodeHealth()
+        self.metrics = HubMetrics()
+        self.worker = (
+            OpcuaWorker(self.connection.url, *self.connection.credentials)
+            if worker_process
+            else None
+        )
+        self._worker_stale: set[int] = set()
+
+        self._subscriptions = []
+        self._subscription_generation = 0
+        self._event_subscription = None
+        self._event_subscription_generation = 0
+        self._model_change_subscription = None
+        self._model_change_subscription_generation = 0
 
     async def connect(self):
-        async with self._lock:
-            if self._connected:
-                return True  # already connected
-            try:
-                self.client = Client(url=self._hub_url, timeout=5)
-                if self._username:
-                    self.client.set_user(self._username)
-                if self._password:
-                    self.client.set_password(self._password)
-                await self.client.connect()
-                self._connected = True
-                _LOGGER.info("OPC UA client connected")
-                return True
-            except Exception as e:
-                self._connected = False
-                self.client = None
-                _LOGGER.error(f"Failed to connect OPC UA client: {e}")
-                return False  # <--- changed from raise
+        return await self.connection.connect()
 
     async def disconnect(self):
-        async with self._lock:
-            if self._connected and self.client:
-                try:
-                    await self.client.disconnect()
-                    _LOGGER.info("OPC UA client disconnected")
-                except Exception as e:
-                    _LOGGER.warning(f"Error during disconnect: {e}")
-                finally:
-                    self._connected = False
-                    self.client = None
-
-    async def safe_disconnect(self):
-        try:
-            await self.disconnect()
-        except Exception as e:
-            _LOGGER.debug(f"Safe disconnect failed: {e}")
+        """Release the hub's reference to the connection.
+
+        A shared connection stays up for the other hubs, only the
+        subscriptions of this hub are deleted. The last hub closes it.
+        """
+        if self.connection.references > 1:
+            await self.unsubscribe()
+        else:
+            # Deleted with the session
+            self._subscriptions = []
+            self._event_subscription = None
+            self._model_change_subscription = None
+        await self.connection.release()
+
+    @property
+    def client(self) -> Client | None:
+        return self.connection.client
+
+    @property
+    def read_chunk_size(self) -> int:
+        return self.connection.read_chunk_size
+
+    @property
+    def write_chunk_size(self) -> int:
+        return self.connection.write_chunk_size
+
+    @property
+    def browse_chunk_size(self) -> int:
+        return self.connection.browse_chunk_size
+
+    @property
+    def hub_url(self) -> str:
+        return self._hub_url
 
     @property
     def is_connected(self) -> bool:
-        return self._connected
+        return self.connection.is_connected
+
+    @property
+    def is_subscribed(self) -> bool:
+        """Return whether the subscriptions belong to the current session."""
+        return (
+            bool(self._subscriptions)
+            and self._subscription_generation == self.connection.generation
+        )
+
+    @property
+    def is_event_subscribed(self) -> bool:
+        """Whether the event subscription survived the last reconnect."""
+        return (
+            self._event_subscription is not None
+            and self._event_subscription_generation == self.connection.generation
+        )
+
+    @property
+    def is_model_change_subscribed(self) -> bool:
+        """Whether the model change subscription survived the last reconnect."""
+        return (
+            self._model_change_subscription is not None
+            and self._model_change_subscription_generation == self.connection.generation
+        )
 
     async def ensure_connected(self) -> bool:
-        if not self.is_connected:
-            _LOGGER.debug("ensure_connected: not connected, connecting...")
-            return await self.connect()
-        return True
+        return await self.connection.ensure_connected()
 
     @staticmethod
     def asyncua_wrapper(func: Callable[..., Any]) -> Callable[..., Any]:
         @functools.wraps(func)
         async def wrapper(self, *args: Any, **kwargs: Any) -> Any:
+            # Reconnecting is left to the connection, calls fail fast meanwhile
+            if not await self.ensure_connected():
+                raise ConnectionError(f"Not connected to {self.hub_url}")
             try:
-                await self.ensure_connected()
                 return await func(self, *args, **kwargs)
 
             except (asyncio.TimeoutError, ConnectionError) as e:
                 _LOGGER.warning(f"Connection lost during OPC UA call: {e}")
-                self._connected = False
-                await self.safe_disconnect()
-
-                # Try reconnect
-                try:
-                    await self.connect()
-                except Exception as e2:
-                    _LOGGER.error(f"Reconnect failed: {e2}")
-                    raise
-
-                # Retry once after reconnect
-                return await func(self, *args, **kwargs)
+                self.connection.connection_lost(e)
+                raise
 
             except asyncio.CancelledError:
                 _LOGGER.info("OPCUA call cancelled.")
                 raise
 
             except Exception as e:
-                _LOGGER.exception(f"Unexpected error during OPC UA call: {e}")
-                self._connected = False
+                if is_transport_error(e):
+                    _LOGGER.warning(f"Connection lost during OPC UA call: {e}")
+                    self.connection.connection_lost(e)
+                else:
+                    # A failed request leaves the connection up
+                    _LOGGER.exception("Unexpected error during OPC UA call")
                 raise
 
         return wrapper
 
     @asyncua_wrapper
-    async def is_writable_boolean(self, node_id: str) -> bool:
-        try:
-            node = self.client.get_node(node_id)
-            node_class = await node.read_node_class()
-            if node_class != NodeClass.Variable:
-                return False
-
-            data_type_node = await node.read_data_type()
-            data_type_node_obj = self.client.get_node(data_type_node)
-            data_type_browse_name = await data_type_node_obj.read_browse_name()
+    async def discover_nodes(self) -> list[dict[str, Any]]:
+        """Discover variable nodes under the root node with a breadth-first crawl.
+
+        Every level of the address space is browsed with multi-node Browse
+        requests (followed by BrowseNext for continuation points) while the
+        data type and access level (and the value, unless disabled) of the
+        variables found on the previous level are fetched with batched Read
+        requests. At most ``discovery_concurrency`` requests are in flight at
+        the same time. The discovery filter prunes the crawl, see
+        ``DiscoveryFilter``.
+        """
+        discovered_nodes = []
+        semaphore = asyncio.Semaphore(self._discovery_concurrency)
+        start_time = time.monotonic()
+        browsed_count = 0
+        discovery_filter = self.discovery_filter
 
-            if data_type_browse_name.Name != "Boolean":
-                return False
+        try:
+            root_node_id = ua.NodeId.from_string(self.root_node_id)
+            root = await self._read_root_reference(root_node_id)
+        except (ua.UaError, ValueError) as e:
+            if is_transport_error(e):
+                # A lost connection must not look like an empty address space
+                raise
+            _LOGGER.warning(
+                f"Failed to start node discovery from root node {self.root_node_id}: {e}"
+            )
+            return discovered_nodes
+
+        visited = {root_node_id}
+        # References of the current level and their browse path below the root
+        level = [root]
+        paths = [""]
+        depth = 0
+        while level:
+            browsed_count += len(level)
+            variables = [
+                ref
+                for ref, path in zip(level, paths)
+                if ref.NodeClass == NodeClass.Variable
+                and discovery_filter.is_included(path, ref.NodeId)
+            ]
+            to_browse = [
+                index
+                for index, ref in enumerate(level)
+                if discovery_filter.browses(ref.NodeClass, depth)
+            ]
+
+            children, _ = await asyncio.gather(
+                self._browse_children(
+                    [level[index].NodeId for index in to_browse], semaphore
+                ),
+                self._read_variables(variables, semaphore, discovered_nodes),
+            )
 
-            # Read AccessLevel attribute
-            access_level_dv = await node.read_attribute(ua.AttributeIds.AccessLevel)
-            access_level = access_level_dv.Value.Value
+            parent_paths = [paths[index] for index in to_browse]
+            level = []
+            paths = []
+            for parent, ref in children:
+                child_id = ua.NodeId(ref.NodeId.Identifier, ref.NodeId.NamespaceIndex)
+                if child_id in visited:
+                    continue
+                visited.add(child_id)
+                path = (
+                    f"{parent_paths[parent]}/{ref.BrowseName.Name}"
+                    if parent_paths[parent]
+                    else ref.BrowseName.Name
+                )
+                if discovery_filter.is_excluded(path, child_id):
+                    continue
+                ref.NodeId = child_id
+                level.append(ref)
+                paths.append(path)
+            depth += 1
+
+        await self._classify_nodes(discovered_nodes)
+
+        duration = time.monotonic() - start_time
+        self.discovery_stats = {
+            "browsed_nodes": browsed_count,
+            "discovered_nodes": len(discovered_nodes),
+            "duration": duration,
+            "nodes_per_second": browsed_count / duration if duration else 0.0,
+        }
+        _LOGGER.info(
+            f"Discovered {len(discovered_nodes)} variables out of {browsed_count} nodes "
+            f"in {duration:.2f}s ({self.discovery_stats['nodes_per_second']:.0f} nodes/s)"
+        )
+        return discovered_nodes
 
-            # Check if writable bit is set (bit 1 is writable)
-            if (access_level & 0x02) == 0:
-                return False
+    async def _classify_nodes(self, nodes: list[dict[str, Any]]):
+        """Add the builtin variant type, writable flag and platform to every node.
 
-            return True
+        Each distinct DataType is resolved once, so nodes sharing a data type
+        cost no additional server calls. Without a discovered value, nodes
+        whose variant type is not a supported scalar are dropped.
+        """
+        variant_types = await self._resolve_data_types(
+            {node["data_type"] for node in nodes if node["data_type"]}
+        )
 
-        except Exception as e:
-            _LOGGER.warning(
-                f"Failed to check if node {node_id} is writable boolean: {e}"
+        if not self.discovery_filter.read_values:
+            supported = []
+            for node in nodes:
+                if variant_types.get(node["data_type"]) in _SCALAR_VARIANT_TYPES:
+                    supported.append(node)
+                    continue
+                _LOGGER.warning(
+                    f"Skipping node {node['node_id']} ({node['name']}) with unsupported data type: {node['data_type']}"
+                )
+            nodes[:] = supported
+
+        for node in nodes:
+            variant_type = variant_types.get(node["data_type"])
+            node["variant_type"] = variant_type.name if variant_type else None
+            # Bit 1 of the AccessLevel attribute is CurrentWrite
+            node["writable"] = bool(node["access_level"] & 0x02)
+            node["platform"] = (
+                PLATFORM_SWITCH
+                if node["writable"]
+                and node["variant_type"] == ua.VariantType.Boolean.name
+                and node.get("array_size") is None
+                else PLATFORM_SENSOR
             )
-            return False
-
-    @asyncua_wrapper
-    async def discover_nodes(self) -> list[dict[str, Any]]:
-        """Recursively discover variable nodes under the provided root node."""
-        discovered_nodes = []
 
-        async def _recurse_node(node):
+    async def _resolve_data_types(
+        self, data_types: set[str]
+    ) -> dict[str, ua.VariantType]:
+        """Resolve DataType node ids to the builtin variant type used to encode values."""
+        variant_types = {}
+        for data_type in data_types:
             try:
-                node_class = await node.read_node_class()
-                browse_name = await node.read_browse_name()
-                node_id = node.nodeid.to_string()
-
-                if node_class == NodeClass.Variable:
-                    try:
-                        value = await node.read_value()
-                        if isinstance(value, (int, float, str, bool)):
-                            discovered_nodes.append(
-                                {
-                                    "name": browse_name.Name,
-                                    "node_id": node_id,
-                                    "value": value,
-                                }
-                            )
-                        else:
-                            _LOGGER.warning(
-                                f"Skipping node {node_id} ({browse_name.Name}) with unsupported value type: {type(value).__name__}"
-                            )
-                    except ua.UaStatusCodeError as err:
-                        if err.code == ua.StatusCodes.BadNotReadable:
+                variant_types[data_type] = await ua_utils.data_type_to_variant_type(
+                    self.client.get_node(data_type)
+                )
+            except (ua.UaError, ValueError) as e:
+                _LOGGER.warning(f"Failed to resolve data type {data_type}: {e}")
+        return variant_types
+
+    async def _read_root_reference(self, root_node_id: ua.NodeId):
+        """Build a ReferenceDescription for the root node so it is crawled like its children."""
+        node_class, browse_name = await self.client.uaclient.read(
+            _read_parameters(
+                [
+                    _read_value_id(root_node_id, ua.AttributeIds.NodeClass),
+                    _read_value_id(root_node_id, ua.AttributeIds.BrowseName),
+                ]
+            )
+        )
+        node_class.StatusCode.check()
+        browse_name.StatusCode.check()
+
+        root = ua.ReferenceDescription()
+        root.NodeId = root_node_id
+        root.NodeClass = NodeClass(node_class.Value.Value)
+        root.BrowseName = browse_name.Value.Value
+        return root
+
+    async def _browse_children(
+        self, node_ids: list[ua.NodeId], semaphore: asyncio.Semaphore
+    ) -> list[tuple[int, ua.ReferenceDescription]]:
+        """Return the children of all nodes, browsed in chunks.
+
+        Every node is browsed once per reference type of the discovery
+        filter. Children are returned with the index of their parent in
+        ``node_ids``.
+        """
+        discovery_filter = self.discovery_filter
+        descriptions = [
+            (parent, node_id, reference_type_id)
+            for parent, node_id in enumerate(node_ids)
+            for reference_type_id in discovery_filter.reference_type_ids
+        ]
+
+        async def _browse_chunk(chunk):
+            async with semaphore:
+                params = ua.BrowseParameters()
+                params.View = ua.ViewDescription()
+                params.RequestedMaxReferencesPerNode = 0
+                params.NodesToBrowse = [
+                    _browse_description(
+                        node_id, reference_type_id, discovery_filter.node_class_mask
+                    )
+                    for _, node_id, reference_type_id in chunk
+                ]
+                async with self.connection.scheduler.slot(PRIORITY_BACKGROUND):
+                    results = await self.client.uaclient.browse(params)
+
+                references = []
+                while results:
+                    continued = []
+                    continuation_points = []
+                    for description, result in zip(chunk, results):
+                        parent, node_id, _ = description
+                        if not result.StatusCode.is_good():
                             _LOGGER.warning(
-                                f"Skipping unreadable node {node_id} ({browse_name.Name}): BadNotReadable"
+                                f"Failed to get children for node {node_id.to_string()}: {result.StatusCode.name}"
                             )
-                        else:
-                            _LOGGER.warning(
-                                f"UaStatusCodeError while reading node {node_id} ({browse_name.Name}): {err}"
+                            continue
+                        references.extend((parent, ref) for ref in result.References)
+                        if result.ContinuationPoint:
+                            continued.append(description)
+                            continuation_points.append(result.ContinuationPoint)
+
+                    if not continuation_points:
+                        break
+                    chunk = continued
+                    async with self.connection.scheduler.slot(PRIORITY_BACKGROUND):
+                        results = await self.client.uaclient.browse_next(
+                            ua.BrowseNextParameters(
+                                ReleaseContinuationPoints=False,
+                                ContinuationPoints=continuation_points,
                             )
-                    except Exception as err:
-                        _LOGGER.warning(
-                            f"Error reading value from node {node_id} ({browse_name.Name}): {err}"
                         )
+                return references
 
-                # Always try to recurse into child nodes
-                if (
-                    node_class
-                    in (
-                        NodeClass.Object,
-                        NodeClass.ObjectType,
-                        NodeClass.VariableType,
+        chunk_size = self.browse_chunk_size
+        chunk_results = await asyncio.gather(
+            *(
+                _browse_chunk(descriptions[start : start + chunk_size])
+                for start in range(0, len(descriptions), chunk_size)
+            )
+        )
+        return [ref for references in chunk_results for ref in references]
+
+    async def _read_variables(
+        self,
+        variables: list[ua.ReferenceDescription],
+        semaphore: asyncio.Semaphore,
+        discovered_nodes: list[dict[str, Any]],
+    ):
+        """Read data type, access level and value of variables in batched Reads.
+
+        One-dimensional arrays of supported types are kept with their element
+        count as ``array_size``, their value is not stored. When the discovery
+        filter skips value reads, the ValueRank is read instead of the value
+        so array variables can still be told apart.
+        """
+        read_values = self.discovery_filter.read_values
+        attribute_ids = (
+            ua.AttributeIds.Value if read_values else ua.AttributeIds.ValueRank,
+            ua.AttributeIds.DataType,
+            ua.AttributeIds.AccessLevel,
+        )
+
+        async def _read_chunk(chunk):
+            async with semaphore, self.connection.scheduler.slot(PRIORITY_BACKGROUND):
+                data_values = await self.client.uaclient.read(
+                    _read_parameters(
+                        [
+                            _read_value_id(ref.NodeId, attribute_id)
+                            for ref in chunk
+                            for attribute_id in attribute_ids
+                        ]
                     )
-                    or node_class == NodeClass.Variable
-                ):
-                    try:
-                        children = await node.get_children()
-                        for child in children:
-                            await _recurse_node(child)
-                    except Exception as err:
+                )
+
+            for index, ref in enumerate(chunk):
+                first_dv, data_type_dv, access_level_dv = data_values[
+                    index * len(attribute_ids) : (index + 1) * len(attribute_ids)
+                ]
+                node_id = ref.NodeId.to_string()
+                name = ref.BrowseName.Name
+                access_level = (
+                    access_level_dv.Value.Value
+                    if access_level_dv.StatusCode.is_good()
+                    else 0
+                )
+
+                if read_values:
+                    value_dv = first_dv
+                    if value_dv.StatusCode.value == ua.StatusCodes.BadNotReadable:
+                        _LOGGER.warning(
+                            f"Skipping unreadable node {node_id} ({name}): BadNotReadable"
+                        )
+                        continue
+                    if not value_dv.StatusCode.is_good():
                         _LOGGER.warning(
-                            f"Failed to get children for node {node_id} ({browse_name.Name}): {err}"
+                            f"UaStatusCodeError while reading node {node_id} ({name}): {value_dv.StatusCode.name}"
                         )
+                        continue
+
+                    value = value_dv.Value.Value if value_dv.Value else None
+                    array_size = None
+                    if _is_supported_array(value_dv.Value):
+                        array_size = len(value)
+                        value = None
+                    elif not isinstance(value, (int, float, str, bool)):
+                        _LOGGER.warning(
+                            f"Skipping node {node_id} ({name}) with unsupported value type: {type(value).__name__}"
+                        )
+                        continue
+                else:
+                    value = None
+                    array_size = None
+                    # Bit 0 of the AccessLevel attribute is CurrentRead
+                    if access_level_dv.StatusCode.is_good() and not access_level & 0x01:
+                        _LOGGER.warning(
+                            f"Skipping unreadable node {node_id} ({name}): BadNotReadable"
+                        )
+                        continue
+                    # ValueRank 1 is a one-dimensional array of unknown size,
+                    # 0 and above 1 are multi-dimensional arrays
+                    value_rank = (
+                        first_dv.Value.Value if first_dv.StatusCode.is_good() else -1
+                    )
+                    if value_rank == 1:
+                        array_size = 0
+                    elif value_rank >= 0:
+                        _LOGGER.warning(
+                            f"Skipping node {node_id} ({name}) with unsupported value rank: {value_rank}"
+                        )
+                        continue
+
+                discovered_nodes.append(
+                    {
+                        "name": name,
+                        "node_id": node_id,
+                        "value": value,
+                        "data_type": (
+                            data_type_dv.Value.Value.to_string()
+                            if data_type_dv.StatusCode.is_good()
+                            else None
+                        ),
+                        "access_level": access_level,
+                        "array_size": array_size,
+                    }
+                )
+
+        # Every variable needs one ReadValueId per attribute
+        chunk_size = max(1, self.read_chunk_size // len(attribute_ids))
+        await asyncio.gather(
+            *(
+                _read_chunk(variables[start : start + chunk_size])
+                for start in range(0, len(variables), chunk_size)
+            )
+        )
 
-            except Exception as err:
-                _LOGGER.warning(f"Error while processing node {node}: {err}")
+    @asyncua_wrapper
+    async def read_namespace_array(self) -> list[str]:
+        """Read the server NamespaceArray."""
+        node = self.client.get_node(ua.NodeId(ua.ObjectIds.Server_NamespaceArray))
+        return await node.read_value()
 
-        try:
-            root_node = self.client.get_node(self.root_node_id)
-            await _recurse_node(root_node)
-        except Exception as e:
-            _LOGGER.warning(
-                f"Failed to start node discovery from root node {self.root_node_id}: {e}"
+    @asyncua_wrapper
+    async def validate_nodes(
+        self, namespace_array: list[str] | None, nodes: list[dict[str, Any]]
+    ) -> bool:
+        """Check in a single Read that previously discovered nodes still exist.
+
+        The server NamespaceArray must be unchanged and every given node must
+        still resolve to the same browse name.
+        """
+        nodes_to_read = [
+            _read_value_id(ua.NodeId(ua.ObjectIds.Server_NamespaceArray))
+        ] + [
+            _read_value_id(
+                ua.NodeId.from_string(node["node_id"]), ua.AttributeIds.BrowseName
             )
+            for node in nodes
+        ]
+        namespace_dv, *browse_name_dvs = await self.client.uaclient.read(
+            _read_parameters(nodes_to_read)
+        )
 
-        return discovered_nodes
+        if not namespace_dv.StatusCode.is_good():
+            return False
+        if namespace_dv.Value.Value != namespace_array:
+            _LOGGER.debug("Server NamespaceArray changed")
+            return False
+
+        for node, browse_name_dv in zip(nodes, browse_name_dvs):
+            if (
+                not browse_name_dv.StatusCode.is_good()
+                or browse_name_dv.Value.Value.Name != node["name"]
+            ):
+                _LOGGER.debug(f"Node {node['node_id']} ({node['name']}) changed")
+                return False
+        return True
 
     @asyncua_wrapper
     async def get_value(self, nodeid: str) -> Any:
@@ -347,51 +984,482 @@ class OpcuaHub:
         return await node.read_value()
 
     @asyncua_wrapper
-    async def get_values(self, node_key_pair: dict[str, str]) -> dict[str, Any]:
-        if not node_key_pair:
-            return {}
+    async def get_values(self, indexes: Sequence[int]) -> int:
+        """Read the given registry nodes into its value table.
+
+        Reads use chunked multi-node Read requests through the shared
+        connection, so nodes also polled by another hub of the same endpoint
+        are only read once per scan. Nodes with a bad status are set to
+        ``UNAVAILABLE``, quarantined nodes are only read when their next
+        probe is due. Returns the number of values that changed.
+        """
+        registry = self.registry
+        node_ids = registry.node_ids
+        if self.node_health.has_quarantined:
+            now = time.monotonic()
+            indexes = [
+                index
+                for index in indexes
+                if self.node_health.is_due(node_ids[index], now)
+            ]
+        if not indexes:
+            return 0
+        if self.worker is not None:
+            return await self._get_values_from_worker(indexes)
+        start_time = time.perf_counter()
+        record = ReadRecord()
+        read_value_ids = registry.read_value_ids
+        data_values = await self.connection.read_values(
+            [read_value_ids[index] for index in indexes], record
+        )
 
-        result = {}
-        for name, nodeid in node_key_pair.items():
-            node = self.client.get_node(nodeid)
+        values = registry.values
+        bad = 0
+        changed = 0
+        for index, data_value in zip(indexes, data_values):
+            if data_value.StatusCode.is_good():
+                value = data_value.Value.Value if data_value.Value else None
+                if value != values[index]:
+                    changed += 1
+                values[index] = value
+                self.node_health.record_success(node_ids[index])
+                continue
+            if values[index] is not UNAVAILABLE:
+                changed += 1
+            values[index] = UNAVAILABLE
+            bad += 1
+            status = data_value.StatusCode.name
+            if self.node_health.record_failure(node_ids[index], status) == 1:
+                _LOGGER.warning(
+                    f"Skipping node {node_ids[index]} due to bad status: {status}"
+                )
+        self.metrics.record_scan(
+            time.perf_counter() - start_time,
+            record,
+            len(data_values) - bad,
+            bad,
+            changed,
+        )
+        return changed
+
+    async def _get_values_from_worker(self, indexes: Sequence[int]) -> int:
+        """Read the nodes in the worker process, see ``OpcuaWorker``.
+
+        Only the changed values are copied from the shared table, the node
+        health is updated from the bad statuses the worker reports.
+        """
+        registry = self.registry
+        node_ids = registry.node_ids
+        start_time = time.perf_counter()
+        await self.worker.async_start(node_ids)
+        stale, self._worker_stale = self._worker_stale, set()
+        try:
+            changed, bad, round_trips = await self.worker.read(indexes, stale)
+        except ConnectionError as e:
+            # The stale nodes may not have reached the worker
+            self._worker_stale.update(stale)
+            if not self.worker.is_running:
+                # Restarted with fresh values by the next scan
+                await self.worker.async_stop()
+            # The worker reconnects its own session after a transport error,
+            # the main session is unaffected either way
+            raise HomeAssistantError(f"OPC UA worker read failed: {e}") from None
+
+        values = registry.values
+        for index, value in changed.items():
+            values[index] = value
+
+        node_health = self.node_health
+        if node_health.failing:
+            failing = set(node_health.failing)
+            for index in indexes:
+                node_id = node_ids[index]
+                if node_id in failing and index not in bad:
+                    node_health.record_success(node_id)
+        for index, status in bad.items():
+            if node_health.record_failure(node_ids[index], status) == 1:
+                _LOGGER.warning(
+                    f"Skipping node {node_ids[index]} due to bad status: {status}"
+                )
+
+        record = ReadRecord()
+        for round_trip in round_trips:
+            record.add_round_trip(*round_trip)
+        self.metrics.record_scan(
+            time.perf_counter() - start_time,
+            record,
+            len(indexes) - len(bad),
+            len(bad),
+            len(changed),
+        )
+        return len(changed)
+
+    def invalidate_values(self, indexes: Iterable[int]):
+        """Mark values set outside of get_values, the worker reports them again."""
+        if self.worker is not None:
+            self._worker_stale.update(indexes)
+
+    async def stop_worker(self):
+        if self.worker is not None:
+            await self.worker.async_stop()
+
+    @asyncua_wrapper
+    async def subscribe_data_change(
+        self,
+        indexes: Sequence[int],
+        handler: Any,
+        publishing_interval: float = DEFAULT_PUBLISHING_INTERVAL,
+        sampling_interval: float = DEFAULT_SAMPLING_INTERVAL,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+    ) -> int:
+        """Create data change monitored items for the given registry nodes.
+
+        Nodes are spread over as many subscriptions as the server's
+        MaxMonitoredItemsPerSubscription limit requires. Returns the number of
+        monitored items that were created successfully.
+        """
+        await self._unsubscribe_data_change()
+
+        names = self.registry.names
+        items = [
+            (names[index], self.client.get_node(self.registry.node_id(index)))
+            for index in indexes
+        ]
+
+        per_subscription = self.connection.monitored_items_per_subscription
+        per_call = self.connection.monitored_items_per_call
+        monitored = 0
+        for start in range(0, len(items), per_subscription):
+            subscription_items = items[start : start + per_subscription]
+            subscription = await self.client.create_subscription(
+                publishing_interval, handler
+            )
+            self._subscriptions.append(subscription)
+            self._subscription_generation = self.connection.generation
+
+            for call_start in range(0, len(subscription_items), per_call):
+                call_items = subscription_items[call_start : call_start + per_call]
+                handles = await subscription.subscribe_data_change(
+                    [node for _, node in call_items],
+                    queuesize=queue_size,
+                    sampling_interval=sampling_interval,
+                )
+                for (name, node), handle in zip(call_items, handles):
+                    if isinstance(handle, ua.StatusCode):
+                        _LOGGER.warning(
+                            f"Failed to monitor node {node.nodeid.to_string()} ({name}): {handle.name}"
+                        )
+                        continue
+                    monitored += 1
+
+        _LOGGER.debug(
+            f"Monitoring {monitored} nodes in {len(self._subscriptions)} subscriptions"
+        )
+        return monitored
+
+    @asyncua_wrapper
+    async def history_read(
+        self,
+        nodes_to_read: list[ua.HistoryReadValueId],
+        details: ua.ReadRawModifiedDetails,
+        release_continuation_points: bool = False,
+    ) -> list[ua.HistoryReadResult]:
+        """Send a single HistoryRead request, continuation points are left to the caller."""
+        params = ua.HistoryReadParameters()
+        params.HistoryReadDetails = details
+        params.TimestampsToReturn = ua.TimestampsToReturn.Both
+        params.ReleaseContinuationPoints = release_continuation_points
+        params.NodesToRead = nodes_to_read
+        async with self.connection.scheduler.slot(PRIORITY_BACKGROUND):
+            return await self.client.uaclient.history_read(params)
+
+    @asyncua_wrapper
+    async def subscribe_events(
+        self,
+        notifiers: Sequence[ua.NodeId],
+        event_filter: ua.EventFilter,
+        handler: Any,
+        publishing_interval: float = DEFAULT_PUBLISHING_INTERVAL,
+        queue_size: int = EVENT_QUEUE_SIZE,
+    ) -> int:
+        """Create event monitored items on the notifier nodes.
+
+        Events get a subscription of their own, so that re-creating the data
+        change subscriptions does not lose queued alarms. Returns the number
+        of notifiers that were monitored successfully.
+        """
+        await self.unsubscribe_events()
+
+        self._event_subscription = await self.client.create_subscription(
+            publishing_interval, handler
+        )
+        self._event_subscription_generation = self.connection.generation
+        monitored = await self._monitor_events(
+            self._event_subscription, notifiers, event_filter, queue_size
+        )
+        _LOGGER.debug(f"Monitoring the events of {monitored} notifiers")
+        return monitored
+
+    @asyncua_wrapper
+    async def subscribe_model_changes(
+        self,
+        event_filter: ua.EventFilter,
+        handler: Any,
+        publishing_interval: float = DEFAULT_PUBLISHING_INTERVAL,
+    ) -> bool:
+        """Monitor the model change events of the Server object.
+
+        Returns whether the server accepted the event monitored item.
+        """
+        await self.unsubscribe_model_changes()
+
+        self._model_change_subscription = await self.client.create_subscription(
+            publishing_interval, handler
+        )
+        self._model_change_subscription_generation = self.connection.generation
+        return bool(
+            await self._monitor_events(
+                self._model_change_subscription,
+                [ua.NodeId(ua.ObjectIds.Server)],
+                event_filter,
+                EVENT_QUEUE_SIZE,
+            )
+        )
+
+    async def _monitor_events(
+        self,
+        subscription: Any,
+        notifiers: Sequence[ua.NodeId],
+        event_filter: ua.EventFilter,
+        queue_size: int,
+    ) -> int:
+        monitored = 0
+        for node_id in notifiers:
             try:
-                node_class = await node.read_node_class()
-                if node_class != NodeClass.Variable:
-                    _LOGGER.debug(
-                        f"Skipping node {nodeid} ({name}) because it is not a Variable (NodeClass={node_class.name})"
-                    )
+                await subscription.subscribe_events(
+                    node_id, evfilter=event_filter, queuesize=queue_size
+                )
+            except ua.UaStatusCodeError as e:
+                _LOGGER.warning(
+                    f"Failed to monitor the events of {node_id.to_string()}: {e}"
+                )
+                continue
+            monitored += 1
+        return monitored
+
+    async def unsubscribe(self):
+        """Delete all subscriptions created by the subscribe methods."""
+        await self._unsubscribe_data_change()
+        await self.unsubscribe_events()
+        await self.unsubscribe_model_changes()
+
+    async def _unsubscribe_data_change(self):
+        subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            try:
+                await subscription.delete()
+            except REQUEST_ERRORS as e:
+                _LOGGER.debug(f"Failed to delete subscription: {e}")
+
+    async def unsubscribe_events(self):
+        subscription, self._event_subscription = self._event_subscription, None
+        if subscription is None:
+            return
+        try:
+            await subscription.delete()
+        except REQUEST_ERRORS as e:
+            _LOGGER.debug(f"Failed to delete the event subscription: {e}")
+
+    async def unsubscribe_model_changes(self):
+        subscription, self._model_change_subscription = (
+            self._model_change_subscription,
+            None,
+        )
+        if subscription is None:
+            return
+        try:
+            await subscription.delete()
+        except REQUEST_ERRORS as e:
+            _LOGGER.debug(f"Failed to delete the model change subscription: {e}")
+
+    def set_nodes(self, nodes: list[dict[str, Any]]) -> NodeRegistry:
+        """Register the discovered nodes, their variant types spare writes a read."""
+        self.registry = NodeRegistry(nodes)
+        return self.registry
+
+    async def register_nodes(self):
+        """Register the nodes with the server, reads and writes use the handles."""
+        if self._register_nodes:
+            await self.connection.register_nodes(
+                read_value_id.NodeId for read_value_id in self.registry.read_value_ids
+            )
+
+    @asyncua_wrapper
+    async def set_values(self, values: list[tuple[str, Any]]) -> dict[str, str]:
+        """Write many nodes with chunked multi-node Write requests.
+
+        Variant types come from discovery, the data type of unknown nodes is
+        fetched with a batched Read scheduled like the writes. The writes are
+        sent ahead of queued reads in chunks respecting the server's
+        MaxNodesPerWrite limit. Returns the status code name of every node.
+        """
+        statuses = {}
+        ua_node_ids = {}
+        for nodeid, _ in values:
+            try:
+                ua_node_ids[nodeid] = ua.NodeId.from_string(nodeid)
+            except ua.UaStringParsingError:
+                # Reported per node like the other statuses, the valid nodes
+                # are still written
+                statuses[nodeid] = "BadNodeIdInvalid"
+        variant_types = {}
+        unknown = []
+        for nodeid, node_id in ua_node_ids.items():
+            variant_type = self.registry.variant_type(node_id)
+            if variant_type is None:
+                unknown.append(nodeid)
+            else:
+                variant_types[nodeid] = variant_type
+        if unknown:
+            data_type_dvs = await self.connection.read_values(
+                [
+                    _read_value_id(ua_node_ids[nodeid], ua.AttributeIds.DataType)
+                    for nodeid in unknown
+                ],
+                priority=PRIORITY_WRITE,
+            )
+            data_types = {}
+            for nodeid, data_type_dv in zip(unknown, data_type_dvs):
+                if not data_type_dv.StatusCode.is_good():
+                    statuses[nodeid] = data_type_dv.StatusCode.name
                     continue
-                value = await node.read_value()
-                result[name] = value
-            except Exception as e:
-                _LOGGER.warning(f"Skipping node {nodeid} ({name}) due to error: {e}")
-                self._connected = False
+                data_types[nodeid] = data_type_dv.Value.Value.to_string()
+            resolved = await self._resolve_data_types(set(data_types.values()))
+            for nodeid, data_type in data_types.items():
+                if data_type in resolved:
+                    variant_types[nodeid] = resolved[data_type]
+
+        node_ids = []
+        nodes_to_write = []
+        for nodeid, value in values:
+            if nodeid in statuses:
+                _LOGGER.warning(f"Skipping write of node {nodeid}: {statuses[nodeid]}")
                 continue
+            try:
+                variant = _to_variant(value, variant_types[nodeid])
+                write_value = ua.WriteValue()
+                write_value.NodeId = self.connection.handle(ua_node_ids[nodeid])
+                write_value.AttributeId = ua.AttributeIds.Value
+                write_value.Value = ua.DataValue(variant)
+            except _CONVERSION_ERRORS as e:
+                _LOGGER.warning(f"Skipping write of node {nodeid}: {e}")
+                statuses[nodeid] = "BadTypeMismatch"
+                continue
+            node_ids.append(nodeid)
+            nodes_to_write.append(write_value)
+
+        results = await self.connection.write_values(nodes_to_write)
+        for nodeid, status in zip(node_ids, results):
+            statuses[nodeid] = status.name
+            if not status.is_good():
+                _LOGGER.warning(f"Failed to write node {nodeid}: {status.name}")
 
-        return result
+        return statuses
 
     @asyncua_wrapper
     async def set_value(self, nodeid: str, value: Any) -> bool:
         node = self.client.get_node(nodeid)
-        variant_type = await node.read_data_type_as_variant_type()
+        variant_type = self.registry.variant_type(node.nodeid)
+        if variant_type is None:
+            variant_type = await node.read_data_type_as_variant_type()
 
         # Convert value safely to UA variant
-        variant = ua_utils.string_to_variant(
-            value if isinstance(value, str) else str(value), variant_type
-        )
-
-        await node.write_value(ua.DataValue(variant))
+        variant = _to_variant(value, variant_type)
+
+        write_value = ua.WriteValue()
+        write_value.NodeId = self.connection.handle(node.nodeid)
+        write_value.AttributeId = ua.AttributeIds.Value
+        write_value.Value = ua.DataValue(variant)
+        (status,) = await self.connection.write_values([write_value])
+        status.check()
         return True
 
 
 class AsyncuaCoordinator(DataUpdateCoordinator):
-    """Coordinator for managing OPC UA polling."""
+    """Coordinator for managing OPC UA polling.
+
+    The coordinator data is the value table of the hub's node registry,
+    entities read their value by registry index.
+    """
 
     def __init__(
-        self, hass, name, hub: OpcuaHub, update_interval_in_second=DEFAULT_SCAN_INTERVAL
+        self,
+        hass,
+        name,
+        hub: OpcuaHub,
+        update_interval_in_second=DEFAULT_SCAN_INTERVAL,
+        update_mode: str = UPDATE_MODE_POLLING,
+        publishing_interval: float = DEFAULT_PUBLISHING_INTERVAL,
+        sampling_interval: float = DEFAULT_SAMPLING_INTERVAL,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        polling_groups: list[dict[str, Any]] | None = None,
+        array_mode: str = DEFAULT_ARRAY_MODE,
+        history_backfill: bool = DEFAULT_HISTORY_BACKFILL,
+        min_scan_interval: float = DEFAULT_MIN_SCAN_INTERVAL,
+        max_scan_interval: float = DEFAULT_MAX_SCAN_INTERVAL,
+        event_notifiers: list[str] | None = None,
+        event_fields: list[str] | None = None,
+        rescan_on_model_change: bool = DEFAULT_RESCAN_ON_MODEL_CHANGE,
     ):
         self._hub = hub
-        self._node_key_pair = {}
+        self.array_mode = array_mode
+        self.history_backfill = (
+            HistoryBackfill(hass, hub, name) if history_backfill else None
+        )
+        # Outages of a shared connection from before this hub are not backfilled
+        self._backfilled_outage = hub.connection.last_outage
+        self._backfill_task = None
+        self.event_stream = (
+            EventStream(
+                hass, name, event_notifiers, event_fields or DEFAULT_EVENT_FIELDS
+            )
+            if event_notifiers
+            else None
+        )
+        self.model_change_watcher = (
+            ModelChangeWatcher(hass, self.async_rescan)
+            if rescan_on_model_change
+            else None
+        )
+        # Set by the entry when rescans should update the discovery cache
+        self.discovery_cache: DiscoveryCache | None = None
+        self._rescan_lock = asyncio.Lock()
+        self._default_indexes = []
+        self._polling_groups = [
+            PollingGroup.from_config(config) for config in polling_groups or []
+        ]
+        self._polling_group_unsubs = []
+        self._node_groups = {}
+        self._notified_values = []
+        # Update callback and context of every listener by its remove function
+        self._listener_contexts: dict[CALLBACK_TYPE, tuple[CALLBACK_TYPE, Any]] = {}
+        # Indexes read, pushed or written since the entities were last notified
+        self._touched_indexes: set[int] = set()
+        self._last_notified_success = True
+        self._update_mode = update_mode
+        self._publishing_interval = publishing_interval
+        self._sampling_interval = sampling_interval
+        self._queue_size = queue_size
+        self._subscription_active = False
+        self._pending_changes = {}
+        self._adaptive_interval = None
+        if update_mode == UPDATE_MODE_ADAPTIVE:
+            self._adaptive_interval = AdaptiveInterval(
+                update_interval_in_second.total_seconds(),
+                min_scan_interval,
+                max_scan_interval,
+            )
+            update_interval_in_second = self._adaptive_interval.interval
         super().__init__(
             hass, _LOGGER, name=name, update_interval=update_interval_in_second
         )
@@ -401,37 +1469,491 @@ class AsyncuaCoordinator(DataUpdateCoordinator):
         return self._hub
 
     @property
-    def node_key_pair(self) -> dict:
-        return self._node_key_pair
+    def registry(self) -> NodeRegistry:
+        return self._hub.registry
 
     def set_nodes(self, nodes: list[dict[str, Any]]):
-        self._node_key_pair = {node["name"]: node["node_id"] for node in nodes}
+        registry = self._hub.set_nodes(nodes)
+        self._notified_values = list(registry.values)
+        self._touched_indexes = set()
+
+        # Every node is polled by the first group it matches, or by the
+        # coordinator update interval when it matches none.
+        self._default_indexes = []
+        self._node_groups = {}
+        for group in self._polling_groups:
+            group.indexes = []
+        for index in range(len(registry)):
+            self._assign_polling_group(index)
+
+    def _assign_polling_group(self, index: int):
+        registry = self.registry
+        variant_type = registry.variant_types[index]
+        group = next(
+            (
+                group
+                for group in self._polling_groups
+                if group.matches(
+                    registry.names[index],
+                    registry.node_ids[index],
+                    variant_type.name if variant_type else None,
+                )
+            ),
+            None,
+        )
+        if group:
+            self._node_groups[index] = group
+        indexes = (
+            group.indexes if group and group.scan_interval else self._default_indexes
+        )
+        indexes.append(index)
+
+    async def async_rescan(self) -> dict[str, list[str]]:
+        """Discover the nodes again while the hub stays online.
+
+        Entities are added for the new nodes and removed for the nodes the
+        server no longer has, the entities and values of the other nodes are
+        untouched and polling goes on. Returns the names of the added and the
+        retired nodes.
+        """
+        async with self._rescan_lock:
+            nodes = await self._hub.discover_nodes()
+            registry = self.registry
+            added, retired = registry.update(nodes)
+
+            if retired:
+                retired_set = set(retired)
+                self._default_indexes = [
+                    index for index in self._default_indexes if index not in retired_set
+                ]
+                for group in self._polling_groups:
+                    group.indexes = [
+                        index for index in group.indexes if index not in retired_set
+                    ]
+                for index in retired:
+                    self._node_groups.pop(index, None)
+                    self._notified_values[index] = UNAVAILABLE
+                    self._hub.node_health.discard(registry.node_ids[index])
+            for index in added:
+                self._notified_values.append(UNAVAILABLE)
+                self._assign_polling_group(index)
+
+            if self.discovery_cache:
+                try:
+                    await self.discovery_cache.async_save(self._hub, nodes)
+                except CACHE_ERRORS as e:
+                    _LOGGER.warning(f"Failed to save the discovery cache: {e}")
+
+            if added:
+                await self._hub.register_nodes()
+                await self._async_read_data(added)
+                if self._polling_groups:
+                    # Groups without nodes so far have no polling loop yet
+                    self.async_stop_polling_groups()
+                    self.async_start_polling_groups()
+            if self._update_mode == UPDATE_MODE_SUBSCRIPTION and (added or retired):
+                await self._async_subscribe()
+
+            self._async_retire_entities(retired)
+            if added:
+                async_dispatcher_send(
+                    self.hass, SIGNAL_NODES_ADDED.format(self.name), added
+                )
+            self.data = registry.values
+            self.async_update_listeners()
+
+        _LOGGER.info(
+            f"Rescan of {self.name}: {len(added)} nodes added, {len(retired)} retired"
+        )
+        return {
+            "added": [registry.names[index] for index in added],
+            "retired": [registry.names[index] for index in retired],
+        }
+
+    @callback
+    def _async_retire_entities(self, retired: list[int]) -> None:
+        """Notify the entities of retired nodes, they remove themselves."""
+        retired_set = set(retired)
+        for update_callback, context in list(self._listener_contexts.values()):
+            index = context[0] if type(context) is tuple else context
+            if index in retired_set:
+                update_callback()
+
+    @callback
+    def async_start_polling_groups(self) -> None:
+        """Start one polling loop per group, sharing the hub connection."""
+        if self._update_mode == UPDATE_MODE_SUBSCRIPTION:
+            return
+        for group in self._polling_groups:
+            if not group.scan_interval or not group.indexes:
+                continue
+            _LOGGER.debug(
+                f"Polling group {group.name}: {len(group.indexes)} nodes every {group.scan_interval}"
+            )
+            self._polling_group_unsubs.append(
+                async_track_time_interval(
+                    self.hass,
+                    functools.partial(self._async_poll_group, group),
+                    group.scan_interval,
+                    name=f"{self.name} polling group {group.name}",
+                )
+            )
+
+    @callback
+    def async_stop_polling_groups(self) -> None:
+        for unsub in self._polling_group_unsubs:
+            unsub()
+        self._polling_group_unsubs = []
+
+    async def _async_poll_group(self, group: PollingGroup, _now=None) -> None:
+        if group.polling:
+            _LOGGER.debug(f"Polling group {group.name} is still running, skipping")
+            return
+        group.polling = True
+        try:
+            await self._async_read_data(group.indexes)
+        finally:
+            group.polling = False
+
+        # Update entities without rescheduling the coordinator's own refresh
+        self.data = self.registry.values
+        self.async_update_listeners()
+
+    @callback
+    def async_add_listener(
+        self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """Listen for data updates, keeping the context of every listener."""
+        remove = super().async_add_listener(update_callback, context)
+
+        @callback
+        def remove_listener() -> None:
+            self._listener_contexts.pop(remove_listener, None)
+            remove()
+
+        self._listener_contexts[remove_listener] = (update_callback, context)
+        return remove_listener
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify only the entities whose node value changed.
+
+        Entities register with their registry index as listener context,
+        array element entities with an ``(index, element)`` tuple. Only the
+        nodes touched since the last notification are compared. Listeners
+        without a context and availability changes still notify everyone,
+        diagnostic entities are notified after every update.
+        """
+        values = self.registry.values
+        if self.last_update_success != self._last_notified_success:
+            self._last_notified_success = self.last_update_success
+            self._notified_values = list(values)
+            self._touched_indexes = set()
+            super().async_update_listeners()
+            return
+
+        changed = self._changed_nodes(values)
+        for update_callback, context in list(self._listener_contexts.values()):
+            if context == DIAGNOSTICS_CONTEXT or (
+                changed and (context is None or context in changed)
+            ):
+                update_callback()
+
+    def _changed_nodes(self, values: list[Any]) -> set[int]:
+        """Diff the touched values against the values entities were last notified with."""
+        touched, self._touched_indexes = self._touched_indexes, set()
+        notified = self._notified_values
+        changed = set()
+        for index in touched:
+            old_value = notified[index]
+            value = values[index]
+            if old_value is value or old_value == value:
+                continue
+            group = self._node_groups.get(index)
+            if group and not group.exceeds_deadband(old_value, value):
+                continue
+            if self.array_mode == ARRAY_MODE_ELEMENTS and (
+                type(value) is list or type(old_value) is list
+            ):
+                changed.update(_changed_elements(index, old_value, value))
+            notified[index] = value
+            changed.add(index)
+        return changed
+
+    @callback
+    def _async_start_history_backfill(self) -> None:
+        """Backfill the outage the connection last recovered from, once."""
+        outage = self._hub.connection.last_outage
+        if (
+            self.history_backfill is None
+            or outage is self._backfilled_outage
+            or (self._backfill_task and not self._backfill_task.done())
+        ):
+            return
+        self._backfilled_outage = outage
+        self._backfill_task = self.hass.async_create_background_task(
+            self.history_backfill.async_backfill(*outage),
+            f"{self.name} history backfill",
+        )
+
+    @callback
+    def async_stop_history_backfill(self) -> None:
+        if self._backfill_task:
+            self._backfill_task.cancel()
+            self._backfill_task = None
+
+    async def _async_update_data(self) -> list[Any]:
+        self._async_start_history_backfill()
+        if (
+            self.event_stream
+            and not (self.event_stream.active and self._hub.is_event_subscribed)
+            and self._hub.is_connected
+        ):
+            await self._async_subscribe_events()
+        if (
+            self.model_change_watcher
+            and not (
+                self.model_change_watcher.active
+                and self._hub.is_model_change_subscribed
+            )
+            and self._hub.is_connected
+        ):
+            await self._async_subscribe_model_changes()
+        if self._update_mode != UPDATE_MODE_SUBSCRIPTION:
+            if self.data is None:
+                # The first refresh reads every node, groups then take over
+                await self._async_read_data(range(len(self.registry)))
+            elif self._adaptive_interval:
+                start_time = time.perf_counter()
+                changed = await self._async_read_data(self._default_indexes)
+                # Applies to the next refresh, scheduled once this one is done
+                self.update_interval = self._adaptive_interval.update(
+                    time.perf_counter() - start_time,
+                    changed,
+                    len(self._default_indexes),
+                )
+            else:
+                await self._async_read_data(self._default_indexes)
+            return self.registry.values
+
+        # In subscription mode values are pushed by the server, the periodic
+        # refresh only acts as a watchdog that re-subscribes after a failure.
+        if self._subscription_active and self._hub.is_subscribed:
+            return self.registry.values
+
+        await self._async_read_data(self.registry.active_indexes)
+        if self._hub.is_connected:
+            await self._async_subscribe()
+        return self.registry.values
+
+    async def _async_subscribe(self):
+        _LOGGER.debug("Coordinator creating subscriptions…")
+        try:
+            await self._hub.subscribe_data_change(
+                self.registry.active_indexes,
+                _DataChangeHandler(self),
+                publishing_interval=self._publishing_interval,
+                sampling_interval=self._sampling_interval,
+                queue_size=self._queue_size,
+            )
+            self._subscription_active = True
+        except REQUEST_ERRORS as e:
+            _LOGGER.warning(f"Failed to create subscriptions: {e}")
+            self._subscription_active = False
+
+    async def _async_subscribe_events(self):
+        notifiers = []
+        for notifier in self.event_stream.notifiers:
+            try:
+                notifiers.append(notifier_node_id(notifier, self._hub.root_node_id))
+            except ua.UaStringParsingError as e:
+                _LOGGER.warning(f"Invalid event notifier {notifier}: {e}")
+        try:
+            await self._hub.subscribe_events(
+                notifiers,
+                self.event_stream.event_filter,
+                self.event_stream,
+                publishing_interval=self._publishing_interval,
+            )
+            self.event_stream.active = True
+        except REQUEST_ERRORS as e:
+            _LOGGER.warning(f"Failed to create the event subscription: {e}")
+            self.event_stream.active = False
+
+    async def _async_subscribe_model_changes(self):
+        try:
+            await self._hub.subscribe_model_changes(
+                self.model_change_watcher.event_filter,
+                self.model_change_watcher,
+                publishing_interval=self._publishing_interval,
+            )
+            self.model_change_watcher.active = True
+        except REQUEST_ERRORS as e:
+            _LOGGER.warning(f"Failed to subscribe to model changes: {e}")
+            self.model_change_watcher.active = False
+
+    async def async_write_value(self, node_id: str, value: Any) -> bool:
+        """Write a node and update its entity without waiting for the next poll."""
+        success = await self._hub.set_value(node_id, value)
+        if success:
+            self._async_write_through([(node_id, value)])
+        return success
+
+    async def async_write_values(self, values: list[tuple[str, Any]]) -> dict[str, str]:
+        """Write many nodes, updating the entities of the successful writes."""
+        statuses = await self._hub.set_values(values)
+        self._async_write_through(
+            [
+                (node_id, value)
+                for node_id, value in values
+                if statuses.get(node_id) == "Good"
+            ]
+        )
+        return statuses
+
+    @callback
+    def _async_write_through(self, values: list[tuple[str, Any]]) -> None:
+        """Store values the server acknowledged and notify only their entities.
+
+        In polling modes a single Read of the written nodes then confirms the
+        values the server actually holds, instead of a refresh of every node.
+        Subscriptions push them by themselves.
+        """
+        registry = self.registry
+        table = registry.values
+        indexes = []
+        for node_id, value in values:
+            index = registry.index(ua.NodeId.from_string(node_id))
+            if index is None or index in registry.array_sizes:
+                continue
+            try:
+                table[index] = _to_variant(value, registry.variant_types[index]).Value
+            except _CONVERSION_ERRORS as e:
+                # The read-back fetches the value the server stored
+                _LOGGER.debug(f"Not writing through the value of {node_id}: {e}")
+            indexes.append(index)
+        if not indexes:
+            return
+        self._hub.invalidate_values(indexes)
+        self._touched_indexes.update(indexes)
+
+        # Update entities without rescheduling the coordinator's own refresh
+        self.data = table
+        self.async_update_listeners()
+        if self._update_mode != UPDATE_MODE_SUBSCRIPTION:
+            self.hass.async_create_background_task(
+                self._async_read_back(indexes), f"{self.name} write read-back"
+            )
 
-    async def _async_update_data(self) -> dict[str, Any]:
+    async def _async_read_back(self, indexes: list[int]) -> None:
+        await self._async_read_data(indexes)
+        self.data = self.registry.values
+        self.async_update_listeners()
+
+    @callback
+    def async_handle_data_change(self, node_id: ua.NodeId, value: Any) -> None:
+        """Queue a value pushed by a subscription.
+
+        ``UNAVAILABLE`` makes only the entity of the node unavailable.
+        """
+        index = self.registry.index(node_id)
+        if index is None:
+            return
+        if not self._pending_changes:
+            # Coalesce all notifications of a publish response into one update
+            self.hass.loop.call_soon(self._async_flush_data_changes)
+        self._pending_changes[index] = value
+
+    @callback
+    def _async_flush_data_changes(self) -> None:
+        changes, self._pending_changes = self._pending_changes, {}
+        if changes:
+            values = self.registry.values
+            for index, value in changes.items():
+                values[index] = value
+            self._hub.invalidate_values(changes)
+            self._touched_indexes.update(changes)
+            self.async_set_updated_data(values)
+
+    @callback
+    def async_handle_subscription_status(self, status: Any) -> None:
+        """Mark subscriptions as lost so the next refresh re-subscribes."""
+        _LOGGER.warning(f"Subscription status changed: {status}")
+        if status.value == ua.StatusCodes.BadShutdown:
+            # Lost with the connection, which keeps the subscriptions when it
+            # reactivates or transfers the session
+            return
+        self._subscription_active = False
+
+    async def _async_read_data(self, indexes: Sequence[int]) -> int | None:
+        """Read the nodes into the value table, failed reads make them unavailable.
+
+        Returns the number of values that changed, None when the read failed.
+        """
         _LOGGER.debug("Coordinator fetching data…")
         try:
             # Ensure connected before fetching
             connected = await self._hub.ensure_connected()
             if not connected:
-                _LOGGER.warning("Could not establish OPC UA connection")
-                return {}  # return empty data instead of raising
-
-            return await self._hub.get_values(self._node_key_pair)
-
-        except (asyncio.TimeoutError, ConnectionError, asyncio.CancelledError) as e:
+                _LOGGER.debug(
+                    f"OPC UA connection {self._hub.connection.state}, skipping update"
+                )
+                self.registry.set_unavailable(indexes)
+                self._hub.invalidate_values(indexes)
+                return None
+
+            return await self._hub.get_values(indexes)
+
+        except (TimeoutError, ConnectionError) as e:
+            # The connection reconnects in the background, the next refresh
+            # reads again once it is back
             _LOGGER.warning(f"Connection lost during update: {e}")
-            self._hub._connected = False
-            await self._hub.safe_disconnect()
 
-            # Try reconnect
-            connected = await self._hub.connect()
-            if not connected:
-                _LOGGER.error("Reconnect failed during update")
-                return {}
-
-            # Retry fetch once
-            return await self._hub.get_values(self._node_key_pair)
+        except asyncio.CancelledError:
+            if asyncio.current_task().cancelling():
+                # Unloading or shutting down, the task itself is cancelled
+                raise
+            # asyncua cancels the requests in flight when a secure channel is
+            # closed under them, the connection reconnects like above
+            _LOGGER.warning("Connection lost during update: request cancelled")
 
         except Exception as e:
             _LOGGER.error(f"Unexpected error during data update: {e}")
-            return {}  # return empty instead of raise
+
+        finally:
+            # Entities are notified of what the read changed, see _changed_nodes
+            self._touched_indexes.update(indexes)
+
+        self.registry.set_unavailable(indexes)
+        self._hub.invalidate_values(indexes)
+
+
+def _changed_elements(index: int, old_value: Any, value: Any) -> list[tuple[int, int]]:
+    """Return the listener contexts of the array elements that changed."""
+    old_list = old_value if type(old_value) is list else []
+    new_list = value if type(value) is list else []
+    if len(old_list) != len(new_list):
+        return [
+            (index, element) for element in range(max(len(old_list), len(new_list)))
+        ]
+    return [
+        (index, element)
+        for element, (old, new) in enumerate(zip(old_list, new_list))
+        if old != new
+    ]
+
+
+class _DataChangeHandler:
+    """asyncua subscription handler forwarding notifications to the coordinator."""
+
+    def __init__(self, coordinator: AsyncuaCoordinator):
+        self._coordinator = coordinator
+
+    def datachange_notification(self, node, val, data):
+        if not data.monitored_item.Value.StatusCode.is_good():
+            self._coordinator.async_handle_data_change(node.nodeid, UNAVAILABLE)
+            return
+        self._coordinator.async_handle_data_change(node.nodeid, val)
+
+    def status_change_notification(self, status):
+        self._coordinator.async_handle_subscription_status(status.Status)
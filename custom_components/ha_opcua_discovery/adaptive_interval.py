@@ -0,0 +1,51 @@
+"""Scan interval adapting to the poll duration and the change rate of the values."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from .const import (
+    ADAPTIVE_ACTIVE_RATIO,
+    ADAPTIVE_IDLE_RATIO,
+    ADAPTIVE_MAX_DUTY_CYCLE,
+    ADAPTIVE_SHRINK_FACTOR,
+    ADAPTIVE_STRETCH_FACTOR,
+)
+
+
+class AdaptiveInterval:
+    """Scan interval of the adaptive update mode.
+
+    After every poll the interval shrinks towards ``min_interval`` when at
+    least ``ADAPTIVE_ACTIVE_RATIO`` of the values changed, and stretches
+    towards ``max_interval`` when at most ``ADAPTIVE_IDLE_RATIO`` did. A poll
+    never takes more than ``ADAPTIVE_MAX_DUTY_CYCLE`` of the interval, so a
+    slow server is polled less often, even beyond ``max_interval``. The next
+    poll is scheduled once the previous one finished, polls never overlap.
+    """
+
+    def __init__(self, interval: float, min_interval: float, max_interval: float):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self._interval = min(self.max_interval, max(self.min_interval, interval))
+
+    @property
+    def interval(self) -> timedelta:
+        return timedelta(seconds=self._interval)
+
+    def update(self, duration: float, changed: int | None, total: int) -> timedelta:
+        """Return the next interval after a poll of ``total`` nodes.
+
+        ``changed`` is None when the poll failed, the interval then only
+        follows the duration.
+        """
+        interval = self._interval
+        if changed is not None and total:
+            ratio = changed / total
+            if ratio >= ADAPTIVE_ACTIVE_RATIO:
+                interval *= ADAPTIVE_SHRINK_FACTOR
+            elif ratio <= ADAPTIVE_IDLE_RATIO:
+                interval *= ADAPTIVE_STRETCH_FACTOR
+        interval = min(self.max_interval, max(self.min_interval, interval))
+        self._interval = max(interval, duration / ADAPTIVE_MAX_DUTY_CYCLE)
+        return self.interval
@@ -12,6 +12,7 @@ from homeassistant.const import (
     CONF_PASSWORD,
 )
 from homeassistant.core import callback
+from homeassistant.helpers import selector
 
 from .const import (
     DOMAIN,
@@ -21,7 +22,54 @@ from .const import (
     CONF_HUB_USERNAME,
     CONF_HUB_PASSWORD,
     CONF_HUB_ROOT_NODE,
+    CONF_HUB_UPDATE_MODE,
+    CONF_HUB_PUBLISHING_INTERVAL,
+    CONF_HUB_SAMPLING_INTERVAL,
+    CONF_HUB_QUEUE_SIZE,
+    UPDATE_MODE_POLLING,
+    UPDATE_MODES,
+    DEFAULT_PUBLISHING_INTERVAL,
+    DEFAULT_SAMPLING_INTERVAL,
+    DEFAULT_QUEUE_SIZE,
+    CONF_HUB_DISCOVERY_CONCURRENCY,
+    DEFAULT_DISCOVERY_CONCURRENCY,
+    CONF_HUB_DISCOVERY_CACHE,
+    DEFAULT_DISCOVERY_CACHE,
+    CONF_HUB_POLLING_GROUPS,
+    CONF_HUB_SESSIONS,
+    DEFAULT_SESSIONS,
+    CONF_HUB_MAX_DEPTH,
+    DEFAULT_MAX_DEPTH,
+    CONF_HUB_INCLUDE,
+    CONF_HUB_EXCLUDE,
+    CONF_HUB_NODE_CLASSES,
+    NODE_CLASSES,
+    DEFAULT_NODE_CLASSES,
+    CONF_HUB_REFERENCE_TYPES,
+    REFERENCE_TYPES,
+    DEFAULT_REFERENCE_TYPES,
+    CONF_HUB_DISCOVERY_READ_VALUES,
+    DEFAULT_DISCOVERY_READ_VALUES,
+    CONF_HUB_ARRAY_MODE,
+    ARRAY_MODES,
+    DEFAULT_ARRAY_MODE,
+    CONF_HUB_HISTORY_BACKFILL,
+    DEFAULT_HISTORY_BACKFILL,
+    CONF_HUB_REGISTER_NODES,
+    DEFAULT_REGISTER_NODES,
+    CONF_HUB_MIN_SCAN_INTERVAL,
+    CONF_HUB_MAX_SCAN_INTERVAL,
+    DEFAULT_MIN_SCAN_INTERVAL,
+    DEFAULT_MAX_SCAN_INTERVAL,
+    CONF_HUB_EVENT_NOTIFIERS,
+    CONF_HUB_EVENT_FIELDS,
+    DEFAULT_EVENT_FIELDS,
+    CONF_HUB_WORKER_PROCESS,
+    DEFAULT_WORKER_PROCESS,
+    CONF_HUB_RESCAN_ON_MODEL_CHANGE,
+    DEFAULT_RESCAN_ON_MODEL_CHANGE,
 )
+from .polling_group import POLLING_GROUPS_SCHEMA
 
 DEFAULT_SCAN_INTERVAL = 10
 
@@ -51,6 +99,27 @@ class AsyncUAConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
                     ),
                     CONF_HUB_ROOT_NODE: user_input.get(CONF_HUB_ROOT_NODE, "").strip(),
+                    CONF_HUB_UPDATE_MODE: user_input.get(
+                        CONF_HUB_UPDATE_MODE, UPDATE_MODE_POLLING
+                    ),
+                    CONF_HUB_PUBLISHING_INTERVAL: user_input.get(
+                        CONF_HUB_PUBLISHING_INTERVAL, DEFAULT_PUBLISHING_INTERVAL
+                    ),
+                    CONF_HUB_SAMPLING_INTERVAL: user_input.get(
+                        CONF_HUB_SAMPLING_INTERVAL, DEFAULT_SAMPLING_INTERVAL
+                    ),
+                    CONF_HUB_QUEUE_SIZE: user_input.get(
+                        CONF_HUB_QUEUE_SIZE, DEFAULT_QUEUE_SIZE
+                    ),
+                    CONF_HUB_DISCOVERY_CONCURRENCY: user_input.get(
+                        CONF_HUB_DISCOVERY_CONCURRENCY, DEFAULT_DISCOVERY_CONCURRENCY
+                    ),
+                    CONF_HUB_DISCOVERY_CACHE: user_input.get(
+                        CONF_HUB_DISCOVERY_CACHE, DEFAULT_DISCOVERY_CACHE
+                    ),
+                    CONF_HUB_SESSIONS: user_input.get(
+                        CONF_HUB_SESSIONS, DEFAULT_SESSIONS
+                    ),
                 },
             )
 
@@ -62,6 +131,26 @@ class AsyncUAConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Optional(CONF_PASSWORD): str,
                 vol.Optional(CONF_SCAN_INTERVAL, default=DEFAULT_SCAN_INTERVAL): int,
                 vol.Required(CONF_HUB_ROOT_NODE, default="ns=2;i=1"): str,
+                vol.Optional(CONF_HUB_UPDATE_MODE, default=UPDATE_MODE_POLLING): vol.In(
+                    UPDATE_MODES
+                ),
+                vol.Optional(
+                    CONF_HUB_PUBLISHING_INTERVAL, default=DEFAULT_PUBLISHING_INTERVAL
+                ): int,
+                vol.Optional(
+                    CONF_HUB_SAMPLING_INTERVAL, default=DEFAULT_SAMPLING_INTERVAL
+                ): int,
+                vol.Optional(CONF_HUB_QUEUE_SIZE, default=DEFAULT_QUEUE_SIZE): int,
+                vol.Optional(
+                    CONF_HUB_DISCOVERY_CONCURRENCY,
+                    default=DEFAULT_DISCOVERY_CONCURRENCY,
+                ): vol.All(int, vol.Range(min=1)),
+                vol.Optional(
+                    CONF_HUB_DISCOVERY_CACHE, default=DEFAULT_DISCOVERY_CACHE
+                ): bool,
+                vol.Optional(CONF_HUB_SESSIONS, default=DEFAULT_SESSIONS): vol.All(
+                    int, vol.Range(min=1)
+                ),
             }
         )
 
@@ -81,6 +170,7 @@ class AsyncUAOptionsFlow(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
+        errors = {}
         if user_input is not None:
             url = user_input[CONF_URL]
             username = user_input.get(CONF_USERNAME)
@@ -89,25 +179,102 @@ class AsyncUAOptionsFlow(config_entries.OptionsFlow):
             scan_interval = user_input.get(
                 CONF_HUB_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
             )
-
-            # Update the options by creating the entry
-            result = self.async_create_entry(
-                title="",
-                data={
-                    CONF_HUB_URL: url,
-                    CONF_HUB_USERNAME: username,
-                    CONF_HUB_PASSWORD: password,
-                    CONF_HUB_SCAN_INTERVAL: scan_interval,
-                    CONF_HUB_ROOT_NODE: root_node,
-                },
+            update_mode = user_input.get(CONF_HUB_UPDATE_MODE, UPDATE_MODE_POLLING)
+            publishing_interval = user_input.get(
+                CONF_HUB_PUBLISHING_INTERVAL, DEFAULT_PUBLISHING_INTERVAL
             )
-
-            # Schedule reload after returning the entry
-            self.hass.async_create_task(
-                self.hass.config_entries.async_reload(self.config_entry.entry_id)
+            sampling_interval = user_input.get(
+                CONF_HUB_SAMPLING_INTERVAL, DEFAULT_SAMPLING_INTERVAL
+            )
+            queue_size = user_input.get(CONF_HUB_QUEUE_SIZE, DEFAULT_QUEUE_SIZE)
+            discovery_concurrency = user_input.get(
+                CONF_HUB_DISCOVERY_CONCURRENCY, DEFAULT_DISCOVERY_CONCURRENCY
+            )
+            discovery_cache = user_input.get(
+                CONF_HUB_DISCOVERY_CACHE, DEFAULT_DISCOVERY_CACHE
+            )
+            sessions = user_input.get(CONF_HUB_SESSIONS, DEFAULT_SESSIONS)
+            max_depth = user_input.get(CONF_HUB_MAX_DEPTH, DEFAULT_MAX_DEPTH)
+            include = user_input.get(CONF_HUB_INCLUDE, [])
+            exclude = user_input.get(CONF_HUB_EXCLUDE, [])
+            node_classes = user_input.get(CONF_HUB_NODE_CLASSES) or DEFAULT_NODE_CLASSES
+            reference_types = (
+                user_input.get(CONF_HUB_REFERENCE_TYPES) or DEFAULT_REFERENCE_TYPES
+            )
+            discovery_read_values = user_input.get(
+                CONF_HUB_DISCOVERY_READ_VALUES, DEFAULT_DISCOVERY_READ_VALUES
+            )
+            array_mode = user_input.get(CONF_HUB_ARRAY_MODE, DEFAULT_ARRAY_MODE)
+            history_backfill = user_input.get(
+                CONF_HUB_HISTORY_BACKFILL, DEFAULT_HISTORY_BACKFILL
+            )
+            register_nodes = user_input.get(
+                CONF_HUB_REGISTER_NODES, DEFAULT_REGISTER_NODES
+            )
+            worker_process = user_input.get(
+                CONF_HUB_WORKER_PROCESS, DEFAULT_WORKER_PROCESS
+            )
+            rescan_on_model_change = user_input.get(
+                CONF_HUB_RESCAN_ON_MODEL_CHANGE, DEFAULT_RESCAN_ON_MODEL_CHANGE
+            )
+            min_scan_interval = user_input.get(
+                CONF_HUB_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+            )
+            max_scan_interval = user_input.get(
+                CONF_HUB_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
             )
+            event_notifiers = user_input.get(CONF_HUB_EVENT_NOTIFIERS, [])
+            event_fields = user_input.get(CONF_HUB_EVENT_FIELDS) or DEFAULT_EVENT_FIELDS
 
-            return result
+            try:
+                polling_groups = POLLING_GROUPS_SCHEMA(
+                    user_input.get(CONF_HUB_POLLING_GROUPS)
+                )
+            except vol.Invalid:
+                errors[CONF_HUB_POLLING_GROUPS] = "invalid_polling_groups"
+
+            if not errors:
+                # Update the options by creating the entry
+                result = self.async_create_entry(
+                    title="",
+                    data={
+                        CONF_HUB_URL: url,
+                        CONF_HUB_USERNAME: username,
+                        CONF_HUB_PASSWORD: password,
+                        CONF_HUB_SCAN_INTERVAL: scan_interval,
+                        CONF_HUB_ROOT_NODE: root_node,
+                        CONF_HUB_UPDATE_MODE: update_mode,
+                        CONF_HUB_PUBLISHING_INTERVAL: publishing_interval,
+                        CONF_HUB_SAMPLING_INTERVAL: sampling_interval,
+                        CONF_HUB_QUEUE_SIZE: queue_size,
+                        CONF_HUB_DISCOVERY_CONCURRENCY: discovery_concurrency,
+                        CONF_HUB_DISCOVERY_CACHE: discovery_cache,
+                        CONF_HUB_POLLING_GROUPS: polling_groups,
+                        CONF_HUB_SESSIONS: sessions,
+                        CONF_HUB_MAX_DEPTH: max_depth,
+                        CONF_HUB_INCLUDE: include,
+                        CONF_HUB_EXCLUDE: exclude,
+                        CONF_HUB_NODE_CLASSES: node_classes,
+                        CONF_HUB_REFERENCE_TYPES: reference_types,
+                        CONF_HUB_DISCOVERY_READ_VALUES: discovery_read_values,
+                        CONF_HUB_ARRAY_MODE: array_mode,
+                        CONF_HUB_HISTORY_BACKFILL: history_backfill,
+                        CONF_HUB_REGISTER_NODES: register_nodes,
+                        CONF_HUB_WORKER_PROCESS: worker_process,
+                        CONF_HUB_RESCAN_ON_MODEL_CHANGE: rescan_on_model_change,
+                        CONF_HUB_MIN_SCAN_INTERVAL: min_scan_interval,
+                        CONF_HUB_MAX_SCAN_INTERVAL: max_scan_interval,
+                        CONF_HUB_EVENT_NOTIFIERS: event_notifiers,
+                        CONF_HUB_EVENT_FIELDS: event_fields,
+                    },
+                )
+
+                # Schedule reload after returning the entry
+                self.hass.async_create_task(
+                    self.hass.config_entries.async_reload(self.config_entry.entry_id)
+                )
+
+                return result
 
         current_hub_url = self.config_entry.options.get(
             CONF_HUB_URL,
@@ -140,6 +307,86 @@ class AsyncUAOptionsFlow(config_entries.OptionsFlow):
             self.config_entry.data.get(CONF_HUB_ROOT_NODE, "ns=2;i=1"),
         )
 
+        current_update_mode = self.config_entry.options.get(
+            CONF_HUB_UPDATE_MODE,
+            self.config_entry.data.get(CONF_HUB_UPDATE_MODE, UPDATE_MODE_POLLING),
+        )
+
+        current_publishing_interval = self.config_entry.options.get(
+            CONF_HUB_PUBLISHING_INTERVAL,
+            self.config_entry.data.get(
+                CONF_HUB_PUBLISHING_INTERVAL, DEFAULT_PUBLISHING_INTERVAL
+            ),
+        )
+
+        current_sampling_interval = self.config_entry.options.get(
+            CONF_HUB_SAMPLING_INTERVAL,
+            self.config_entry.data.get(
+                CONF_HUB_SAMPLING_INTERVAL, DEFAULT_SAMPLING_INTERVAL
+            ),
+        )
+
+        current_queue_size = self.config_entry.options.get(
+            CONF_HUB_QUEUE_SIZE,
+            self.config_entry.data.get(CONF_HUB_QUEUE_SIZE, DEFAULT_QUEUE_SIZE),
+        )
+
+        current_discovery_concurrency = self.config_entry.options.get(
+            CONF_HUB_DISCOVERY_CONCURRENCY,
+            self.config_entry.data.get(
+                CONF_HUB_DISCOVERY_CONCURRENCY, DEFAULT_DISCOVERY_CONCURRENCY
+            ),
+        )
+
+        current_discovery_cache = self.config_entry.options.get(
+            CONF_HUB_DISCOVERY_CACHE,
+            self.config_entry.data.get(
+                CONF_HUB_DISCOVERY_CACHE, DEFAULT_DISCOVERY_CACHE
+            ),
+        )
+
+        current_sessions = self.config_entry.options.get(
+            CONF_HUB_SESSIONS,
+            self.config_entry.data.get(CONF_HUB_SESSIONS, DEFAULT_SESSIONS),
+        )
+
+        current_polling_groups = self.config_entry.options.get(
+            CONF_HUB_POLLING_GROUPS, []
+        )
+
+        options = self.config_entry.options
+        current_max_depth = options.get(CONF_HUB_MAX_DEPTH, DEFAULT_MAX_DEPTH)
+        current_include = options.get(CONF_HUB_INCLUDE, [])
+        current_exclude = options.get(CONF_HUB_EXCLUDE, [])
+        current_node_classes = options.get(CONF_HUB_NODE_CLASSES, DEFAULT_NODE_CLASSES)
+        current_reference_types = options.get(
+            CONF_HUB_REFERENCE_TYPES, DEFAULT_REFERENCE_TYPES
+        )
+        current_discovery_read_values = options.get(
+            CONF_HUB_DISCOVERY_READ_VALUES, DEFAULT_DISCOVERY_READ_VALUES
+        )
+        current_array_mode = options.get(CONF_HUB_ARRAY_MODE, DEFAULT_ARRAY_MODE)
+        current_history_backfill = options.get(
+            CONF_HUB_HISTORY_BACKFILL, DEFAULT_HISTORY_BACKFILL
+        )
+        current_register_nodes = options.get(
+            CONF_HUB_REGISTER_NODES, DEFAULT_REGISTER_NODES
+        )
+        current_worker_process = options.get(
+            CONF_HUB_WORKER_PROCESS, DEFAULT_WORKER_PROCESS
+        )
+        current_rescan_on_model_change = options.get(
+            CONF_HUB_RESCAN_ON_MODEL_CHANGE, DEFAULT_RESCAN_ON_MODEL_CHANGE
+        )
+        current_min_scan_interval = options.get(
+            CONF_HUB_MIN_SCAN_INTERVAL, DEFAULT_MIN_SCAN_INTERVAL
+        )
+        current_max_scan_interval = options.get(
+            CONF_HUB_MAX_SCAN_INTERVAL, DEFAULT_MAX_SCAN_INTERVAL
+        )
+        current_event_notifiers = options.get(CONF_HUB_EVENT_NOTIFIERS, [])
+        current_event_fields = options.get(CONF_HUB_EVENT_FIELDS, DEFAULT_EVENT_FIELDS)
+
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(
@@ -151,6 +398,94 @@ class AsyncUAOptionsFlow(config_entries.OptionsFlow):
                         CONF_HUB_SCAN_INTERVAL, default=current_scan_interval
                     ): int,
                     vol.Required(CONF_HUB_ROOT_NODE, default=current_root_node): str,
+                    vol.Optional(
+                        CONF_HUB_UPDATE_MODE, default=current_update_mode
+                    ): vol.In(UPDATE_MODES),
+                    vol.Optional(
+                        CONF_HUB_MIN_SCAN_INTERVAL, default=current_min_scan_interval
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+                    vol.Optional(
+                        CONF_HUB_MAX_SCAN_INTERVAL, default=current_max_scan_interval
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+                    vol.Optional(
+                        CONF_HUB_PUBLISHING_INTERVAL,
+                        default=current_publishing_interval,
+                    ): int,
+                    vol.Optional(
+                        CONF_HUB_SAMPLING_INTERVAL, default=current_sampling_interval
+                    ): int,
+                    vol.Optional(CONF_HUB_QUEUE_SIZE, default=current_queue_size): int,
+                    vol.Optional(
+                        CONF_HUB_DISCOVERY_CONCURRENCY,
+                        default=current_discovery_concurrency,
+                    ): vol.All(int, vol.Range(min=1)),
+                    vol.Optional(
+                        CONF_HUB_DISCOVERY_CACHE, default=current_discovery_cache
+                    ): bool,
+                    vol.Optional(CONF_HUB_SESSIONS, default=current_sessions): vol.All(
+                        int, vol.Range(min=1)
+                    ),
+                    vol.Optional(
+                        CONF_HUB_POLLING_GROUPS, default=current_polling_groups
+                    ): selector.ObjectSelector(),
+                    vol.Optional(
+                        CONF_HUB_MAX_DEPTH, default=current_max_depth
+                    ): vol.All(int, vol.Range(min=0)),
+                    vol.Optional(
+                        CONF_HUB_INCLUDE, default=current_include
+                    ): selector.TextSelector(
+                        selector.TextSelectorConfig(multiple=True)
+                    ),
+                    vol.Optional(
+                        CONF_HUB_EXCLUDE, default=current_exclude
+                    ): selector.TextSelector(
+                        selector.TextSelectorConfig(multiple=True)
+                    ),
+                    vol.Optional(
+                        CONF_HUB_NODE_CLASSES, default=current_node_classes
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=NODE_CLASSES, multiple=True
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_HUB_REFERENCE_TYPES, default=current_reference_types
+                    ): selector.SelectSelector(
+                        selector.SelectSelectorConfig(
+                            options=REFERENCE_TYPES, multiple=True
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_HUB_DISCOVERY_READ_VALUES,
+                        default=current_discovery_read_values,
+                    ): bool,
+                    vol.Optional(
+                        CONF_HUB_ARRAY_MODE, default=current_array_mode
+                    ): vol.In(ARRAY_MODES),
+                    vol.Optional(
+                        CONF_HUB_HISTORY_BACKFILL, default=current_history_backfill
+                    ): bool,
+                    vol.Optional(
+                        CONF_HUB_REGISTER_NODES, default=current_register_nodes
+                    ): bool,
+                    vol.Optional(
+                        CONF_HUB_WORKER_PROCESS, default=current_worker_process
+                    ): bool,
+                    vol.Optional(
+                        CONF_HUB_RESCAN_ON_MODEL_CHANGE,
+                        default=current_rescan_on_model_change,
+                    ): bool,
+                    vol.Optional(
+                        CONF_HUB_EVENT_NOTIFIERS, default=current_event_notifiers
+                    ): selector.TextSelector(
+                        selector.TextSelectorConfig(multiple=True)
+                    ),
+                    vol.Optional(
+                        CONF_HUB_EVENT_FIELDS, default=current_event_fields
+                    ): selector.TextSelector(
+                        selector.TextSelectorConfig(multiple=True)
+                    ),
                 }
             ),
+            errors=errors,
         )
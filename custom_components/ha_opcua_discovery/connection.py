@@ -0,0 +1,996 @@
+"""Connections to OPC UA servers shared by the hubs of the same endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Iterable, Sequence
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Any
+
+from asyncua import Client, ua
+from asyncua.ua.ua_binary import struct_from_binary
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CIRCUIT_BREAKER_THRESHOLD,
+    CIRCUIT_BREAKER_TIMEOUT,
+    CONNECTION_STATE_BACKOFF,
+    CONNECTION_STATE_CIRCUIT_OPEN,
+    CONNECTION_STATE_CONNECTED,
+    CONNECTION_STATE_CONNECTING,
+    CONNECTION_STATE_DISCONNECTED,
+    DATA_CONNECTIONS,
+    DEFAULT_MAX_MONITORED_ITEMS_PER_SUBSCRIPTION,
+    DEFAULT_MAX_NODES_PER_BROWSE,
+    DEFAULT_MAX_NODES_PER_HISTORY_READ,
+    DEFAULT_MAX_NODES_PER_READ,
+    DEFAULT_MAX_NODES_PER_REGISTER_NODES,
+    DEFAULT_MAX_NODES_PER_WRITE,
+    DEFAULT_SESSIONS,
+    PRIORITY_READ,
+    PRIORITY_WRITE,
+    RECONNECT_MAX_DELAY,
+    RECONNECT_MIN_DELAY,
+    SCHEDULER_MAX_IN_FLIGHT,
+    SCHEDULER_READ_CHUNK_SIZE,
+    SHARED_READ_MAX_AGE,
+)
+from .metrics import ReadRecord
+from .request_scheduler import RequestScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+
+# The default DataEncoding is never modified, one instance serves every read
+_DEFAULT_DATA_ENCODING = ua.QualifiedName()
+
+
+def _read_value_id(
+    node_id: ua.NodeId, attribute_id: ua.AttributeIds = ua.AttributeIds.Value
+) -> ua.ReadValueId:
+    return ua.ReadValueId(
+        NodeId_=node_id,
+        AttributeId=attribute_id,
+        DataEncoding=_DEFAULT_DATA_ENCODING,
+    )
+
+
+def _read_parameters(nodes_to_read: list[ua.ReadValueId]) -> ua.ReadParameters:
+    params = ua.ReadParameters()
+    params.TimestampsToReturn = ua.TimestampsToReturn.Neither
+    params.NodesToRead = nodes_to_read
+    return params
+
+
+# Service results meaning the session or the secure channel is gone
+_TRANSPORT_STATUS_CODES = {
+    ua.StatusCodes.BadCommunicationError,
+    ua.StatusCodes.BadConnectionClosed,
+    ua.StatusCodes.BadNotConnected,
+    ua.StatusCodes.BadSecureChannelClosed,
+    ua.StatusCodes.BadSecureChannelIdInvalid,
+    ua.StatusCodes.BadServerHalted,
+    ua.StatusCodes.BadSessionClosed,
+    ua.StatusCodes.BadSessionIdInvalid,
+    ua.StatusCodes.BadSessionNotActivated,
+    ua.StatusCodes.BadShutdown,
+    ua.StatusCodes.BadTimeout,
+}
+
+
+# Errors of a failed request or connection attempt, the TimeoutError and
+# ConnectionError of the transport are OSErrors
+REQUEST_ERRORS = (OSError, ua.UaError)
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """Return whether an error means the connection is lost, not just a request failed."""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    if isinstance(error, ua.UaStatusCodeError):
+        return error.code in _TRANSPORT_STATUS_CODES
+    return False
+
+
+# Private asyncua internals patched to resume a session on a new secure channel
+# and to transfer its subscriptions, as found in the asyncua version pinned in
+# manifest.json
+_CLIENT_INTERNALS = (
+    "_monitor_server_task",
+    "_renew_channel_task",
+    "_server_nonce",
+    "_renew_channel_loop",
+    "_monitor_server_loop",
+)
+_UACLIENT_INTERNALS = ("_publish_task", "_subscription_callbacks", "_publish_loop")
+
+
+def _supports_session_resume(client: Client) -> bool:
+    """Return whether the client has the internals a session resume patches."""
+    return all(hasattr(client, name) for name in _CLIENT_INTERNALS) and all(
+        hasattr(client.uaclient, name) for name in _UACLIENT_INTERNALS
+    )
+
+
+def _stop_client_tasks(client: Client):
+    """Cancel the keep-alive, channel renewal and publish tasks of a lost session.
+
+    The tasks are forgotten as well, asyncua re-raises the outcome of finished
+    tasks before every request.
+    """
+    for task in (
+        client._monitor_server_task,
+        client._renew_channel_task,
+        client.uaclient._publish_task,
+    ):
+        if task and not task.done():
+            task.cancel()
+    client._monitor_server_task = None
+    client._renew_channel_task = None
+    client.uaclient._publish_task = None
+
+
+def _is_socket_open(client: Client | None) -> bool:
+    protocol = client.uaclient.protocol if client else None
+    return protocol is not None and protocol.state == protocol.OPEN
+
+
+def _start_client_tasks(client: Client):
+    """Restart the keep-alive tasks, asyncua only starts them in create_session."""
+    client._renew_channel_task = asyncio.create_task(client._renew_channel_loop())
+    client._monitor_server_task = asyncio.create_task(client._monitor_server_loop())
+
+
+def _start_publishing(client: Client):
+    """Resume the publish loop of subscriptions kept across a reconnect."""
+    uaclient = client.uaclient
+    if uaclient._subscription_callbacks and (
+        not uaclient._publish_task or uaclient._publish_task.done()
+    ):
+        uaclient._publish_task = asyncio.create_task(uaclient._publish_loop())
+
+
+@callback
+def async_acquire_connection(
+    hass: HomeAssistant,
+    url: str,
+    username: str | None = None,
+    password: str | None = None,
+    sessions: int = DEFAULT_SESSIONS,
+) -> OpcuaConnection:
+    """Return the connection of an endpoint, creating it on first use.
+
+    Config entries with the same URL and credentials share a single
+    reference-counted connection.
+    """
+    connections = hass.data.setdefault(DATA_CONNECTIONS, {})
+    key = (url, username or None, password or None)
+    connection = connections.get(key)
+    if connection is None:
+        connection = connections[key] = OpcuaConnection(
+            url, username, password, sessions
+        )
+    else:
+        _LOGGER.debug(f"Sharing OPC UA connection to {url}")
+        connection.add_read_sessions(sessions)
+    connection.references += 1
+    return connection
+
+
+async def async_release_connection(
+    hass: HomeAssistant, connection: OpcuaConnection
+) -> None:
+    """Drop a reference and disconnect once the last hub released the connection."""
+    if connection.references <= 1:
+        connections = hass.data.get(DATA_CONNECTIONS, {})
+        for key, registered in list(connections.items()):
+            if registered is connection:
+                del connections[key]
+    await connection.release()
+
+
+class _ReadSession:
+    """Additional client session of a connection used to read a shard of the nodes."""
+
+    def __init__(self, connection: OpcuaConnection, index: int):
+        self._connection = connection
+        self.index = index
+        self.client = None
+        # Handles of the registered nodes in this session
+        self.handles: dict[ua.NodeId, ua.ReadValueId] = {}
+        self._connected = False
+        self._reconnect_task = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self) -> bool:
+        try:
+            self.client = self._connection.create_client()
+            self.handles = {}
+            await self.client.connect()
+            self._connected = True
+            _LOGGER.info(f"OPC UA read session {self.index} connected")
+            await self._connection._async_register_handles(self.client, self.handles)
+            return True
+        except REQUEST_ERRORS as e:
+            self._connected = False
+            self.client = None
+            _LOGGER.warning(f"Failed to connect OPC UA read session {self.index}: {e}")
+            return False
+
+    async def disconnect(self):
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        client, self.client = self.client, None
+        self._connected = False
+        if client:
+            try:
+                await client.disconnect()
+            except REQUEST_ERRORS as e:
+                _LOGGER.debug(f"Error during read session disconnect: {e}")
+
+    def schedule_reconnect(self):
+        """Reconnect in the background so the other shards are not delayed."""
+        if self._connected or (
+            self._reconnect_task and not self._reconnect_task.done()
+        ):
+            return
+        self._reconnect_task = asyncio.create_task(self.connect())
+
+
+class OpcuaConnection:
+    """Client connection to an OPC UA server.
+
+    Owns the main session, the optional read sessions and the server
+    operation limits. Value reads go through ``read_values`` which lets
+    concurrent callers share the Read of the nodes they have in common.
+    Requests of the main session are ordered by ``scheduler``, writes go
+    through ``write_values`` which coalesces repeated writes of a node.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        username: str | None = None,
+        password: str | None = None,
+        sessions: int = DEFAULT_SESSIONS,
+    ):
+        self._url = url
+        self._username = username
+        self._password = password
+        self._read_sessions = []
+        self.add_read_sessions(sessions)
+        self.references = 0
+
+        self.client = None
+        # Incremented whenever the subscriptions of the previous session could
+        # not be kept, hubs then have to subscribe again
+        self.generation = 0
+        self._connected = False
+        self._lock = asyncio.Lock()
+
+        # Reconnect state machine
+        self._state = CONNECTION_STATE_DISCONNECTED
+        self._closing = False
+        self._reconnect_task = None
+        self._failures = 0
+        self._next_attempt = 0.0
+        self._authentication_token = None
+        self._disconnected_at = None
+        self._disconnected_since = None
+        # Start and end of the last outage the connection recovered from
+        self.last_outage: tuple[datetime, datetime] | None = None
+        self._stats = {
+            "reconnect_attempts": 0,
+            "reconnects": 0,
+            "session_reactivations": 0,
+            "subscription_transfers": 0,
+            "last_downtime": None,
+            "total_downtime": 0.0,
+            "coalesced_writes": 0,
+        }
+
+        self.scheduler = RequestScheduler(SCHEDULER_MAX_IN_FLIGHT)
+        # Writes waiting for a request slot, keyed by node and attribute
+        self._queued_writes: dict[tuple[ua.NodeId, int], list] = {}
+        self._write_tasks: set[asyncio.Task] = set()
+
+        # Nodes registered with RegisterNodes by the hubs, the handles of the
+        # main session are registered again whenever a new session is created
+        self._registered_node_ids: dict[ua.NodeId, None] = {}
+        self._handles: dict[ua.NodeId, ua.ReadValueId] = {}
+        self._register_nodes_supported = True
+
+        # Reads in flight, keyed by node id and attribute
+        self._pending_reads: dict[tuple[ua.NodeId, int], tuple[asyncio.Future, int]] = (
+            {}
+        )
+        # Finished reads with their start time, while several hubs share the
+        # connection those of the same scan reuse them
+        self._read_results: dict[tuple[ua.NodeId, int], tuple[ua.DataValue, float]] = {}
+
+        # Server operation limits, 0 means the server did not report one
+        self._max_nodes_per_read = 0
+        self._max_nodes_per_write = 0
+        self._max_nodes_per_browse = 0
+        self._max_nodes_per_history_read = 0
+        self._max_nodes_per_register_nodes = 0
+        self._max_monitored_items_per_call = 0
+        self._max_monitored_items_per_subscription = 0
+
+    def add_read_sessions(self, sessions: int):
+        """Grow the number of sessions, new read sessions connect on first use."""
+        for index in range(len(self._read_sessions) + 1, max(1, sessions)):
+            self._read_sessions.append(_ReadSession(self, index))
+
+    async def connect(self) -> bool:
+        """Connect right away, bypassing the reconnect backoff."""
+        self._closing = False
+        return await self._async_attempt()
+
+    async def ensure_connected(self) -> bool:
+        """Return whether the connection is usable without waiting for a reconnect.
+
+        While disconnected the reconnect loop is started in the background, so
+        callers fail fast instead of blocking on connection timeouts.
+        """
+        if self._connected and not _is_socket_open(self.client):
+            self.connection_lost(ConnectionError("Connection is closed"))
+        if not self._connected:
+            self._start_reconnect_loop()
+        return self._connected
+
+    def connection_lost(self, error: BaseException | None = None):
+        """Report a transport failure, the reconnect loop takes over."""
+        if self._closing:
+            return
+        if self._connected:
+            _LOGGER.warning(f"OPC UA connection to {self._url} lost: {error}")
+            self._connected = False
+            self._state = CONNECTION_STATE_DISCONNECTED
+            self._disconnected_at = time.monotonic()
+            self._disconnected_since = dt_util.utcnow()
+        self._start_reconnect_loop()
+
+    def _start_reconnect_loop(self):
+        if self._closing or (self._reconnect_task and not self._reconnect_task.done()):
+            return
+        self._reconnect_task = asyncio.create_task(self._async_reconnect_loop())
+
+    async def _async_reconnect_loop(self):
+        while not self._connected and not self._closing:
+            delay = self._next_attempt - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._async_attempt()
+
+    async def _async_attempt(self) -> bool:
+        """Make a single connection attempt and schedule the next one on failure."""
+        async with self._lock:
+            if self._connected:
+                return True  # already connected
+            self._state = CONNECTION_STATE_CONNECTING
+            self._stats["reconnect_attempts"] += 1
+            try:
+                await self._async_open_session()
+                await self._read_operation_limits()
+            # Any failure is retried with backoff, the reconnect loop must not die
+            except Exception as e:  # noqa: BLE001
+                self._async_attempt_failed(e)
+                return False
+            self._async_attempt_succeeded()
+
+        await self._async_register_handles(self.client, self._handles)
+
+        # Additional read sessions are best effort, their shards fall back to
+        # the main session while they are not connected.
+        await asyncio.gather(
+            *(
+                session.connect()
+                for session in self._read_sessions
+                if not session.is_connected
+            )
+        )
+        return True
+
+    def _async_attempt_succeeded(self):
+        self._connected = True
+        self._state = CONNECTION_STATE_CONNECTED
+        self._failures = 0
+        self._next_attempt = 0.0
+        if self._disconnected_at is not None:
+            downtime = time.monotonic() - self._disconnected_at
+            self._disconnected_at = None
+            self.last_outage = (self._disconnected_since, dt_util.utcnow())
+            self._disconnected_since = None
+            self._stats["reconnects"] += 1
+            self._stats["last_downtime"] = round(downtime, 3)
+            self._stats["total_downtime"] += downtime
+            _LOGGER.info(
+                f"OPC UA connection to {self._url} restored after {downtime:.1f} s"
+            )
+        else:
+            _LOGGER.info("OPC UA client connected")
+
+    def _async_attempt_failed(self, error: Exception):
+        self._connected = False
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+            self._disconnected_since = dt_util.utcnow()
+        self._failures += 1
+        if self._failures >= CIRCUIT_BREAKER_THRESHOLD:
+            # Stop hammering a server that keeps failing, probe it rarely
+            self._state = CONNECTION_STATE_CIRCUIT_OPEN
+            delay = CIRCUIT_BREAKER_TIMEOUT
+        else:
+            self._state = CONNECTION_STATE_BACKOFF
+            delay = min(
+                RECONNECT_MAX_DELAY, RECONNECT_MIN_DELAY * 2 ** (self._failures - 1)
+            )
+            # Jitter spreads the attempts of many clients after a server restart
+            delay = random.uniform(delay / 2, delay)
+        self._next_attempt = time.monotonic() + delay
+        _LOGGER.error(
+            f"Failed to connect OPC UA client ({self._failures} attempts), retrying in {delay:.1f} s: {error}"
+        )
+
+    async def _async_open_session(self):
+        """Open a session, reusing the previous one when the server still has it.
+
+        The existing session is first reactivated on a new secure channel,
+        which keeps its subscriptions. Otherwise a new session is created and
+        the subscriptions of the old one are transferred to it.
+        """
+        if self.client is None:
+            self.client = self.create_client()
+            self._handles = {}
+            try:
+                await self.client.connect()
+            except Exception:
+                self.client = None
+                raise
+            self._authentication_token = (
+                self.client.uaclient.protocol.authentication_token
+            )
+            self._watch_client(self.client)
+            self.generation += 1
+            return
+
+        client = self.client
+        if not _supports_session_resume(client):
+            # Another asyncua version, start over with a new client and session
+            _LOGGER.debug("Session resume unsupported by asyncua, reconnecting")
+            client.disconnect_socket()
+            self.client = None
+            await self._async_open_session()
+            return
+        _stop_client_tasks(client)
+        client.disconnect_socket()
+        await client.connect_socket()
+        try:
+            await client.send_hello()
+            await client.open_secure_channel()
+            if await self._async_reactivate_session(client):
+                self._stats["session_reactivations"] += 1
+                _LOGGER.info("Reactivated the existing OPC UA session")
+                _start_client_tasks(client)
+            else:
+                # Registered handles do not outlive their session
+                self._handles = {}
+                await client.create_session()
+                await client.activate_session(
+                    username=self._username,
+                    password=self._password,
+                    certificate=client.user_certificate,
+                )
+                self._authentication_token = (
+                    client.uaclient.protocol.authentication_token
+                )
+                if not await self._async_transfer_subscriptions(client):
+                    self.generation += 1
+        except Exception:
+            client.disconnect_socket()
+            raise
+        _start_publishing(client)
+        self._watch_client(client)
+
+    async def _async_reactivate_session(self, client: Client) -> bool:
+        if self._authentication_token is None:
+            return False
+        client.uaclient.protocol.authentication_token = self._authentication_token
+        try:
+            result = await client.activate_session(
+                username=self._username,
+                password=self._password,
+                certificate=client.user_certificate,
+            )
+        except REQUEST_ERRORS as e:
+            _LOGGER.debug(f"Failed to reactivate the OPC UA session: {e}")
+            client.uaclient.protocol.authentication_token = ua.NodeId()
+            return False
+        client._server_nonce = result.ServerNonce
+        return True
+
+    async def _async_transfer_subscriptions(self, client: Client) -> bool:
+        """Move the subscriptions of the lost session to the new one."""
+        callbacks = client.uaclient._subscription_callbacks
+        if not callbacks:
+            return True
+        subscription_ids = list(callbacks)
+        params = ua.TransferSubscriptionsParameters()
+        params.SubscriptionIds = subscription_ids
+        params.SendInitialValues = True
+        request = ua.TransferSubscriptionsRequest()
+        request.Parameters = params
+        try:
+            data = await client.uaclient.protocol.send_request(request)
+            response = struct_from_binary(ua.TransferSubscriptionsResponse, data)
+            response.ResponseHeader.ServiceResult.check()
+            results = response.Results
+        except REQUEST_ERRORS as e:
+            _LOGGER.debug(f"Failed to transfer the OPC UA subscriptions: {e}")
+            results = []
+
+        transferred = 0
+        for index, subscription_id in enumerate(subscription_ids):
+            if index < len(results) and results[index].StatusCode.is_good():
+                transferred += 1
+            else:
+                callbacks.pop(subscription_id, None)
+        if transferred:
+            self._stats["subscription_transfers"] += transferred
+            _LOGGER.info(f"Transferred {transferred} OPC UA subscriptions")
+        return transferred == len(subscription_ids)
+
+    def _watch_client(self, client: Client):
+        """Report the loss detected by the asyncua keep-alive as soon as it happens."""
+
+        def _monitor_done(task: asyncio.Task):
+            if client is self.client and not task.cancelled() and task.exception():
+                self.connection_lost(task.exception())
+
+        monitor_task = getattr(client, "_monitor_server_task", None)
+        if monitor_task:
+            monitor_task.add_done_callback(_monitor_done)
+
+    def create_client(self) -> Client:
+        client = Client(url=self._url, timeout=5)
+        if self._username:
+            client.set_user(self._username)
+        if self._password:
+            client.set_password(self._password)
+        return client
+
+    async def release(self):
+        """Drop a reference, disconnecting once no hub uses the connection."""
+        self.references -= 1
+        if self.references <= 1:
+            # Results are only shared between hubs
+            self._read_results = {}
+        if self.references <= 0:
+            await self.disconnect()
+
+    async def disconnect(self):
+        self._closing = True
+        if self._reconnect_task:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        await asyncio.gather(*(session.disconnect() for session in self._read_sessions))
+        async with self._lock:
+            client, self.client = self.client, None
+            connected, self._connected = self._connected, False
+            self._state = CONNECTION_STATE_DISCONNECTED
+            self._authentication_token = None
+            self._disconnected_at = None
+            self._disconnected_since = None
+            self._failures = 0
+            self._next_attempt = 0.0
+            if client is None:
+                return
+            if not connected:
+                if _supports_session_resume(client):
+                    _stop_client_tasks(client)
+                client.disconnect_socket()
+                return
+            try:
+                await client.disconnect()
+                _LOGGER.info("OPC UA client disconnected")
+            except REQUEST_ERRORS as e:
+                _LOGGER.warning(f"Error during disconnect: {e}")
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the reconnect and write statistics of the connection."""
+        downtime = None
+        if self._disconnected_at is not None:
+            downtime = round(time.monotonic() - self._disconnected_at, 3)
+        return {
+            **self._stats,
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "current_downtime": downtime,
+        }
+
+    async def _read_operation_limits(self):
+        """Read the server operation limits used to chunk bulk requests."""
+        limits = {
+            "_max_nodes_per_read": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerRead,
+            "_max_nodes_per_write": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerWrite,
+            "_max_nodes_per_browse": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerBrowse,
+            "_max_nodes_per_history_read": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerHistoryReadData,
+            "_max_nodes_per_register_nodes": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerRegisterNodes,
+            "_max_monitored_items_per_call": ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxMonitoredItemsPerCall,
+            "_max_monitored_items_per_subscription": ua.ObjectIds.Server_ServerCapabilities_MaxMonitoredItemsPerSubscription,
+        }
+        try:
+            results = await self.client.uaclient.read_attributes(
+                [ua.NodeId(object_id) for object_id in limits.values()],
+                ua.AttributeIds.Value,
+            )
+        except REQUEST_ERRORS as e:
+            _LOGGER.debug(f"Failed to read server operation limits: {e}")
+            return
+
+        for attr, data_value in zip(limits, results):
+            if data_value.StatusCode.is_good() and data_value.Value:
+                setattr(self, attr, data_value.Value.Value or 0)
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    @property
+    def credentials(self) -> tuple[str | None, str | None]:
+        return self._username, self._password
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected
+
+    @property
+    def read_chunk_size(self) -> int:
+        """Return the maximum number of nodes sent in a single Read request."""
+        if 0 < self._max_nodes_per_read < DEFAULT_MAX_NODES_PER_READ:
+            return self._max_nodes_per_read
+        return DEFAULT_MAX_NODES_PER_READ
+
+    @property
+    def write_chunk_size(self) -> int:
+        """Return the maximum number of nodes sent in a single Write request."""
+        if 0 < self._max_nodes_per_write < DEFAULT_MAX_NODES_PER_WRITE:
+            return self._max_nodes_per_write
+        return DEFAULT_MAX_NODES_PER_WRITE
+
+    @property
+    def browse_chunk_size(self) -> int:
+        """Return the maximum number of nodes sent in a single Browse request."""
+        if 0 < self._max_nodes_per_browse < DEFAULT_MAX_NODES_PER_BROWSE:
+            return self._max_nodes_per_browse
+        return DEFAULT_MAX_NODES_PER_BROWSE
+
+    @property
+    def history_read_chunk_size(self) -> int:
+        """Return the maximum number of nodes sent in a single HistoryRead request."""
+        if 0 < self._max_nodes_per_history_read < DEFAULT_MAX_NODES_PER_HISTORY_READ:
+            return self._max_nodes_per_history_read
+        return DEFAULT_MAX_NODES_PER_HISTORY_READ
+
+    @property
+    def register_chunk_size(self) -> int:
+        """Return the maximum number of nodes sent in a single RegisterNodes request."""
+        limit = self._max_nodes_per_register_nodes
+        if 0 < limit < DEFAULT_MAX_NODES_PER_REGISTER_NODES:
+            return limit
+        return DEFAULT_MAX_NODES_PER_REGISTER_NODES
+
+    @property
+    def monitored_items_per_subscription(self) -> int:
+        """Return the maximum number of monitored items in a single subscription."""
+        limit = self._max_monitored_items_per_subscription
+        if 0 < limit < DEFAULT_MAX_MONITORED_ITEMS_PER_SUBSCRIPTION:
+            return limit
+        return DEFAULT_MAX_MONITORED_ITEMS_PER_SUBSCRIPTION
+
+    @property
+    def monitored_items_per_call(self) -> int:
+        """Return the maximum number of monitored items created in a single call."""
+        return (
+            self._max_monitored_items_per_call or self.monitored_items_per_subscription
+        )
+
+    async def register_nodes(self, node_ids: Iterable[ua.NodeId]):
+        """Register nodes with the server in every session.
+
+        Reads and writes of the nodes then use the handles returned by
+        RegisterNodes, which servers resolve faster than long string node
+        ids. Handles are registered again in every new session.
+        """
+        for node_id in node_ids:
+            self._registered_node_ids[node_id] = None
+        if self._connected:
+            await self._async_register_handles(self.client, self._handles)
+        for session in self._read_sessions:
+            if session.is_connected:
+                await self._async_register_handles(session.client, session.handles)
+
+    async def _async_register_handles(
+        self, client: Client, handles: dict[ua.NodeId, ua.ReadValueId]
+    ):
+        """Register the nodes a session has no handle for yet, best effort."""
+        if not self._register_nodes_supported:
+            return
+        missing = [
+            node_id for node_id in self._registered_node_ids if node_id not in handles
+        ]
+        chunk_size = self.register_chunk_size
+        try:
+            for start in range(0, len(missing), chunk_size):
+                chunk = missing[start : start + chunk_size]
+                registered = await client.uaclient.register_nodes(chunk)
+                for node_id, handle in zip(chunk, registered):
+                    handles[node_id] = _read_value_id(handle)
+        except ua.UaStatusCodeError as e:
+            if e.code == ua.StatusCodes.BadServiceUnsupported:
+                self._register_nodes_supported = False
+            _LOGGER.warning(f"Failed to register the OPC UA nodes: {e}")
+        except REQUEST_ERRORS as e:
+            # The next reconnect registers the remaining nodes
+            _LOGGER.warning(f"Failed to register the OPC UA nodes: {e}")
+
+    def handle(self, node_id: ua.NodeId) -> ua.NodeId:
+        """Return the registered handle of a node in the main session."""
+        handle = self._handles.get(node_id)
+        return node_id if handle is None else handle.NodeId
+
+    async def read_values(
+        self,
+        read_value_ids: Sequence[ua.ReadValueId],
+        record: ReadRecord | None = None,
+        priority: int = PRIORITY_READ,
+    ) -> list[ua.DataValue]:
+        """Read the given ReadValueIds, returning their DataValues in order.
+
+        Every node is read at most once: nodes already being read for another
+        caller (a hub sharing this connection or a concurrent polling group)
+        wait for that Read instead of being sent again. While several hubs
+        share the connection, nodes another hub read less than
+        ``SHARED_READ_MAX_AGE`` ago take that result, so hubs polling at the
+        same interval read every node once per scan. Reads of the main
+        session wait for a scheduler slot of the given priority. The Read
+        requests sent for this call are added to ``record``.
+        """
+        # Nodes read by this call point to its future and their position
+        # in the results, a single future serves the whole call
+        future = asyncio.get_running_loop().create_future()
+        data_values = [None] * len(read_value_ids)
+        shared = []
+        to_read = []
+        to_read_indexes = []
+        start_time = time.monotonic()
+        read_results = self._read_results if self.references > 1 else None
+        for index, read_value_id in enumerate(read_value_ids):
+            key = (read_value_id.NodeId, read_value_id.AttributeId)
+            if read_results is not None:
+                result = read_results.get(key)
+                if result is not None and start_time - result[1] < SHARED_READ_MAX_AGE:
+                    data_values[index] = result[0]
+                    continue
+            pending = self._pending_reads.get(key)
+            if pending is not None:
+                shared.append((index, *pending))
+                continue
+            self._pending_reads[key] = (future, len(to_read))
+            to_read.append(read_value_id)
+            to_read_indexes.append(index)
+
+        if to_read:
+            try:
+                results = await self._read_sharded(to_read, record, priority)
+            except BaseException as e:
+                error = e
+                if isinstance(e, asyncio.CancelledError):
+                    error = ConnectionError("Shared read cancelled")
+                future.set_exception(error)
+                # Only waiters of other callers retrieve the exception
+                future.exception()
+                raise
+            finally:
+                for read_value_id in to_read:
+                    del self._pending_reads[
+                        (read_value_id.NodeId, read_value_id.AttributeId)
+                    ]
+            future.set_result(results)
+            for index, data_value in zip(to_read_indexes, results):
+                data_values[index] = data_value
+            if read_results is not None:
+                for read_value_id, data_value in zip(to_read, results):
+                    read_results[(read_value_id.NodeId, read_value_id.AttributeId)] = (
+                        data_value,
+                        start_time,
+                    )
+
+        for index, shared_future, position in shared:
+            data_values[index] = (await shared_future)[position]
+        return data_values
+
+    async def _read_sharded(
+        self,
+        read_value_ids: list[ua.ReadValueId],
+        record: ReadRecord | None,
+        priority: int = PRIORITY_READ,
+    ) -> list[ua.DataValue]:
+        """Read the nodes, sharded over all sessions when there are several."""
+        if not self._read_sessions:
+            return await self._read_chunked(
+                self.client, read_value_ids, record, self._handles, priority
+            )
+
+        sessions = [None, *self._read_sessions]
+        shards = [
+            read_value_ids[index :: len(sessions)] for index in range(len(sessions))
+        ]
+        results = await asyncio.gather(
+            self._read_chunked(self.client, shards[0], record, self._handles, priority),
+            *(
+                self._read_shard(session, shard, record)
+                for session, shard in zip(sessions[1:], shards[1:])
+            ),
+        )
+
+        data_values = [None] * len(read_value_ids)
+        for index, shard_result in enumerate(results):
+            data_values[index :: len(sessions)] = shard_result
+        return data_values
+
+    async def _read_shard(
+        self,
+        session: _ReadSession,
+        read_value_ids: list[ua.ReadValueId],
+        record: ReadRecord | None,
+    ) -> list[ua.DataValue]:
+        """Read a shard on its own session, falling back to the main session."""
+        if not read_value_ids:
+            return []
+        if session.is_connected:
+            try:
+                return await self._read_chunked(
+                    session.client, read_value_ids, record, session.handles
+                )
+            except REQUEST_ERRORS as e:
+                _LOGGER.warning(f"Read session {session.index} lost: {e}")
+                await session.disconnect()
+
+        session.schedule_reconnect()
+        return await self._read_chunked(
+            self.client, read_value_ids, record, self._handles
+        )
+
+    async def _read_chunked(
+        self,
+        client: Client,
+        read_value_ids: list[ua.ReadValueId],
+        record: ReadRecord | None = None,
+        handles: dict[ua.NodeId, ua.ReadValueId] | None = None,
+        priority: int = PRIORITY_READ,
+    ) -> list[ua.DataValue]:
+        """Read the nodes with chunked multi-node Read requests.
+
+        Values of registered nodes are read through their handle in the
+        session. Reads of the main session are sent in smaller chunks through
+        the request scheduler, a write waits for at most the chunk in flight.
+        """
+        data_values = []
+        chunk_size = self.read_chunk_size
+        scheduled = client is self.client
+        if scheduled:
+            chunk_size = min(chunk_size, SCHEDULER_READ_CHUNK_SIZE)
+        for start in range(0, len(read_value_ids), chunk_size):
+            chunk = read_value_ids[start : start + chunk_size]
+            nodes_to_read = (
+                [
+                    (
+                        handles.get(node.NodeId, node)
+                        if node.AttributeId == ua.AttributeIds.Value
+                        else node
+                    )
+                    for node in chunk
+                ]
+                if handles
+                else chunk
+            )
+            start_time = time.perf_counter()
+            try:
+                async with (
+                    self.scheduler.slot(priority) if scheduled else nullcontext()
+                ):
+                    results = await client.uaclient.read(
+                        _read_parameters(nodes_to_read)
+                    )
+            except ua.UaStatusCodeError as e:
+                if is_transport_error(e):
+                    raise
+                # A rejected request only fails the nodes of this chunk
+                results = [ua.DataValue(StatusCode_=ua.StatusCode(e.code))] * len(chunk)
+            if record is not None:
+                record.add_round_trip(
+                    time.perf_counter() - start_time,
+                    len(results),
+                    chunk[0].NodeId.to_string(),
+                )
+            data_values.extend(results)
+        return data_values
+
+    async def write_values(
+        self, write_values: Sequence[ua.WriteValue]
+    ) -> list[ua.StatusCode]:
+        """Write the values ahead of queued reads, returning their status codes.
+
+        Writes wait for a request slot of the scheduler with the highest
+        priority. A node written again while its previous write is still
+        waiting is only written once, with the latest value, and both callers
+        get the status of that write. Writes that queue up are sent together
+        in chunked Write requests.
+        """
+        loop = asyncio.get_running_loop()
+        queued = self._queued_writes
+        if not queued:
+            task = loop.create_task(self._async_send_writes())
+            self._write_tasks.add(task)
+            task.add_done_callback(self._write_tasks.discard)
+        futures = []
+        for write_value in write_values:
+            key = (write_value.NodeId, write_value.AttributeId)
+            entry = queued.get(key)
+            if entry is None:
+                entry = queued[key] = [write_value, loop.create_future()]
+            else:
+                entry[0] = write_value
+                self._stats["coalesced_writes"] += 1
+            futures.append(entry[1])
+        # A cancelled caller must not cancel the write shared with others
+        return [await asyncio.shield(future) for future in futures]
+
+    async def _async_send_writes(self):
+        entries = []
+        try:
+            async with self.scheduler.slot(PRIORITY_WRITE):
+                # Writes queued while waiting for the slot are sent together
+                entries = list(self._queued_writes.values())
+                self._queued_writes = {}
+                # Later reads have to return the written values
+                self._read_results = {}
+                chunk_size = self.write_chunk_size
+                for start in range(0, len(entries), chunk_size):
+                    chunk = entries[start : start + chunk_size]
+                    params = ua.WriteParameters()
+                    params.NodesToWrite = [write_value for write_value, _ in chunk]
+                    results = await self.client.uaclient.write(params)
+                    for (_, future), status in zip(chunk, results):
+                        if not future.done():
+                            future.set_result(status)
+        except BaseException as e:
+            if not entries:
+                entries = list(self._queued_writes.values())
+                self._queued_writes = {}
+            error = e
+            if isinstance(e, asyncio.CancelledError):
+                error = ConnectionError("Write cancelled")
+            for _, future in entries:
+                if not future.done():
+                    future.set_exception(error)
+                    # Callers that gave up waiting do not retrieve it
+                    future.exception()
+            if isinstance(e, asyncio.CancelledError):
+                raise
@@ -1,5 +1,38 @@
 DOMAIN = "ha_opcua_discovery"
 
+PLATFORM_SENSOR = "sensor"
+PLATFORM_SWITCH = "switch"
+PLATFORMS = [PLATFORM_SENSOR, PLATFORM_SWITCH]
+
+# Registry of the connections shared by config entries of the same endpoint
+DATA_CONNECTIONS = f"{DOMAIN}_connections"
+
+# Reconnect
+CONNECTION_STATE_CONNECTED = "connected"
+CONNECTION_STATE_CONNECTING = "connecting"
+CONNECTION_STATE_DISCONNECTED = "disconnected"
+CONNECTION_STATE_BACKOFF = "backoff"
+CONNECTION_STATE_CIRCUIT_OPEN = "circuit_open"
+RECONNECT_MIN_DELAY = 1  # s
+RECONNECT_MAX_DELAY = 60  # s
+# Consecutive failed attempts after which the server is only probed every
+# CIRCUIT_BREAKER_TIMEOUT seconds
+CIRCUIT_BREAKER_THRESHOLD = 10
+CIRCUIT_BREAKER_TIMEOUT = 300  # s
+
+# Node health, a node failing QUARANTINE_THRESHOLD reads in a row is only probed
+# again after a delay doubling from QUARANTINE_MIN_DELAY to QUARANTINE_MAX_DELAY
+QUARANTINE_THRESHOLD = 3
+QUARANTINE_MIN_DELAY = 30  # s
+QUARANTINE_MAX_DELAY = 600  # s
+
+# Diagnostics
+# Listener context of the diagnostic entities, notified after every update
+DIAGNOSTICS_CONTEXT = f"{DOMAIN}_diagnostics"
+METRICS_SAMPLES = 100  # scans averaged for the poll duration
+METRICS_SLOWEST_READS = 10
+METRICS_HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0)  # s
+
 CONF_HUB_ID = "hub_id"
 CONF_HUB_URL = "url"
 CONF_HUB_USERNAME = "username"
@@ -7,8 +40,170 @@ CONF_HUB_PASSWORD = "password"
 CONF_HUB_SCAN_INTERVAL = "scan_interval"
 CONF_HUB_ROOT_NODE = "hub_root"
 
+# Fallback chunk size when the server does not report MaxNodesPerRead
+DEFAULT_MAX_NODES_PER_READ = 1000
+
+# Fallback chunk size when the server does not report MaxNodesPerWrite
+DEFAULT_MAX_NODES_PER_WRITE = 1000
+
+# Fallback chunk size when the server does not report MaxNodesPerBrowse
+DEFAULT_MAX_NODES_PER_BROWSE = 500
+
+# Fallback chunk size when the server does not report MaxNodesPerHistoryReadData
+DEFAULT_MAX_NODES_PER_HISTORY_READ = 100
+
+# Fallback chunk size when the server does not report MaxNodesPerRegisterNodes
+DEFAULT_MAX_NODES_PER_REGISTER_NODES = 1000
+
+# Register the polled nodes and read and write them through the server handles
+CONF_HUB_REGISTER_NODES = "register_nodes"
+DEFAULT_REGISTER_NODES = True
+
+# Discovery
+CONF_HUB_DISCOVERY_CONCURRENCY = "discovery_concurrency"
+DEFAULT_DISCOVERY_CONCURRENCY = 4
+
+# Discovery filters, applied while crawling so pruned branches are never fetched
+CONF_HUB_MAX_DEPTH = "max_depth"
+DEFAULT_MAX_DEPTH = 0  # unlimited
+CONF_HUB_INCLUDE = "include"
+CONF_HUB_EXCLUDE = "exclude"
+CONF_HUB_NODE_CLASSES = "node_classes"
+NODE_CLASSES = ["Object", "Variable", "ObjectType", "VariableType"]
+DEFAULT_NODE_CLASSES = NODE_CLASSES
+CONF_HUB_REFERENCE_TYPES = "reference_types"
+REFERENCE_TYPES = [
+    "HierarchicalReferences",
+    "Organizes",
+    "HasComponent",
+    "HasOrderedComponent",
+    "HasProperty",
+    "HasNotifier",
+]
+DEFAULT_REFERENCE_TYPES = ["HierarchicalReferences"]
+CONF_HUB_DISCOVERY_READ_VALUES = "discovery_read_values"
+DEFAULT_DISCOVERY_READ_VALUES = True
+
+# Array variables, one sensor with the elements as attribute or one per element
+CONF_HUB_ARRAY_MODE = "array_mode"
+ARRAY_MODE_ATTRIBUTES = "attributes"
+ARRAY_MODE_ELEMENTS = "elements"
+ARRAY_MODES = [ARRAY_MODE_ATTRIBUTES, ARRAY_MODE_ELEMENTS]
+DEFAULT_ARRAY_MODE = ARRAY_MODE_ATTRIBUTES
+
 # Set Value Service
 SERVICE_SET_VALUE = "opcua_set_value"
 FIELD_NODE_HUB = "hub"
 FIELD_NODE_ID = "node_id"
 FIELD_VALUE = "value"
+
+# Set Values Service
+SERVICE_SET_VALUES = "opcua_set_values"
+FIELD_VALUES = "values"
+
+# Rescan Service, adds the entities of new nodes and retires removed ones
+SERVICE_RESCAN = "opcua_rescan"
+# Dispatcher signal of the nodes a rescan added, formatted with the hub name
+SIGNAL_NODES_ADDED = f"{DOMAIN}_nodes_added_{{}}"
+CONF_HUB_RESCAN_ON_MODEL_CHANGE = "rescan_on_model_change"
+DEFAULT_RESCAN_ON_MODEL_CHANGE = False
+MODEL_CHANGE_RESCAN_DELAY = 10  # s after the last model change event
+MODEL_CHANGE_RETRY_DELAY = 60  # s before a failed rescan is retried
+
+# Update mode
+CONF_HUB_UPDATE_MODE = "update_mode"
+CONF_HUB_PUBLISHING_INTERVAL = "publishing_interval"
+CONF_HUB_SAMPLING_INTERVAL = "sampling_interval"
+CONF_HUB_QUEUE_SIZE = "queue_size"
+UPDATE_MODE_POLLING = "polling"
+UPDATE_MODE_SUBSCRIPTION = "subscription"
+UPDATE_MODE_ADAPTIVE = "adaptive"
+UPDATE_MODES = [UPDATE_MODE_POLLING, UPDATE_MODE_SUBSCRIPTION, UPDATE_MODE_ADAPTIVE]
+DEFAULT_PUBLISHING_INTERVAL = 1000  # ms
+DEFAULT_SAMPLING_INTERVAL = 500  # ms
+DEFAULT_QUEUE_SIZE = 1
+
+# Adaptive update mode, polling with a scan interval between the minimum and
+# maximum that follows the share of changed values and the poll duration
+CONF_HUB_MIN_SCAN_INTERVAL = "min_scan_interval"
+CONF_HUB_MAX_SCAN_INTERVAL = "max_scan_interval"
+DEFAULT_MIN_SCAN_INTERVAL = 1  # s
+DEFAULT_MAX_SCAN_INTERVAL = 60  # s
+ADAPTIVE_ACTIVE_RATIO = 0.1  # changed share above which the interval shrinks
+ADAPTIVE_IDLE_RATIO = 0.01  # changed share below which the interval stretches
+ADAPTIVE_SHRINK_FACTOR = 0.5
+ADAPTIVE_STRETCH_FACTOR = 1.5
+ADAPTIVE_MAX_DUTY_CYCLE = 0.5  # share of the interval a poll may take
+
+# Fallback monitored item count per subscription when the server reports no limit
+DEFAULT_MAX_MONITORED_ITEMS_PER_SUBSCRIPTION = 1000
+
+# Discovery cache
+CONF_HUB_DISCOVERY_CACHE = "discovery_cache"
+DEFAULT_DISCOVERY_CACHE = True
+DISCOVERY_CACHE_VERSION = 1
+DISCOVERY_CACHE_SAMPLE_SIZE = 16
+
+# Polling groups
+CONF_HUB_POLLING_GROUPS = "polling_groups"
+CONF_GROUP_NAME = "name"
+CONF_GROUP_SCAN_INTERVAL = "scan_interval"
+CONF_GROUP_NODE_ID = "node_id"
+CONF_GROUP_BROWSE_NAME = "browse_name"
+CONF_GROUP_DATA_TYPE = "data_type"
+CONF_GROUP_DEADBAND = "deadband"
+CONF_GROUP_DEADBAND_TYPE = "deadband_type"
+DEADBAND_ABSOLUTE = "absolute"
+DEADBAND_PERCENT = "percent"
+DEADBAND_TYPES = [DEADBAND_ABSOLUTE, DEADBAND_PERCENT]
+
+# History backfill, rebuilds the long-term statistics of the hours an outage
+# overlapped from the server history
+CONF_HUB_HISTORY_BACKFILL = "history_backfill"
+DEFAULT_HISTORY_BACKFILL = False
+HISTORY_BACKFILL_MAX_HOURS = 168  # oldest hour rebuilt after a long outage
+HISTORY_VALUES_PER_NODE = 1000  # values per node in each HistoryRead response
+
+# Event subscriptions, OPC UA events and alarms of the notifier nodes are
+# fired on the Home Assistant bus in batches
+CONF_HUB_EVENT_NOTIFIERS = "event_notifiers"
+CONF_HUB_EVENT_FIELDS = "event_fields"
+EVENT_NOTIFIER_SERVER = "Server"
+EVENT_NOTIFIER_ROOT = "root"
+DEFAULT_EVENT_FIELDS = [
+    "EventId",
+    "EventType",
+    "SourceNode",
+    "SourceName",
+    "Time",
+    "Message",
+    "Severity",
+    "ConditionName",
+    "ActiveState/Id",
+    "AckedState/Id",
+]
+EVENT_OPCUA_EVENTS = f"{DOMAIN}_events"  # Home Assistant bus event type
+EVENT_BATCH_SIZE = 100  # OPC UA events per bus event
+EVENT_QUEUE_SIZE = 1000  # server side queue of the event monitored items
+EVENT_MAX_PENDING = 10000  # queued events, the oldest are dropped beyond
+
+# Request scheduler of the main session, lower values are sent first
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+PRIORITY_BACKGROUND = 2  # discovery and history backfill
+SCHEDULER_MAX_IN_FLIGHT = 4  # requests in flight on the main session
+SCHEDULER_READ_CHUNK_SIZE = 250  # nodes per polling Read of the main session
+
+# Worker process, polls in its own session and publishes the values in a
+# shared-memory table so decoding never stalls the event loop
+CONF_HUB_WORKER_PROCESS = "worker_process"
+DEFAULT_WORKER_PROCESS = False
+WORKER_STOP_TIMEOUT = 5  # seconds to wait for the worker to exit
+
+# Additional client sessions used to shard polling reads
+CONF_HUB_SESSIONS = "sessions"
+DEFAULT_SESSIONS = 1
+
+# Read results hubs sharing a connection reuse, refreshes of coordinators with
+# the same scan interval start within the same second
+SHARED_READ_MAX_AGE = 1.0  # s
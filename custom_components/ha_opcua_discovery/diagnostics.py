@@ -0,0 +1,71 @@
+"""Diagnostics support for OPC UA."""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import AsyncuaCoordinator
+from .const import CONF_HUB_ID, CONF_HUB_PASSWORD, CONF_HUB_USERNAME, DOMAIN
+
+TO_REDACT = {CONF_HUB_USERNAME, CONF_HUB_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the runtime metrics of a hub."""
+    coordinator: AsyncuaCoordinator = hass.data[DOMAIN][entry.data[CONF_HUB_ID]]
+    hub = coordinator.hub
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "update_interval": (
+                coordinator.update_interval.total_seconds()
+                if coordinator.update_interval
+                else None
+            ),
+            "nodes": len(coordinator.registry),
+            "platforms": dict(Counter(coordinator.registry.platforms)),
+        },
+        "discovery": hub.discovery_stats,
+        "polling": hub.metrics.as_dict(),
+        "node_health": {
+            **hub.node_health.stats,
+            "failing": hub.node_health.failing,
+            "quarantined": hub.node_health.quarantined,
+        },
+        "history_backfill": (
+            coordinator.history_backfill.stats if coordinator.history_backfill else None
+        ),
+        "events": (
+            coordinator.event_stream.stats if coordinator.event_stream else None
+        ),
+        "model_changes": (
+            coordinator.model_change_watcher.stats
+            if coordinator.model_change_watcher
+            else None
+        ),
+        "worker": (
+            {**hub.worker.stats, "running": hub.worker.is_running}
+            if hub.worker
+            else None
+        ),
+        "connection": {
+            **hub.connection.stats,
+            "shared_by": hub.connection.references,
+            "read_chunk_size": hub.read_chunk_size,
+            "write_chunk_size": hub.write_chunk_size,
+            "browse_chunk_size": hub.browse_chunk_size,
+            "scheduler": hub.connection.scheduler.stats,
+        },
+    }
@@ -0,0 +1,83 @@
+"""Persistent cache of discovered OPC UA nodes."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from asyncua import ua
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+
+from .const import DISCOVERY_CACHE_SAMPLE_SIZE, DISCOVERY_CACHE_VERSION, DOMAIN
+from .discovery_filter import DiscoveryFilter
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_FILTER = DiscoveryFilter().as_dict()
+
+# Errors of an unreadable or malformed cache file and of the server reads
+# validating it, the entry then falls back to a full discovery
+CACHE_ERRORS = (
+    HomeAssistantError,
+    OSError,
+    ua.UaError,
+    LookupError,
+    TypeError,
+    ValueError,
+)
+
+
+class DiscoveryCache:
+    """Store discovery results of a hub so restarts can skip the full crawl."""
+
+    def __init__(self, hass: HomeAssistant, hub_id: str) -> None:
+        self._store = Store(hass, DISCOVERY_CACHE_VERSION, f"{DOMAIN}.{hub_id}")
+
+    async def async_load(self, hub) -> list[dict[str, Any]] | None:
+        """Return the cached nodes if they are still valid for the hub's server."""
+        data = await self._store.async_load()
+        if not data:
+            return None
+
+        if data.get("url") != hub.hub_url or data.get("root_node") != hub.root_node_id:
+            _LOGGER.debug("Discovery cache was built for another endpoint or root node")
+            return None
+        # Caches without filters were built with the default ones
+        if data.get("filter", DEFAULT_FILTER) != hub.discovery_filter.as_dict():
+            _LOGGER.debug("Discovery cache was built with other discovery filters")
+            return None
+
+        nodes = data.get("nodes") or []
+        samples = _sample_nodes(nodes)
+        if not await hub.validate_nodes(data.get("namespace_array"), samples):
+            _LOGGER.info("Discovery cache is outdated, running a full discovery")
+            return None
+
+        _LOGGER.info(f"Loaded {len(nodes)} nodes from the discovery cache")
+        return nodes
+
+    async def async_save(self, hub, nodes: list[dict[str, Any]]) -> None:
+        """Persist the discovery results together with the server namespace array."""
+        await self._store.async_save(
+            {
+                "url": hub.hub_url,
+                "root_node": hub.root_node_id,
+                "filter": hub.discovery_filter.as_dict(),
+                "namespace_array": await hub.read_namespace_array(),
+                "nodes": nodes,
+            }
+        )
+
+    async def async_remove(self) -> None:
+        """Remove the cache file."""
+        await self._store.async_remove()
+
+
+def _sample_nodes(nodes: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Pick evenly spaced nodes, including the first and last one."""
+    if len(nodes) <= DISCOVERY_CACHE_SAMPLE_SIZE:
+        return nodes
+    step = (len(nodes) - 1) / (DISCOVERY_CACHE_SAMPLE_SIZE - 1)
+    return [nodes[round(i * step)] for i in range(DISCOVERY_CACHE_SAMPLE_SIZE)]
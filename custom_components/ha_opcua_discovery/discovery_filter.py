@@ -0,0 +1,109 @@
+"""Filters limiting which part of the address space discovery crawls."""
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from fnmatch import fnmatchcase
+from typing import Any
+
+from asyncua import ua
+
+from .const import (
+    CONF_HUB_DISCOVERY_READ_VALUES,
+    CONF_HUB_EXCLUDE,
+    CONF_HUB_INCLUDE,
+    CONF_HUB_MAX_DEPTH,
+    CONF_HUB_NODE_CLASSES,
+    CONF_HUB_REFERENCE_TYPES,
+    DEFAULT_DISCOVERY_READ_VALUES,
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_NODE_CLASSES,
+    DEFAULT_REFERENCE_TYPES,
+)
+
+
+class DiscoveryFilter:
+    """Pruning rules of the discovery crawl.
+
+    ``node_classes`` and ``reference_types`` are sent in every Browse
+    request, so the server only returns matching references. Nodes deeper
+    than ``max_depth`` below the root node are not browsed and nodes matching
+    an ``exclude`` pattern are neither browsed nor read. ``include`` patterns
+    only select the variables that become entities, their branches are still
+    crawled. Patterns are shell-style wildcards (``*``, ``?``) matched against
+    the browse path below the root node (``Line1/Temp*``) or the node id.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        node_classes: list[str] = DEFAULT_NODE_CLASSES,
+        reference_types: list[str] = DEFAULT_REFERENCE_TYPES,
+        read_values: bool = DEFAULT_DISCOVERY_READ_VALUES,
+    ) -> None:
+        self.max_depth = max_depth
+        self.include = [pattern for pattern in include or [] if pattern]
+        self.exclude = [pattern for pattern in exclude or [] if pattern]
+        self.node_classes = {ua.NodeClass[name] for name in node_classes}
+        self.reference_types = list(reference_types) or DEFAULT_REFERENCE_TYPES
+        self.read_values = read_values
+
+        # Variables are always returned, they are what discovery looks for
+        self.node_class_mask = ua.NodeClass.Variable.value
+        for node_class in self.node_classes:
+            self.node_class_mask |= node_class.value
+        self.reference_type_ids = [
+            ua.NodeId(getattr(ua.ObjectIds, name)) for name in self.reference_types
+        ]
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any]) -> DiscoveryFilter:
+        return cls(
+            max_depth=config.get(CONF_HUB_MAX_DEPTH) or DEFAULT_MAX_DEPTH,
+            include=config.get(CONF_HUB_INCLUDE),
+            exclude=config.get(CONF_HUB_EXCLUDE),
+            node_classes=config.get(CONF_HUB_NODE_CLASSES) or DEFAULT_NODE_CLASSES,
+            reference_types=config.get(CONF_HUB_REFERENCE_TYPES)
+            or DEFAULT_REFERENCE_TYPES,
+            read_values=config.get(
+                CONF_HUB_DISCOVERY_READ_VALUES, DEFAULT_DISCOVERY_READ_VALUES
+            ),
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            CONF_HUB_MAX_DEPTH: self.max_depth,
+            CONF_HUB_INCLUDE: self.include,
+            CONF_HUB_EXCLUDE: self.exclude,
+            CONF_HUB_NODE_CLASSES: sorted(
+                node_class.name for node_class in self.node_classes
+            ),
+            CONF_HUB_REFERENCE_TYPES: self.reference_types,
+            CONF_HUB_DISCOVERY_READ_VALUES: self.read_values,
+        }
+
+    def browses(self, node_class: ua.NodeClass, depth: int) -> bool:
+        """Return whether the children of a node at the given depth are browsed."""
+        if self.max_depth and depth >= self.max_depth:
+            return False
+        return node_class in self.node_classes
+
+    def is_excluded(self, path: str, node_id: ua.NodeId) -> bool:
+        return bool(self.exclude) and _matches(self.exclude, path, node_id)
+
+    def is_included(self, path: str, node_id: ua.NodeId) -> bool:
+        return not self.include or _matches(self.include, path, node_id)
+
+
+def _matches(patterns: list[str], path: str, node_id: ua.NodeId) -> bool:
+    node_id_string = None
+    for pattern in patterns:
+        if fnmatchcase(path, pattern):
+            return True
+        if node_id_string is None:
+            node_id_string = node_id.to_string()
+        if fnmatchcase(node_id_string, pattern):
+            return True
+    return False
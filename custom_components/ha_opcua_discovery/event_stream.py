@@ -0,0 +1,147 @@
+"""OPC UA events and alarms fired on the Home Assistant bus in batches."""
+
+from __future__ import annotations
+
+import logging
+from collections import deque
+from collections.abc import Sequence
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+from asyncua import ua
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    EVENT_BATCH_SIZE,
+    EVENT_MAX_PENDING,
+    EVENT_NOTIFIER_ROOT,
+    EVENT_NOTIFIER_SERVER,
+    EVENT_OPCUA_EVENTS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def event_filter(fields: Sequence[str]) -> ua.EventFilter:
+    """Return an EventFilter selecting the given BaseEventType browse paths.
+
+    Paths are relative to the event type, sub-properties are separated by
+    ``/`` (``ActiveState/Id``). Fields an event type does not define are
+    returned as null values.
+    """
+    evfilter = ua.EventFilter()
+    for field in fields:
+        evfilter.SelectClauses.append(
+            ua.SimpleAttributeOperand(
+                TypeDefinitionId=ua.NodeId(ua.ObjectIds.BaseEventType),
+                BrowsePath=[ua.QualifiedName(name, 0) for name in field.split("/")],
+                AttributeId=ua.AttributeIds.Value,
+            )
+        )
+    return evfilter
+
+
+def notifier_node_id(notifier: str, root_node_id: str) -> ua.NodeId:
+    """Resolve a configured notifier, ``Server`` and ``root`` are aliases."""
+    if notifier == EVENT_NOTIFIER_SERVER:
+        return ua.NodeId(ua.ObjectIds.Server)
+    if notifier == EVENT_NOTIFIER_ROOT:
+        return ua.NodeId.from_string(root_node_id)
+    return ua.NodeId.from_string(notifier)
+
+
+def _json_value(value: Any) -> Any:
+    """Convert an event field into a value the bus and the recorder can store."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value.name if isinstance(value, Enum) else value
+    if isinstance(value, bytes):
+        return value.hex()
+    if isinstance(value, datetime):
+        # asyncua decodes UTC timestamps as naive datetimes
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=dt_util.UTC)
+        return value.isoformat()
+    if isinstance(value, ua.NodeId):
+        return value.to_string()
+    if isinstance(value, ua.LocalizedText):
+        return value.Text
+    if isinstance(value, ua.QualifiedName):
+        return value.to_string()
+    if isinstance(value, ua.StatusCode):
+        return value.name
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+    return str(value)
+
+
+class EventStream:
+    """asyncua subscription handler firing OPC UA events on the bus.
+
+    Notifications only queue the raw event fields. The queue is flushed on
+    the next loop iteration, so the events of one publish response share a
+    ``ha_opcua_discovery_events`` bus event, at most ``EVENT_BATCH_SIZE``
+    events each. Larger floods are fired over several loop iterations, and
+    beyond ``EVENT_MAX_PENDING`` queued events the oldest are dropped, so an
+    alarm storm never stalls the event loop.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        hub_name: str,
+        notifiers: Sequence[str],
+        fields: Sequence[str],
+    ):
+        self._hass = hass
+        self._hub_name = hub_name
+        self.notifiers = list(notifiers)
+        self.fields = list(fields)
+        self.event_filter = event_filter(self.fields)
+        self.active = False
+        self._pending: deque[list[ua.Variant]] = deque(maxlen=EVENT_MAX_PENDING)
+        self.stats = {"received": 0, "dropped": 0, "bus_events": 0}
+
+    def event_notification(self, event: Any):
+        pending = self._pending
+        if not pending:
+            # Coalesce all events of a publish response into one flush
+            self._hass.loop.call_soon(self._async_flush)
+        elif len(pending) == pending.maxlen:
+            self.stats["dropped"] += 1
+        pending.append(event.event_fields)
+        self.stats["received"] += 1
+
+    def status_change_notification(self, status: Any):
+        _LOGGER.warning(f"Event subscription status changed: {status.Status}")
+        if status.Status.value == ua.StatusCodes.BadShutdown:
+            # Lost with the connection, which keeps the subscription when it
+            # reactivates or transfers the session
+            return
+        self.active = False
+
+    @callback
+    def _async_flush(self) -> None:
+        pending = self._pending
+        batch = [pending.popleft() for _ in range(min(len(pending), EVENT_BATCH_SIZE))]
+        if pending:
+            # Yield to the loop between the batches of a flood
+            self._hass.loop.call_soon(self._async_flush)
+        if not batch:
+            return
+        fields = self.fields
+        self._hass.bus.async_fire(
+            EVENT_OPCUA_EVENTS,
+            {
+                "hub": self._hub_name,
+                "events": [
+                    {
+                        field: _json_value(variant.Value)
+                        for field, variant in zip(fields, event_fields)
+                    }
+                    for event_fields in batch
+                ],
+            },
+        )
+        self.stats["bus_events"] += 1
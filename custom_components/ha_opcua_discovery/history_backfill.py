@@ -0,0 +1,312 @@
+"""Backfill of the long-term statistics of a connection outage from the server history."""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+
+from asyncua import ua
+from homeassistant.components.recorder import DOMAIN as RECORDER_DOMAIN
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_import_statistics
+from homeassistant.const import ATTR_UNIT_OF_MEASUREMENT
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import dt as dt_util
+
+from .connection import REQUEST_ERRORS
+
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:
+    # Home Assistant before 2025.4 only knows the has_mean flag
+    StatisticMeanType = None
+from .const import (
+    DOMAIN,
+    HISTORY_BACKFILL_MAX_HOURS,
+    HISTORY_VALUES_PER_NODE,
+    PLATFORM_SENSOR,
+)
+
+if TYPE_CHECKING:
+    from . import OpcuaHub
+
+_LOGGER = logging.getLogger(__name__)
+
+_HOUR = timedelta(hours=1)
+
+# Variant types whose history is imported, booleans and strings have no mean
+_NUMERIC_VARIANT_TYPES = {
+    ua.VariantType.SByte,
+    ua.VariantType.Byte,
+    ua.VariantType.Int16,
+    ua.VariantType.UInt16,
+    ua.VariantType.Int32,
+    ua.VariantType.UInt32,
+    ua.VariantType.Int64,
+    ua.VariantType.UInt64,
+    ua.VariantType.Float,
+    ua.VariantType.Double,
+}
+
+
+def _start_of_hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class HourlyStatistics:
+    """Time-weighted hourly mean, min and max of a stream of samples.
+
+    Samples are fed in timestamp order, every value holds until the next
+    sample. A ``None`` value is a gap which is left out of the mean.
+    Completed hours are returned as soon as a later sample closes them.
+    """
+
+    def __init__(self, start: datetime):
+        self._time = start
+        self._hour = _start_of_hour(start)
+        self._value: float | None = None
+        self._sum = 0.0
+        self._duration = 0.0
+        self._min: float | None = None
+        self._max: float | None = None
+
+    def add(self, timestamp: datetime, value: float | None) -> list[StatisticData]:
+        completed = self._advance(timestamp)
+        self._value = value
+        return completed
+
+    def finish(self, end: datetime) -> list[StatisticData]:
+        """Return the remaining hours that end before ``end``."""
+        return self._advance(end)
+
+    def _advance(self, timestamp: datetime) -> list[StatisticData]:
+        completed = []
+        while timestamp >= self._hour + _HOUR:
+            end = self._hour + _HOUR
+            self._integrate(end)
+            if self._duration:
+                completed.append(
+                    StatisticData(
+                        start=self._hour,
+                        mean=self._sum / self._duration,
+                        min=self._min,
+                        max=self._max,
+                    )
+                )
+            # The held value carries over into the next hour
+            self._hour = end
+            self._sum = self._duration = 0.0
+            self._min = self._max = None
+        self._integrate(timestamp)
+        return completed
+
+    def _integrate(self, timestamp: datetime):
+        if timestamp <= self._time:
+            return
+        value = self._value
+        if value is not None:
+            seconds = (timestamp - self._time).total_seconds()
+            self._sum += value * seconds
+            self._duration += seconds
+            self._min = value if self._min is None else min(self._min, value)
+            self._max = value if self._max is None else max(self._max, value)
+        self._time = timestamp
+
+
+def _sample(data_value: ua.DataValue) -> tuple[datetime | None, float | None]:
+    """Return the timestamp and numeric value of a history sample."""
+    timestamp = data_value.SourceTimestamp or data_value.ServerTimestamp
+    if timestamp is not None and timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=dt_util.UTC)
+    if not data_value.StatusCode.is_good() or data_value.Value is None:
+        return timestamp, None
+    value = data_value.Value.Value
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return timestamp, None
+    return timestamp, float(value)
+
+
+class HistoryBackfill:
+    """Rebuild the hourly statistics of the numeric sensors after an outage.
+
+    Every complete hour the outage overlapped is read from the server history
+    of the historized nodes with batched HistoryRead requests, following the
+    continuation points. Samples are aggregated per hour as responses arrive
+    and the completed hours are imported after every response, so neither
+    the raw history nor the statistics of a long outage are held in memory.
+    The hour in progress is left to the recorder.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub: OpcuaHub, hub_name: str):
+        self._hass = hass
+        self._hub = hub
+        self._hub_name = hub_name
+        self.stats: dict[str, Any] = {}
+
+    def _statistic_ids(self) -> dict[int, str]:
+        """Return the entity id of the historized numeric sensors by node index."""
+        registry = self._hub.registry
+        entity_registry = er.async_get(self._hass)
+        statistic_ids = {}
+        for index in registry.history_indexes:
+            if (
+                registry.platforms[index] != PLATFORM_SENSOR
+                or index in registry.array_sizes
+                or registry.variant_types[index] not in _NUMERIC_VARIANT_TYPES
+            ):
+                continue
+            entity_id = entity_registry.async_get_entity_id(
+                PLATFORM_SENSOR,
+                DOMAIN,
+                f"opcua_{self._hub_name}_{registry.names[index]}",
+            )
+            if entity_id:
+                statistic_ids[index] = entity_id
+        return statistic_ids
+
+    async def async_backfill(self, start: datetime, end: datetime) -> None:
+        if RECORDER_DOMAIN not in self._hass.config.components:
+            _LOGGER.debug("Recorder not loaded, skipping the history backfill")
+            return
+
+        end = _start_of_hour(end)
+        start = max(_start_of_hour(start), end - HISTORY_BACKFILL_MAX_HOURS * _HOUR)
+        if start >= end:
+            # The outage did not overlap a complete hour
+            return
+
+        statistic_ids = self._statistic_ids()
+        if not statistic_ids:
+            return
+
+        indexes = list(statistic_ids)
+        chunk_size = self._hub.connection.history_read_chunk_size
+        self.stats = {
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "nodes": len(indexes),
+            "requests": 0,
+            "samples": 0,
+            "statistics": 0,
+            "duration": None,
+        }
+        started = time.perf_counter()
+        _LOGGER.info(
+            f"Backfilling the statistics of {len(indexes)} nodes from {start} to {end}"
+        )
+        try:
+            for offset in range(0, len(indexes), chunk_size):
+                await self._async_backfill_chunk(
+                    indexes[offset : offset + chunk_size], statistic_ids, start, end
+                )
+        except (HomeAssistantError, *REQUEST_ERRORS) as e:
+            _LOGGER.warning(f"History backfill aborted: {e}")
+        finally:
+            self.stats["duration"] = round(time.perf_counter() - started, 3)
+        _LOGGER.debug(f"History backfill: {self.stats}")
+
+    async def _async_backfill_chunk(
+        self,
+        indexes: Sequence[int],
+        statistic_ids: dict[int, str],
+        start: datetime,
+        end: datetime,
+    ):
+        registry = self._hub.registry
+        details = ua.ReadRawModifiedDetails(
+            IsReadModified=False,
+            StartTime=start,
+            EndTime=end,
+            NumValuesPerNode=HISTORY_VALUES_PER_NODE,
+            # The bound before the start gives the value held when it begins
+            ReturnBounds=True,
+        )
+        hours = {index: HourlyStatistics(start) for index in indexes}
+        # Continuation point of every node still being read
+        pending: dict[int, bytes | None] = dict.fromkeys(indexes)
+        try:
+            while pending:
+                results = await self._hub.history_read(
+                    [
+                        ua.HistoryReadValueId(
+                            NodeId_=registry.node_id(index),
+                            ContinuationPoint_=continuation_point,
+                        )
+                        for index, continuation_point in pending.items()
+                    ],
+                    details,
+                )
+                self.stats["requests"] += 1
+                next_pending = {}
+                for index, result in zip(pending, results):
+                    if not result.StatusCode.is_good():
+                        _LOGGER.debug(
+                            f"No history for {registry.node_ids[index]}: {result.StatusCode.name}"
+                        )
+                        continue
+                    statistics = hours[index]
+                    completed = []
+                    data_values = (
+                        result.HistoryData.DataValues if result.HistoryData else []
+                    )
+                    for data_value in data_values:
+                        timestamp, value = _sample(data_value)
+                        if timestamp is not None:
+                            completed.extend(statistics.add(timestamp, value))
+                    self.stats["samples"] += len(data_values)
+                    if result.ContinuationPoint:
+                        next_pending[index] = result.ContinuationPoint
+                    else:
+                        completed.extend(statistics.finish(end))
+                    self._import(statistic_ids[index], completed)
+                pending = next_pending
+        finally:
+            if pending:
+                await self._async_release(pending, details)
+
+    async def _async_release(
+        self, pending: dict[int, bytes | None], details: ua.ReadRawModifiedDetails
+    ):
+        """Release the continuation points of an aborted backfill on the server."""
+        registry = self._hub.registry
+        nodes_to_release = [
+            ua.HistoryReadValueId(
+                NodeId_=registry.node_id(index),
+                ContinuationPoint_=continuation_point,
+            )
+            for index, continuation_point in pending.items()
+            if continuation_point
+        ]
+        if not nodes_to_release:
+            return
+        try:
+            await self._hub.history_read(
+                nodes_to_release, details, release_continuation_points=True
+            )
+        except REQUEST_ERRORS as e:
+            _LOGGER.debug(f"Failed to release the history continuation points: {e}")
+
+    def _import(self, statistic_id: str, statistics: list[StatisticData]):
+        if not statistics:
+            return
+        state = self._hass.states.get(statistic_id)
+        metadata = StatisticMetaData(
+            has_sum=False,
+            name=None,
+            source=RECORDER_DOMAIN,
+            statistic_id=statistic_id,
+            unit_of_measurement=(
+                state.attributes.get(ATTR_UNIT_OF_MEASUREMENT) if state else None
+            ),
+        )
+        if StatisticMeanType is None:
+            metadata["has_mean"] = True
+        else:
+            metadata["mean_type"] = StatisticMeanType.ARITHMETIC
+        async_import_statistics(self._hass, metadata, statistics)
+        self.stats["statistics"] += len(statistics)
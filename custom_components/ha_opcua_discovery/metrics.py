@@ -0,0 +1,116 @@
+"""Cheap runtime metrics of the polling reads of a hub."""
+
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_right
+from collections import deque
+from typing import Any
+
+from .const import (
+    METRICS_HISTOGRAM_BUCKETS,
+    METRICS_SAMPLES,
+    METRICS_SLOWEST_READS,
+)
+
+
+class ReadRecord:
+    """Round trips of a single get_values call, filled in by the connection."""
+
+    __slots__ = ("nodes", "requests", "round_trips")
+
+    def __init__(self):
+        self.nodes = 0
+        self.requests = 0
+        self.round_trips: list[tuple[float, int, str]] = []
+
+    def add_round_trip(self, duration: float, nodes: int, first_node: str):
+        self.nodes += nodes
+        self.requests += 1
+        self.round_trips.append((duration, nodes, first_node))
+
+
+class HubMetrics:
+    """Scan statistics of a hub.
+
+    Every scan only updates a few counters, a bounded deque of recent
+    durations and a small heap of the slowest Read round trips. Individual
+    nodes are not timed, a node's latency is the duration of the multi-node
+    Read request that carried it.
+    """
+
+    def __init__(self):
+        self.scans = 0
+        self.last_duration: float | None = None
+        self._durations: deque[float] = deque(maxlen=METRICS_SAMPLES)
+        self.last_nodes = 0
+        self.last_requests = 0
+        self.last_round_trips = 0
+        self.last_nodes_per_second: float | None = None
+        self.last_bad_status = 0
+        self.total_bad_status = 0
+        self.last_changed = 0
+        self._histogram = [0] * (len(METRICS_HISTOGRAM_BUCKETS) + 1)
+        self._slowest: list[tuple[float, int, str]] = []
+
+    def record_scan(
+        self,
+        duration: float,
+        record: ReadRecord,
+        good: int,
+        bad: int,
+        changed: int = 0,
+    ):
+        self.scans += 1
+        self.last_duration = duration
+        self._durations.append(duration)
+        self.last_nodes = record.nodes
+        self.last_requests = record.requests
+        self.last_round_trips = len(record.round_trips)
+        self.last_nodes_per_second = (good + bad) / duration if duration else None
+        self.last_bad_status = bad
+        self.total_bad_status += bad
+        self.last_changed = changed
+
+        for round_trip in record.round_trips:
+            self._histogram[bisect_right(METRICS_HISTOGRAM_BUCKETS, round_trip[0])] += 1
+            if len(self._slowest) < METRICS_SLOWEST_READS:
+                heapq.heappush(self._slowest, round_trip)
+            elif round_trip[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, round_trip)
+
+    @property
+    def average_duration(self) -> float | None:
+        if not self._durations:
+            return None
+        return sum(self._durations) / len(self._durations)
+
+    @property
+    def histogram(self) -> dict[str, int]:
+        """Return the number of Read round trips per duration bucket."""
+        labels = [f"<{bucket * 1000:g} ms" for bucket in METRICS_HISTOGRAM_BUCKETS]
+        labels.append(f">={METRICS_HISTOGRAM_BUCKETS[-1] * 1000:g} ms")
+        return dict(zip(labels, self._histogram))
+
+    @property
+    def slowest_reads(self) -> list[dict[str, Any]]:
+        return [
+            {"duration": round(duration, 4), "nodes": nodes, "first_node": nodeid}
+            for duration, nodes, nodeid in sorted(self._slowest, reverse=True)
+        ]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "scans": self.scans,
+            "last_poll_duration": self.last_duration,
+            "average_poll_duration": self.average_duration,
+            "last_nodes": self.last_nodes,
+            "last_requests": self.last_requests,
+            "last_round_trips": self.last_round_trips,
+            "last_nodes_per_second": self.last_nodes_per_second,
+            "last_bad_status": self.last_bad_status,
+            "total_bad_status": self.total_bad_status,
+            "last_changed": self.last_changed,
+            "round_trip_histogram": self.histogram,
+            "slowest_reads": self.slowest_reads,
+        }
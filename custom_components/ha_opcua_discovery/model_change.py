@@ -0,0 +1,127 @@
+"""Rescans triggered by the model change events of the server."""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from asyncua import ua
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+
+from .connection import REQUEST_ERRORS
+from .const import MODEL_CHANGE_RESCAN_DELAY, MODEL_CHANGE_RETRY_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+# GeneralModelChangeEventType is a subtype of BaseModelChangeEventType
+_MODEL_CHANGE_EVENT_TYPES = (
+    ua.NodeId(ua.ObjectIds.BaseModelChangeEventType),
+    ua.NodeId(ua.ObjectIds.GeneralModelChangeEventType),
+)
+
+
+def model_change_filter() -> ua.EventFilter:
+    """Return an EventFilter selecting the model change events by type."""
+    evfilter = ua.EventFilter()
+    evfilter.SelectClauses.append(
+        ua.SimpleAttributeOperand(
+            TypeDefinitionId=ua.NodeId(ua.ObjectIds.BaseEventType),
+            BrowsePath=[ua.QualifiedName("EventType", 0)],
+            AttributeId=ua.AttributeIds.Value,
+        )
+    )
+    # EventType is BaseModelChangeEventType or GeneralModelChangeEventType
+    evfilter.WhereClause.Elements = [
+        ua.ContentFilterElement(
+            FilterOperator_=ua.FilterOperator.Or,
+            FilterOperands=[ua.ElementOperand(Index=1), ua.ElementOperand(Index=2)],
+        ),
+        *(
+            ua.ContentFilterElement(
+                FilterOperator_=ua.FilterOperator.OfType,
+                FilterOperands=[ua.LiteralOperand(Value=ua.Variant(event_type))],
+            )
+            for event_type in _MODEL_CHANGE_EVENT_TYPES
+        ),
+    ]
+    return evfilter
+
+
+class ModelChangeWatcher:
+    """asyncua subscription handler scheduling a rescan on model changes.
+
+    A PLC download or an online change emits a burst of model change
+    events. Every event restarts a ``MODEL_CHANGE_RESCAN_DELAY`` timer, so
+    the burst results in a single rescan once the server settled. A failed
+    rescan is retried after ``MODEL_CHANGE_RETRY_DELAY``, or sooner when
+    another event arrives. Events of other types are ignored, for servers
+    without WhereClause support.
+    """
+
+    def __init__(self, hass: HomeAssistant, rescan: Callable[[], Any]):
+        self._hass = hass
+        self._rescan = rescan
+        self.event_filter = model_change_filter()
+        self.active = False
+        self._cancel_timer: CALLBACK_TYPE | None = None
+        self.stats = {"events": 0, "rescans": 0, "failures": 0}
+
+    def event_notification(self, event: Any):
+        (event_type,) = event.event_fields
+        if event_type.Value not in _MODEL_CHANGE_EVENT_TYPES:
+            return
+        self.stats["events"] += 1
+        self._hass.loop.call_soon(self._async_restart_timer)
+
+    def status_change_notification(self, status: Any):
+        _LOGGER.warning(f"Model change subscription status changed: {status.Status}")
+        if status.Status.value == ua.StatusCodes.BadShutdown:
+            # Lost with the connection, which keeps the subscription when it
+            # reactivates or transfers the session
+            return
+        self.active = False
+
+    @callback
+    def _async_restart_timer(self) -> None:
+        self.async_cancel()
+        self._cancel_timer = async_call_later(
+            self._hass, MODEL_CHANGE_RESCAN_DELAY, self._async_rescan
+        )
+
+    @callback
+    def _async_rescan(self, _now=None) -> None:
+        self._cancel_timer = None
+        _LOGGER.info("Server address space changed, rescanning")
+        self._hass.async_create_background_task(
+            self._async_run_rescan(), "opcua model rescan"
+        )
+
+    async def _async_run_rescan(self) -> None:
+        try:
+            await self._rescan()
+        except (HomeAssistantError, *REQUEST_ERRORS) as e:
+            _LOGGER.warning(
+                f"Rescan after a model change failed, retrying in {MODEL_CHANGE_RETRY_DELAY} s: {e}"
+            )
+        except Exception:
+            _LOGGER.exception(
+                f"Unexpected error during the rescan after a model change, retrying in {MODEL_CHANGE_RETRY_DELAY} s"
+            )
+        else:
+            self.stats["rescans"] += 1
+            return
+        self.stats["failures"] += 1
+        # Unless an event restarted the timer meanwhile
+        if self._cancel_timer is None:
+            self._cancel_timer = async_call_later(
+                self._hass, MODEL_CHANGE_RETRY_DELAY, self._async_rescan
+            )
+
+    @callback
+    def async_cancel(self) -> None:
+        if self._cancel_timer:
+            self._cancel_timer()
+            self._cancel_timer = None
@@ -0,0 +1,95 @@
+"""Per-node health tracking and quarantine of nodes that keep failing."""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any
+
+from .const import (
+    QUARANTINE_MAX_DELAY,
+    QUARANTINE_MIN_DELAY,
+    QUARANTINE_THRESHOLD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class NodeHealth:
+    """Health of the nodes of a hub.
+
+    A node returning a bad status code only makes its own entity unavailable.
+    After ``threshold`` consecutive failures the node is quarantined: it is
+    left out of the polling reads and only probed again after a delay that
+    doubles with every further failure, up to ``max_delay`` seconds.
+    """
+
+    def __init__(
+        self,
+        threshold: int = QUARANTINE_THRESHOLD,
+        min_delay: float = QUARANTINE_MIN_DELAY,
+        max_delay: float = QUARANTINE_MAX_DELAY,
+    ):
+        self._threshold = threshold
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._failures: dict[str, int] = {}
+        self._statuses: dict[str, str] = {}
+        self._probe_at: dict[str, float] = {}
+
+    def is_due(self, nodeid: str, now: float | None = None) -> bool:
+        """Return whether the node should be read, quarantined nodes only when probed."""
+        probe_at = self._probe_at.get(nodeid)
+        if probe_at is None:
+            return True
+        return probe_at <= (time.monotonic() if now is None else now)
+
+    def record_success(self, nodeid: str):
+        if self._failures.pop(nodeid, None) is None:
+            return
+        self._statuses.pop(nodeid, None)
+        if self._probe_at.pop(nodeid, None) is not None:
+            _LOGGER.info(f"Node {nodeid} recovered, leaving quarantine")
+
+    def discard(self, nodeid: str):
+        """Forget a node that no longer exists."""
+        self._failures.pop(nodeid, None)
+        self._statuses.pop(nodeid, None)
+        self._probe_at.pop(nodeid, None)
+
+    def record_failure(self, nodeid: str, status: str) -> int:
+        """Count a failure of the node and return its consecutive failures."""
+        failures = self._failures.get(nodeid, 0) + 1
+        self._failures[nodeid] = failures
+        self._statuses[nodeid] = status
+        if failures >= self._threshold:
+            delay = min(
+                self._max_delay,
+                self._min_delay * 2 ** (failures - self._threshold),
+            )
+            self._probe_at[nodeid] = time.monotonic() + delay
+            _LOGGER.info(
+                f"Node {nodeid} quarantined after {failures} failures ({status}), next probe in {delay:.0f} s"
+            )
+        return failures
+
+    @property
+    def failing(self) -> dict[str, str]:
+        """Return the last bad status of every failing node."""
+        return dict(self._statuses)
+
+    @property
+    def has_quarantined(self) -> bool:
+        return bool(self._probe_at)
+
+    @property
+    def quarantined(self) -> dict[str, str]:
+        """Return the last bad status of every quarantined node."""
+        return {nodeid: self._statuses[nodeid] for nodeid in self._probe_at}
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "failing_nodes": len(self._failures),
+            "quarantined_nodes": len(self._probe_at),
+        }
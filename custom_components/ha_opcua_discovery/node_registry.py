@@ -0,0 +1,141 @@
+"""Compact registry of the nodes of a hub, addressed by integer index."""
+
+from __future__ import annotations
+
+import logging
+import sys
+from collections.abc import Iterable
+from typing import Any
+
+from asyncua import ua
+
+from .connection import _read_value_id
+
+_LOGGER = logging.getLogger(__name__)
+
+# Value of the nodes without a good value, their entities are unavailable
+UNAVAILABLE = object()
+
+# Bit 2 of the AccessLevel attribute is HistoryRead
+_ACCESS_LEVEL_HISTORY_READ = 0x04
+
+
+class NodeRegistry:
+    """Table of the discovered nodes of a hub.
+
+    Every node gets an integer index and one slot in a few parallel lists,
+    the discovered node dicts are not kept. Node ids are parsed once into the
+    ``ReadValueId`` reused by every Read request, and polled values are
+    stored in place in the preallocated ``values`` list. Entities and polling
+    groups keep an index instead of looking nodes up by name.
+    """
+
+    def __init__(self, nodes: Iterable[dict[str, Any]] = ()):
+        self.names: list[str] = []
+        self.node_ids: list[str] = []
+        self.read_value_ids: list[ua.ReadValueId] = []
+        self.platforms: list[str] = []
+        self.variant_types: list[ua.VariantType | None] = []
+        # Discovered element count of the array variables, 0 when unknown
+        self.array_sizes: dict[int, int] = {}
+        # Nodes whose history can be read from the server
+        self.history_indexes: list[int] = []
+        self._indexes: dict[ua.NodeId, int] = {}
+
+        # Nodes removed from the server by a rescan, their slots stay unused
+        self.retired: set[int] = set()
+
+        # Names are unique, a later node replaces an earlier one of the same name
+        for node in {node["name"]: node for node in nodes}.values():
+            self._add(node)
+
+        self.values: list[Any] = [UNAVAILABLE] * len(self.names)
+
+    def _add(self, node: dict[str, Any]) -> int | None:
+        try:
+            node_id = ua.NodeId.from_string(node["node_id"])
+        except ua.UaStringParsingError as e:
+            _LOGGER.warning(f"Skipping node {node['node_id']} ({node['name']}): {e}")
+            return None
+        if node_id in self._indexes:
+            return None
+        index = len(self.names)
+        if node.get("array_size") is not None:
+            self.array_sizes[index] = node["array_size"]
+        if (node.get("access_level") or 0) & _ACCESS_LEVEL_HISTORY_READ:
+            self.history_indexes.append(index)
+        self._indexes[node_id] = index
+        self.names.append(node["name"])
+        self.node_ids.append(node["node_id"])
+        self.read_value_ids.append(_read_value_id(node_id))
+        platform = node.get("platform")
+        self.platforms.append(sys.intern(platform) if platform else None)
+        variant_type = node.get("variant_type")
+        self.variant_types.append(
+            ua.VariantType[variant_type] if variant_type else None
+        )
+        return index
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def index(self, node_id: ua.NodeId) -> int | None:
+        return self._indexes.get(node_id)
+
+    def node_id(self, index: int) -> ua.NodeId:
+        return self.read_value_ids[index].NodeId
+
+    def variant_type(self, node_id: ua.NodeId) -> ua.VariantType | None:
+        """Return the discovered variant type of a node, if it is registered."""
+        index = self._indexes.get(node_id)
+        return None if index is None else self.variant_types[index]
+
+    @property
+    def active_indexes(self) -> list[int]:
+        """Return the indexes of the nodes that were not retired."""
+        return [index for index in range(len(self.names)) if index not in self.retired]
+
+    def update(self, nodes: Iterable[dict[str, Any]]) -> tuple[list[int], list[int]]:
+        """Apply a new discovery, returning the added and the retired indexes.
+
+        Nodes are matched by node id. New nodes are appended and removed
+        nodes retired, existing indexes never move so entities and polling
+        groups keep theirs. Retired nodes lose their platform and value, a
+        node that comes back gets a new index. Other changes of a known
+        node, like its name or data type, need a reload.
+        """
+        nodes = {node["name"]: node for node in nodes}.values()
+        discovered = {node["node_id"] for node in nodes}
+        retired = [
+            index
+            for index in self.active_indexes
+            if self.node_ids[index] not in discovered
+        ]
+        for index in retired:
+            self.retired.add(index)
+            del self._indexes[self.read_value_ids[index].NodeId]
+            self.platforms[index] = None
+            self.array_sizes.pop(index, None)
+            self.values[index] = UNAVAILABLE
+        if retired:
+            retired_set = set(retired)
+            self.history_indexes = [
+                index for index in self.history_indexes if index not in retired_set
+            ]
+
+        names = {self.names[index] for index in self.active_indexes}
+        added = []
+        for node in nodes:
+            if node["name"] in names:
+                # Known node, or a new one whose entity would clash with it
+                continue
+            index = self._add(node)
+            if index is not None:
+                self.values.append(UNAVAILABLE)
+                added.append(index)
+        return added, retired
+
+    def set_unavailable(self, indexes: Iterable[int]):
+        values = self.values
+        for index in indexes:
+            values[index] = UNAVAILABLE
@@ -0,0 +1,106 @@
+"""Polling groups reading a subset of the hub nodes at their own scan interval."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+from fnmatch import fnmatchcase
+from typing import Any
+
+import voluptuous as vol
+from homeassistant.helpers import config_validation as cv
+
+from .const import (
+    CONF_GROUP_BROWSE_NAME,
+    CONF_GROUP_DATA_TYPE,
+    CONF_GROUP_DEADBAND,
+    CONF_GROUP_DEADBAND_TYPE,
+    CONF_GROUP_NAME,
+    CONF_GROUP_NODE_ID,
+    CONF_GROUP_SCAN_INTERVAL,
+    DEADBAND_ABSOLUTE,
+    DEADBAND_PERCENT,
+    DEADBAND_TYPES,
+)
+
+POLLING_GROUP_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_GROUP_NAME): str,
+        vol.Optional(CONF_GROUP_SCAN_INTERVAL): vol.All(
+            vol.Coerce(float), vol.Range(min=0.1)
+        ),
+        vol.Optional(CONF_GROUP_NODE_ID): str,
+        vol.Optional(CONF_GROUP_BROWSE_NAME): str,
+        vol.Optional(CONF_GROUP_DATA_TYPE): str,
+        vol.Optional(CONF_GROUP_DEADBAND): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(CONF_GROUP_DEADBAND_TYPE, default=DEADBAND_ABSOLUTE): vol.In(
+            DEADBAND_TYPES
+        ),
+    }
+)
+
+POLLING_GROUPS_SCHEMA = vol.All(cv.ensure_list, [POLLING_GROUP_SCHEMA])
+
+
+class PollingGroup:
+    """A named set of nodes polled at its own interval.
+
+    A node belongs to the group when it matches every configured pattern:
+    ``node_id`` and ``browse_name`` are shell-style wildcards (``*``, ``?``)
+    and ``data_type`` is the builtin variant type name (e.g. ``Boolean``).
+    Without a scan interval the nodes keep the hub scan interval, which is
+    useful to only apply a deadband.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        scan_interval: float | None = None,
+        node_id: str | None = None,
+        browse_name: str | None = None,
+        data_type: str | None = None,
+        deadband: float | None = None,
+        deadband_type: str = DEADBAND_ABSOLUTE,
+    ) -> None:
+        self.name = name
+        self.scan_interval = timedelta(seconds=scan_interval) if scan_interval else None
+        self.deadband = deadband
+        self.deadband_type = deadband_type
+        self._node_id = node_id
+        self._browse_name = browse_name
+        self._data_type = data_type
+        self.indexes: list[int] = []
+        self.polling = False
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> PollingGroup:
+        return cls(
+            name=config[CONF_GROUP_NAME],
+            scan_interval=config.get(CONF_GROUP_SCAN_INTERVAL),
+            node_id=config.get(CONF_GROUP_NODE_ID),
+            browse_name=config.get(CONF_GROUP_BROWSE_NAME),
+            data_type=config.get(CONF_GROUP_DATA_TYPE),
+            deadband=config.get(CONF_GROUP_DEADBAND),
+            deadband_type=config.get(CONF_GROUP_DEADBAND_TYPE, DEADBAND_ABSOLUTE),
+        )
+
+    def matches(self, name: str, node_id: str, variant_type: str | None) -> bool:
+        if self._node_id and not fnmatchcase(node_id, self._node_id):
+            return False
+        if self._browse_name and not fnmatchcase(name, self._browse_name):
+            return False
+        return not self._data_type or variant_type == self._data_type
+
+    def exceeds_deadband(self, old_value: Any, new_value: Any) -> bool:
+        """Return whether a numeric value moved further than the deadband."""
+        if (
+            not self.deadband
+            or isinstance(old_value, bool)
+            or isinstance(new_value, bool)
+            or not isinstance(old_value, (int, float))
+            or not isinstance(new_value, (int, float))
+        ):
+            return True
+        threshold = self.deadband
+        if self.deadband_type == DEADBAND_PERCENT:
+            threshold = abs(old_value) * self.deadband / 100
+        return abs(new_value - old_value) > threshold
@@ -0,0 +1,66 @@
+"""Priority scheduling of the requests sent over the main session."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+
+class RequestScheduler:
+    """Limit the requests in flight on a session, highest priority first.
+
+    Servers process the requests of a session in order, so a write sent
+    behind a queue of polling reads waits for all of them. Every request
+    takes one of ``max_in_flight`` slots. Free slots go to the waiting
+    request of the lowest priority value, in arrival order within a
+    priority, so interactive writes overtake queued reads and discovery.
+    Requests already in flight are never interrupted, long operations are
+    split into requests that each take a slot and can be overtaken.
+    """
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max(1, max_in_flight)
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self.stats = {"requests": 0, "waited": 0, "max_wait": 0.0}
+
+    @asynccontextmanager
+    async def slot(self, priority: int) -> AsyncIterator[None]:
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int):
+        self.stats["requests"] += 1
+        if self._in_flight < self.max_in_flight and not self._waiters:
+            self._in_flight += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        start = loop.time()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over before the cancellation
+                self._release()
+            raise
+        self.stats["waited"] += 1
+        self.stats["max_wait"] = max(self.stats["max_wait"], loop.time() - start)
+
+    def _release(self):
+        # The slot passes directly to the next waiter, skipping cancelled ones
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_flight -= 1
@@ -1,39 +1,161 @@
 """Sensor platform for OPC UA."""
 
-from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
-from . import AsyncuaCoordinator
-from .const import DOMAIN
+from . import AsyncuaCoordinator, OpcuaHub
+from .const import (
+    ARRAY_MODE_ELEMENTS,
+    DIAGNOSTICS_CONTEXT,
+    DOMAIN,
+    PLATFORM_SENSOR,
+    SIGNAL_NODES_ADDED,
+)
+from .node_registry import UNAVAILABLE
+
+
+@dataclass(frozen=True, kw_only=True)
+class AsyncuaDiagnosticSensorEntityDescription(SensorEntityDescription):
+    """Describes a diagnostic sensor of a hub."""
+
+    value_fn: Callable[[OpcuaHub], Any]
+
+
+DIAGNOSTIC_SENSORS = (
+    AsyncuaDiagnosticSensorEntityDescription(
+        key="last_poll_duration",
+        name="Last poll duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=3,
+        value_fn=lambda hub: hub.metrics.last_duration,
+    ),
+    AsyncuaDiagnosticSensorEntityDescription(
+        key="average_poll_duration",
+        name="Average poll duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=3,
+        value_fn=lambda hub: hub.metrics.average_duration,
+    ),
+    AsyncuaDiagnosticSensorEntityDescription(
+        key="requests_per_scan",
+        name="Requests per scan",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda hub: hub.metrics.last_requests,
+    ),
+    AsyncuaDiagnosticSensorEntityDescription(
+        key="round_trips_per_scan",
+        name="Round trips per scan",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda hub: hub.metrics.last_round_trips,
+    ),
+    AsyncuaDiagnosticSensorEntityDescription(
+        key="nodes_per_second",
+        name="Nodes read per second",
+        native_unit_of_measurement="nodes/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=0,
+        value_fn=lambda hub: hub.metrics.last_nodes_per_second,
+    ),
+    AsyncuaDiagnosticSensorEntityDescription(
+        key="bad_status_nodes",
+        name="Bad status nodes",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda hub: hub.metrics.last_bad_status,
+    ),
+    AsyncuaDiagnosticSensorEntityDescription(
+        key="quarantined_nodes",
+        name="Quarantined nodes",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda hub: len(hub.node_health.quarantined),
+    ),
+    AsyncuaDiagnosticSensorEntityDescription(
+        key="reconnects",
+        name="Reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda hub: hub.connection.stats["reconnects"],
+    ),
+    AsyncuaDiagnosticSensorEntityDescription(
+        key="discovery_duration",
+        name="Discovery duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=2,
+        value_fn=lambda hub: hub.discovery_stats.get("duration"),
+    ),
+)
 
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     coordinator: AsyncuaCoordinator = hass.data[DOMAIN][entry.data["hub_id"]]
-    sensors = []
+    sensors = _node_sensors(coordinator, range(len(coordinator.registry)))
+    sensors.extend(
+        AsyncuaDiagnosticSensor(coordinator, description)
+        for description in DIAGNOSTIC_SENSORS
+    )
+    async_add_entities(sensors)
+
+    @callback
+    def _async_add_nodes(indexes: list[int]) -> None:
+        async_add_entities(_node_sensors(coordinator, indexes))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_NODES_ADDED.format(coordinator.name), _async_add_nodes
+        )
+    )
 
-    for name, node_id in coordinator.node_key_pair.items():
+
+def _node_sensors(coordinator: AsyncuaCoordinator, indexes) -> list[SensorEntity]:
+    registry = coordinator.registry
+    sensors = []
+    for index in indexes:
         # Skip nodes that are writable booleans (handled by switches)
-        is_writable_boolean = await coordinator.hub.is_writable_boolean(node_id)
-        if is_writable_boolean:
+        if registry.platforms[index] != PLATFORM_SENSOR:
             continue
-        sensors.append(AsyncuaSensor(coordinator, name, node_id))
-
-    async_add_entities(sensors)
+        if index not in registry.array_sizes:
+            sensors.append(AsyncuaSensor(coordinator, index))
+        elif coordinator.array_mode == ARRAY_MODE_ELEMENTS:
+            value = coordinator.data[index]
+            size = len(value) if type(value) is list else registry.array_sizes[index]
+            sensors.extend(
+                AsyncuaArrayElementSensor(coordinator, index, element)
+                for element in range(size)
+            )
+        else:
+            sensors.append(AsyncuaArraySensor(coordinator, index))
+    return sensors
 
 
 class AsyncuaSensor(CoordinatorEntity[AsyncuaCoordinator], SensorEntity):
     """Representation of an OPC UA sensor."""
 
-    def __init__(self, coordinator, name: str, node_id: str) -> None:
-        super().__init__(coordinator)
-        self._attr_name = name
-        self._attr_unique_id = f"opcua_{coordinator.name}_{name}"
-        self._node_id = node_id
+    def __init__(self, coordinator, index: int) -> None:
+        super().__init__(coordinator, context=index)
+        self._index = index
+        self._attr_name = coordinator.registry.names[index]
+        self._attr_unique_id = f"opcua_{coordinator.name}_{self._attr_name}"
+        self._node_id = coordinator.registry.node_ids[index]
         self._attr_state_class = None
 
     @property
@@ -47,9 +169,100 @@ class AsyncuaSensor(CoordinatorEntity[AsyncuaCoordinator], SensorEntity):
 
     @property
     def native_value(self):
-        return self.coordinator.data.get(self._attr_name)
+        value = self.coordinator.data[self._index]
+        return None if value is UNAVAILABLE else value
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        if self._index in self.coordinator.registry.retired:
+            # The node is gone from the server, removing the registry entry
+            # removes the entity as well
+            entity_registry = er.async_get(self.hass)
+            if entity_registry.async_get(self.entity_id):
+                entity_registry.async_remove(self.entity_id)
+            else:
+                self.hass.async_create_task(self.async_remove())
+            return
+        super()._handle_coordinator_update()
 
     @property
     def available(self) -> bool:
         """Return if the switch is available."""
-        return super().available and self._attr_name in self.coordinator.data
+        return (
+            super().available and self.coordinator.data[self._index] is not UNAVAILABLE
+        )
+
+
+class AsyncuaArraySensor(AsyncuaSensor):
+    """OPC UA array variable, the elements are exposed as an attribute.
+
+    The state is the element count, the elements are not recorded.
+    """
+
+    _unrecorded_attributes = frozenset({"values"})
+
+    @property
+    def state_class(self):
+        return None
+
+    @property
+    def native_value(self):
+        value = self.coordinator.data[self._index]
+        return len(value) if type(value) is list else None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        value = self.coordinator.data[self._index]
+        return {"values": value if type(value) is list else None}
+
+
+class AsyncuaArrayElementSensor(AsyncuaSensor):
+    """One element of an OPC UA array variable.
+
+    Listens with an ``(index, element)`` context so it is only written when
+    its own element changes.
+    """
+
+    def __init__(self, coordinator, index: int, element: int) -> None:
+        super().__init__(coordinator, index)
+        self.coordinator_context = (index, element)
+        self._element = element
+        self._attr_name = f"{self._attr_name}[{element}]"
+        self._attr_unique_id = f"{self._attr_unique_id}_{element}"
+
+    @property
+    def native_value(self):
+        value = self.coordinator.data[self._index]
+        if type(value) is list and self._element < len(value):
+            return value[self._element]
+        return None
+
+    @property
+    def available(self) -> bool:
+        value = self.coordinator.data[self._index]
+        return super().available and type(value) is list and self._element < len(value)
+
+
+class AsyncuaDiagnosticSensor(CoordinatorEntity[AsyncuaCoordinator], SensorEntity):
+    """Diagnostic sensor exposing a runtime metric of the hub."""
+
+    entity_description: AsyncuaDiagnosticSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: AsyncuaCoordinator,
+        description: AsyncuaDiagnosticSensorEntityDescription,
+    ) -> None:
+        super().__init__(coordinator, context=DIAGNOSTICS_CONTEXT)
+        self.entity_description = description
+        self._attr_name = f"{coordinator.name} {description.name}"
+        self._attr_unique_id = f"opcua_{coordinator.name}_diagnostic_{description.key}"
+
+    @property
+    def native_value(self):
+        return self.entity_description.value_fn(self.coordinator.hub)
+
+    @property
+    def available(self) -> bool:
+        return True
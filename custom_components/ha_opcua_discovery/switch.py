@@ -6,10 +6,13 @@ from homeassistant.components.switch import SwitchEntity
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from . import AsyncuaCoordinator
-from .const import DOMAIN
+from .const import DOMAIN, PLATFORM_SWITCH, SIGNAL_NODES_ADDED
+from .node_registry import UNAVAILABLE
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,60 +21,73 @@ async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     coordinator: AsyncuaCoordinator = hass.data[DOMAIN][entry.data["hub_id"]]
-    switches = []
+    async_add_entities(_node_switches(coordinator, range(len(coordinator.registry))))
+
+    @callback
+    def _async_add_nodes(indexes: list[int]) -> None:
+        async_add_entities(_node_switches(coordinator, indexes))
+
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_NODES_ADDED.format(coordinator.name), _async_add_nodes
+        )
+    )
 
-    for name, node_id in coordinator.node_key_pair.items():
-        # Skip nodes that are non-writable booleans
-        is_writable_boolean = await coordinator.hub.is_writable_boolean(node_id)
-        if not is_writable_boolean:
-            continue
-        switches.append(AsyncuaSwitch(coordinator, name, node_id))
 
-    async_add_entities(switches)
+def _node_switches(coordinator: AsyncuaCoordinator, indexes) -> list[SwitchEntity]:
+    platforms = coordinator.registry.platforms
+    # Skip nodes that are not writable booleans
+    return [
+        AsyncuaSwitch(coordinator, index)
+        for index in indexes
+        if platforms[index] == PLATFORM_SWITCH
+    ]
 
 
 class AsyncuaSwitch(CoordinatorEntity[AsyncuaCoordinator], SwitchEntity):
     """Representation of an OPC UA writable boolean switch."""
 
-    def __init__(self, coordinator, name: str, node_id: str) -> None:
-        super().__init__(coordinator)
-        self._attr_name = name
-        self._attr_unique_id = f"opcua_{coordinator.name}_{name}"
-        self._node_id = node_id
-        self._is_on = False  # Default state
+    def __init__(self, coordinator, index: int) -> None:
+        super().__init__(coordinator, context=index)
+        self._index = index
+        self._attr_name = coordinator.registry.names[index]
+        self._attr_unique_id = f"opcua_{coordinator.name}_{self._attr_name}"
+        self._node_id = coordinator.registry.node_ids[index]
 
     @property
-    def is_on(self) -> bool:
+    def is_on(self) -> bool | None:
         """Return true if switch is on."""
-        return self._is_on
+        value = self.coordinator.data[self._index]
+        # UNAVAILABLE or a value that is not a boolean leaves the state unknown
+        return value if isinstance(value, bool) else None
 
     async def async_turn_on(self, **kwargs) -> None:
-        """Turn the switch on."""
-        success = await self.coordinator.hub.set_value(self._node_id, True)
-        if success:
-            self._is_on = True
-            self.async_write_ha_state()
-        else:
+        """Turn the switch on, the coordinator updates the state on success."""
+        if not await self.coordinator.async_write_value(self._node_id, True):
             _LOGGER.error(f"Failed to turn on switch {self._attr_name}")
 
     async def async_turn_off(self, **kwargs) -> None:
-        """Turn the switch off."""
-        success = await self.coordinator.hub.set_value(self._node_id, False)
-        if success:
-            self._is_on = False
-            self.async_write_ha_state()
-        else:
+        """Turn the switch off, the coordinator updates the state on success."""
+        if not await self.coordinator.async_write_value(self._node_id, False):
             _LOGGER.error(f"Failed to turn off switch {self._attr_name}")
 
     @property
     def available(self) -> bool:
         """Return if the switch is available."""
-        return super().available and self._attr_name in self.coordinator.data
+        return (
+            super().available and self.coordinator.data[self._index] is not UNAVAILABLE
+        )
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        value = self.coordinator.data.get(self._attr_name)
-        if isinstance(value, bool):
-            self._is_on = value
-        self.async_write_ha_state()
+        if self._index in self.coordinator.registry.retired:
+            # The node is gone from the server, removing the registry entry
+            # removes the entity as well
+            entity_registry = er.async_get(self.hass)
+            if entity_registry.async_get(self.entity_id):
+                entity_registry.async_remove(self.entity_id)
+            else:
+                self.hass.async_create_task(self.async_remove())
+            return
+        super()._handle_coordinator_update()
@@ -0,0 +1,421 @@
+"""Polling reads in a worker process publishing into a shared-memory value table."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import time
+from array import array
+from collections.abc import Iterable, Sequence
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+from asyncua import Client, ua
+
+from .connection import (
+    REQUEST_ERRORS,
+    _read_parameters,
+    _read_value_id,
+    is_transport_error,
+)
+from .const import DEFAULT_MAX_NODES_PER_READ, WORKER_STOP_TIMEOUT
+from .node_registry import UNAVAILABLE
+
+_LOGGER = logging.getLogger(__name__)
+
+# Kind of the value held by a slot of the table
+KIND_UNAVAILABLE = 0
+KIND_FLOAT = 1
+KIND_INT = 2
+KIND_BOOL = 3
+# Strings and arrays do not fit a slot, they travel with the change notification
+KIND_OBJECT = 4
+
+# Previous value of the nodes the main process changed, always reported
+_STALE = object()
+
+_INT64_MIN = -(2**63)
+_INT64_MAX = 2**63 - 1
+
+
+class ValueTable:
+    """Node values in shared memory, indexed like the node registry.
+
+    Every node has a kind byte and an 8 byte slot holding its number or
+    boolean. The worker process writes the table, the main process only
+    reads the slots of the nodes the worker reported as changed.
+    """
+
+    def __init__(self, shm: SharedMemory, size: int):
+        self.shm = shm
+        self.size = size
+        offset = _align(size)
+        self.kinds = shm.buf[:size]
+        self.floats = shm.buf[offset : offset + size * 8].cast("d")
+        self.ints = shm.buf[offset : offset + size * 8].cast("q")
+
+    @classmethod
+    def create(cls, size: int) -> ValueTable:
+        shm = SharedMemory(create=True, size=max(8, _align(size) + size * 8))
+        return cls(shm, size)
+
+    @classmethod
+    def attach(cls, name: str, size: int) -> ValueTable:
+        return cls(SharedMemory(name=name), size)
+
+    def store(self, index: int, value: Any) -> int:
+        """Store a value, returning its kind."""
+        value_type = type(value)
+        if value_type is float:
+            self.floats[index] = value
+            kind = KIND_FLOAT
+        elif value_type is bool:
+            self.ints[index] = value
+            kind = KIND_BOOL
+        elif value_type is int and _INT64_MIN <= value <= _INT64_MAX:
+            self.ints[index] = value
+            kind = KIND_INT
+        else:
+            kind = KIND_OBJECT
+        self.kinds[index] = kind
+        return kind
+
+    def load(self, index: int, objects: dict[int, Any]) -> Any:
+        kind = self.kinds[index]
+        if kind == KIND_FLOAT:
+            return self.floats[index]
+        if kind == KIND_INT:
+            return self.ints[index]
+        if kind == KIND_BOOL:
+            return bool(self.ints[index])
+        if kind == KIND_OBJECT:
+            return objects.get(index, UNAVAILABLE)
+        return UNAVAILABLE
+
+    def close(self):
+        # Views of the buffer have to be released before the memory is unmapped
+        self.kinds.release()
+        self.floats.release()
+        self.ints.release()
+        self.shm.close()
+
+
+def _align(size: int) -> int:
+    return (size + 7) // 8 * 8
+
+
+class _Worker:
+    """Client side of the worker process, serving the read requests in order."""
+
+    def __init__(
+        self,
+        url: str,
+        username: str | None,
+        password: str | None,
+        node_ids: list[str],
+        table: ValueTable,
+        conn: Connection,
+    ):
+        self._url = url
+        self._username = username
+        self._password = password
+        self._read_value_ids = [
+            _read_value_id(ua.NodeId.from_string(node_id)) for node_id in node_ids
+        ]
+        # Everything is reported by the first read of a new worker
+        self._values: list[Any] = [_STALE] * len(node_ids)
+        self._table = table
+        self._conn = conn
+        self._client: Client | None = None
+        self._chunk_size = DEFAULT_MAX_NODES_PER_READ
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        requests: asyncio.Queue = asyncio.Queue()
+        loop.add_reader(self._conn.fileno(), self._receive, loop, requests)
+        try:
+            while (request := await requests.get()) is not None:
+                request_id, indexes, stale = request
+                try:
+                    reply = (request_id, None, await self._read(indexes, stale))
+                # Every request gets a reply, the main process waits for it
+                except Exception as e:  # noqa: BLE001
+                    if self._client is not None and is_transport_error(e):
+                        await self._disconnect()
+                    reply = (request_id, str(e) or type(e).__name__, None)
+                self._conn.send(reply)
+        finally:
+            await self._disconnect()
+
+    def _receive(self, loop: asyncio.AbstractEventLoop, requests: asyncio.Queue):
+        try:
+            requests.put_nowait(self._conn.recv())
+        except (EOFError, OSError):
+            # The main process closed the pipe or exited
+            loop.remove_reader(self._conn.fileno())
+            requests.put_nowait(None)
+
+    async def _connect(self):
+        client = Client(url=self._url, timeout=5)
+        if self._username:
+            client.set_user(self._username)
+        if self._password:
+            client.set_password(self._password)
+        await client.connect()
+        self._client = client
+        try:
+            (max_nodes_per_read,) = await client.uaclient.read_attributes(
+                [
+                    ua.NodeId(
+                        ua.ObjectIds.Server_ServerCapabilities_OperationLimits_MaxNodesPerRead
+                    )
+                ],
+                ua.AttributeIds.Value,
+            )
+            if max_nodes_per_read.StatusCode.is_good() and max_nodes_per_read.Value:
+                limit = max_nodes_per_read.Value.Value or 0
+                if 0 < limit < DEFAULT_MAX_NODES_PER_READ:
+                    self._chunk_size = limit
+        except REQUEST_ERRORS as e:
+            _LOGGER.debug(f"Failed to read MaxNodesPerRead: {e}")
+
+    async def _disconnect(self):
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.disconnect()
+            except REQUEST_ERRORS as e:
+                _LOGGER.debug(f"Error during worker disconnect: {e}")
+
+    async def _read(
+        self, indexes_bytes: bytes, stale_bytes: bytes
+    ) -> tuple[bytes, dict[int, Any], dict[int, str], list[tuple[float, int, str]]]:
+        """Read the nodes into the table.
+
+        Returns the indexes of the values that changed, the changed values
+        that are not stored in the table, the status of the nodes without a
+        good value and the Read round trips. Stale nodes are reported even
+        when their value did not change.
+        """
+        if self._client is None:
+            await self._connect()
+        indexes = array("I")
+        indexes.frombytes(indexes_bytes)
+        stale = array("I")
+        stale.frombytes(stale_bytes)
+        for index in stale:
+            self._values[index] = _STALE
+
+        read_value_ids = self._read_value_ids
+        round_trips = []
+        data_values = []
+        for start in range(0, len(indexes), self._chunk_size):
+            chunk = [
+                read_value_ids[index]
+                for index in indexes[start : start + self._chunk_size]
+            ]
+            start_time = time.perf_counter()
+            try:
+                results = await self._client.uaclient.read(_read_parameters(chunk))
+            except ua.UaStatusCodeError as e:
+                if is_transport_error(e):
+                    raise
+                results = [ua.DataValue(StatusCode_=ua.StatusCode(e.code))] * len(chunk)
+            round_trips.append(
+                (
+                    time.perf_counter() - start_time,
+                    len(chunk),
+                    chunk[0].NodeId.to_string(),
+                )
+            )
+            data_values.extend(results)
+
+        values = self._values
+        table = self._table
+        changed = array("I")
+        objects = {}
+        bad = {}
+        for index, data_value in zip(indexes, data_values):
+            if data_value.StatusCode.is_good():
+                value = data_value.Value.Value if data_value.Value else None
+                if value == values[index]:
+                    continue
+                values[index] = value
+                if table.store(index, value) == KIND_OBJECT:
+                    objects[index] = value
+            else:
+                bad[index] = data_value.StatusCode.name
+                if values[index] is UNAVAILABLE:
+                    continue
+                values[index] = UNAVAILABLE
+                table.kinds[index] = KIND_UNAVAILABLE
+            changed.append(index)
+        return changed.tobytes(), objects, bad, round_trips
+
+
+def _worker_main(
+    url: str,
+    username: str | None,
+    password: str | None,
+    node_ids: list[str],
+    shm_name: str,
+    conn: Connection,
+):
+    """Entry point of the worker process."""
+    table = ValueTable.attach(shm_name, len(node_ids))
+    try:
+        asyncio.run(_Worker(url, username, password, node_ids, table, conn).run())
+    finally:
+        table.close()
+
+
+class OpcuaWorker:
+    """Worker process running the polling reads of a hub.
+
+    Decoding the Read responses of tens of thousands of nodes is pure Python
+    work that stalls the event loop. The worker process opens its own session
+    and decodes the responses on another core. Numbers and booleans are
+    published in a shared-memory ``ValueTable``, and the reply to a read
+    request only carries the indexes of the values that changed, so the main
+    process does work proportional to the changes instead of the nodes. The
+    worker is started on the first read and restarted after it exited. A
+    failed read leaves it running, it reconnects its own session.
+    """
+
+    def __init__(self, url: str, username: str | None, password: str | None):
+        self._url = url
+        self._username = username
+        self._password = password
+        self._node_ids: list[str] | None = None
+        self._size = 0
+        self._process = None
+        self._conn: Connection | None = None
+        self._table: ValueTable | None = None
+        self._requests = itertools.count()
+        self._pending: dict[int, asyncio.Future] = {}
+        self.stats = {"starts": 0, "reads": 0, "changed": 0}
+
+    @property
+    def is_running(self) -> bool:
+        return self._conn is not None
+
+    async def async_start(self, node_ids: list[str]):
+        """Start the worker reading the given nodes, unless it already does.
+
+        A rescan appends nodes to the list, the worker is then restarted.
+        """
+        if (
+            self.is_running
+            and self._node_ids is node_ids
+            and self._size == len(node_ids)
+        ):
+            return
+        await self.async_stop()
+
+        context = multiprocessing.get_context("spawn")
+        table = ValueTable.create(len(node_ids))
+        conn, child_conn = context.Pipe()
+        process = context.Process(
+            target=_worker_main,
+            args=(
+                self._url,
+                self._username,
+                self._password,
+                node_ids,
+                table.shm.name,
+                child_conn,
+            ),
+            name=f"opcua-worker {self._url}",
+            daemon=True,
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, process.start)
+        except BaseException:
+            table.close()
+            table.shm.unlink()
+            raise
+        finally:
+            child_conn.close()
+        self._process = process
+        self._table = table
+        self._conn = conn
+        self._node_ids = node_ids
+        self._size = len(node_ids)
+        loop.add_reader(conn.fileno(), self._receive)
+        self.stats["starts"] += 1
+        _LOGGER.debug(f"Started worker process {process.pid} for {len(node_ids)} nodes")
+
+    async def async_stop(self):
+        self._close_conn(ConnectionError("Worker process stopped"))
+        process, self._process = self._process, None
+        if process is not None:
+            # The worker exits once the pipe is closed
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, process.join, WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                process.kill()
+        table, self._table = self._table, None
+        if table is not None:
+            table.close()
+            table.shm.unlink()
+        self._node_ids = None
+
+    async def read(
+        self, indexes: Sequence[int], stale: Iterable[int] = ()
+    ) -> tuple[dict[int, Any], dict[int, str], list[tuple[float, int, str]]]:
+        """Read the nodes in the worker process.
+
+        Returns the changed values by index, the status of the nodes without
+        a good value and the Read round trips of the worker. Stale nodes, set
+        by the main process since the worker reported them, are returned
+        whether they changed or not.
+        """
+        if self._conn is None:
+            raise ConnectionError("Worker process not running")
+        request_id = next(self._requests)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._conn.send(
+            (request_id, array("I", indexes).tobytes(), array("I", stale).tobytes())
+        )
+        changed_bytes, objects, bad, round_trips = await future
+
+        changed = array("I")
+        changed.frombytes(changed_bytes)
+        table = self._table
+        self.stats["reads"] += 1
+        self.stats["changed"] += len(changed)
+        return (
+            {index: table.load(index, objects) for index in changed},
+            bad,
+            round_trips,
+        )
+
+    def _receive(self):
+        try:
+            request_id, error, result = self._conn.recv()
+        except (EOFError, OSError):
+            _LOGGER.warning("OPC UA worker process exited")
+            self._close_conn(ConnectionError("Worker process exited"))
+            return
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(ConnectionError(error))
+        else:
+            future.set_result(result)
+
+    def _close_conn(self, error: Exception):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            asyncio.get_running_loop().remove_reader(conn.fileno())
+            conn.close()
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
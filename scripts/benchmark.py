@@ -0,0 +1,612 @@
+"""Benchmark the integration against an in-process OPC UA server.
+
+Starts an asyncua server with a generated address space, then measures
+discovery, polling reads, writes and the sensor/switch platform setup. For
+every phase the wall time, the number of OPC UA requests (round trips) and the
+peak memory are reported and saved as JSON, so results of different
+versions can be compared with ``--compare``.
+
+Memory is the peak resident set size of the process after each phase, with
+``--trace-memory`` the peak Python allocations of each phase are traced as
+well (which slows every phase down). The server runs in the same process, its
+memory is included. ``--latency`` delays every client request to simulate WAN
+and PLC links.
+
+``--server-process`` runs the server in a child process instead, so its
+work is neither timed nor included in the memory, and ``--worker`` polls in
+the worker process of the hub (its requests are neither counted nor
+delayed). The get_values phases report how long the event loop stalled: the
+longest and the total delay of a task waking up every millisecond.
+
+``--string-node-ids`` gives the variables long string node ids like the ones
+of Siemens and B&R PLCs, ``--register-nodes`` reads and writes them through
+RegisterNodes handles. asyncua servers return node ids unchanged from
+RegisterNodes, the benchmark server hands out numeric handles instead, as
+industrial servers do.
+
+Example:
+    python scripts/benchmark.py --nodes 5000 --depth 3 --fanout 8 --latency 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "custom_components"))
+
+from asyncua import Server, ua
+from asyncua.client.ua_client import UASocketProtocol
+from asyncua.server.uaprocessor import UaProcessor
+from asyncua.ua.ua_binary import struct_from_binary
+from ha_opcua_discovery import AsyncuaCoordinator, OpcuaHub, sensor, switch
+from ha_opcua_discovery.const import (
+    CONF_HUB_ID,
+    DOMAIN,
+    PLATFORM_SENSOR,
+    PLATFORM_SWITCH,
+)
+from ha_opcua_discovery.node_registry import UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import (
+    area_registry,
+    category_registry,
+    device_registry,
+    entity_platform,
+    entity_registry,
+    floor_registry,
+    label_registry,
+)
+
+_LOGGER = logging.getLogger("benchmark")
+
+HUB_ID = "benchmark"
+
+# Variant type and initial value of every type of the --types mix
+TYPES = {
+    "double": (ua.VariantType.Double, 0.0),
+    "float": (ua.VariantType.Float, 0.0),
+    "int32": (ua.VariantType.Int32, 0),
+    "uint16": (ua.VariantType.UInt16, 0),
+    "boolean": (ua.VariantType.Boolean, False),
+    "string": (ua.VariantType.String, ""),
+}
+
+
+class RequestCounter:
+    """Count the requests sent by OPC UA clients, delaying them when asked to."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = Counter()
+        self._send_request = UASocketProtocol.send_request
+
+    def install(self):
+        counter = self
+
+        async def send_request(protocol, request, *args, **kwargs):
+            name = type(request).__name__
+            # Publish requests stay open on the server, they are not round trips
+            if name != "PublishRequest":
+                counter.requests[name] += 1
+                if counter.latency:
+                    await asyncio.sleep(counter.latency)
+            return await counter._send_request(protocol, request, *args, **kwargs)
+
+        UASocketProtocol.send_request = send_request
+
+    def uninstall(self):
+        UASocketProtocol.send_request = self._send_request
+
+    def reset(self):
+        self.requests = Counter()
+
+
+def install_node_handles(server: Server, namespace: int):
+    """Make the server hand out numeric handles from RegisterNodes.
+
+    A handle is an alias of the node data in the address space, so reads
+    and writes of the handle resolve a numeric instead of a string node id.
+    """
+    address_space = server.iserver.aspace
+    handles = {}
+    process_message = UaProcessor._process_message
+    register_nodes_request = ua.NodeId(
+        ua.ObjectIds.RegisterNodesRequest_Encoding_DefaultBinary
+    )
+
+    async def _process_message(processor, typeid, requesthdr, seqhdr, body):
+        if typeid != register_nodes_request:
+            return await process_message(processor, typeid, requesthdr, seqhdr, body)
+        params = struct_from_binary(ua.RegisterNodesParameters, body)
+        registered = []
+        for node_id in params.NodesToRegister:
+            handle = handles.get(node_id)
+            if handle is None and node_id in address_space:
+                handle = handles[node_id] = ua.NodeId(len(handles) + 1, namespace)
+                address_space[handle] = address_space[node_id]
+            registered.append(handle or node_id)
+        response = ua.RegisterNodesResponse()
+        response.Parameters.RegisteredNodeIds = registered
+        processor.send_response(requesthdr.RequestHandle, seqhdr, response)
+        return True
+
+    UaProcessor._process_message = _process_message
+
+
+class LoopStallMonitor:
+    """Measure how late a task sleeping 1 ms at a time wakes up."""
+
+    def __init__(self):
+        self.max_stall = 0.0
+        self.total_stall = 0.0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._monitor())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _monitor(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(0.001)
+            stall = max(0.0, loop.time() - start - 0.001)
+            self.total_stall += stall
+            self.max_stall = max(self.max_stall, stall)
+
+
+def _serve(args: argparse.Namespace, conn):
+    """Run the benchmark server in a child process until the pipe closes."""
+
+    async def serve():
+        server, root_node_id, address_space = await Benchmark(args).build_server()
+        conn.send((root_node_id, address_space))
+        loop = asyncio.get_running_loop()
+        stopped = asyncio.Event()
+        loop.add_reader(conn.fileno(), stopped.set)
+        await stopped.wait()
+        loop.remove_reader(conn.fileno())
+        await server.stop()
+
+    logging.getLogger("asyncua").setLevel(logging.ERROR)
+    asyncio.run(serve())
+
+
+class Benchmark:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.counter = RequestCounter(args.latency / 1000)
+        self.results = {}
+
+    @contextmanager
+    def phase(self, name: str, **extra):
+        """Measure wall time, round trips and peak memory of a phase."""
+        self.counter.reset()
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        result = dict(extra)
+        yield result
+        wall_time = time.perf_counter() - start
+        result.update(
+            wall_time=round(wall_time, 4),
+            round_trips=sum(self.counter.requests.values()),
+            requests=dict(self.counter.requests),
+            peak_rss=_peak_rss(),
+        )
+        if tracemalloc.is_tracing():
+            result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        self.results[name] = result
+        _LOGGER.info(
+            f"{name}: {wall_time:.3f} s, {result['round_trips']} round trips, "
+            f"{result.get('peak_memory', result['peak_rss']) / 1e6:.1f} MB peak"
+        )
+
+    async def build_server(self) -> tuple[Server, str, dict]:
+        """Create the address space: a tree of objects with variables on the leaves."""
+        args = self.args
+        server = Server()
+        await server.init()
+        server.set_endpoint(f"opc.tcp://127.0.0.1:{args.port}")
+        idx = await server.register_namespace("urn:ha-opcua-discovery:benchmark")
+        if args.register_nodes:
+            install_node_handles(
+                server,
+                await server.register_namespace("urn:ha-opcua-discovery:handles"),
+            )
+
+        root = await server.nodes.objects.add_object(idx, "Benchmark")
+        level = [root]
+        objects = 1
+        for depth in range(args.depth):
+            next_level = []
+            for parent in level:
+                for index in range(args.fanout):
+                    next_level.append(
+                        await parent.add_object(idx, f"Object{depth}_{index}")
+                    )
+            objects += len(next_level)
+            level = next_level
+
+        mix = _parse_types(args.types)
+        rng = random.Random(args.seed)
+        type_names = rng.choices(list(mix), weights=list(mix.values()), k=args.nodes)
+        writable = 0
+        for index, type_name in enumerate(type_names):
+            variant_type, value = TYPES[type_name]
+            parent = level[index % len(level)]
+            node_id = idx
+            if args.string_node_ids:
+                # Symbolic address of a variable in a PLC data block
+                node_id = ua.NodeId(
+                    f'"DB_Benchmark"."{(await parent.read_browse_name()).Name}"'
+                    f'."Var{index}"',
+                    idx,
+                )
+            variable = await parent.add_variable(
+                node_id, f"Var{index}", value, varianttype=variant_type
+            )
+            if rng.random() < args.writable:
+                await variable.set_writable()
+                writable += 1
+
+        await server.start()
+        address_space = {
+            "objects": objects,
+            "variables": args.nodes,
+            "writable": writable,
+            "types": dict(Counter(type_names)),
+        }
+        return server, root.nodeid.to_string(), address_space
+
+    async def start_server(self):
+        """Start the server in this process or, with --server-process, a child.
+
+        Returns a coroutine function stopping it, the root node id and a
+        description of the address space.
+        """
+        if not self.args.server_process:
+            server, root_node_id, address_space = await self.build_server()
+            return server.stop, root_node_id, address_space
+
+        context = multiprocessing.get_context("spawn")
+        conn, child_conn = context.Pipe()
+        process = context.Process(target=_serve, args=(self.args, child_conn))
+        process.start()
+        child_conn.close()
+        loop = asyncio.get_running_loop()
+        root_node_id, address_space = await loop.run_in_executor(None, conn.recv)
+
+        async def stop():
+            conn.close()
+            await loop.run_in_executor(None, process.join)
+
+        return stop, root_node_id, address_space
+
+    async def run(self) -> dict:
+        args = self.args
+        stop_server, root_node_id, address_space = await self.start_server()
+        hass = HomeAssistant(tempfile.mkdtemp(prefix="opcua-benchmark-"))
+        self.counter.install()
+        if args.trace_memory:
+            tracemalloc.start()
+        try:
+            hub = OpcuaHub(
+                hub_name=HUB_ID,
+                hub_url=f"opc.tcp://127.0.0.1:{args.port}",
+                root_node_id=root_node_id,
+                discovery_concurrency=args.discovery_concurrency,
+                sessions=args.sessions,
+                register_nodes=args.register_nodes,
+                worker_process=args.worker,
+            )
+            with self.phase("connect"):
+                if not await hub.connect():
+                    raise RuntimeError("Failed to connect to the benchmark server")
+
+            with self.phase("discover_nodes") as result:
+                nodes = await hub.discover_nodes()
+                result["nodes"] = len(nodes)
+
+            registry = hub.set_nodes(nodes)
+            with self.phase("register_nodes") as result:
+                await hub.register_nodes()
+                result["nodes"] = len(registry) if args.register_nodes else 0
+            for iteration in range(args.iterations):
+                with self.phase(f"get_values_{iteration}") as result:
+                    monitor = LoopStallMonitor()
+                    monitor.start()
+                    await hub.get_values(range(len(registry)))
+                    await monitor.stop()
+                    result["values"] = len(registry) - registry.values.count(
+                        UNAVAILABLE
+                    )
+                    result["loop_stall_max"] = round(monitor.max_stall, 4)
+                    result["loop_stall_total"] = round(monitor.total_stall, 4)
+
+            writable = [
+                node for node in nodes if node["writable"] and node["variant_type"]
+            ][: args.writes]
+            with self.phase("set_value", writes=len(writable)):
+                for node in writable:
+                    await hub.set_value(node["node_id"], _write_value(node))
+            with self.phase("set_values", writes=len(writable)):
+                await hub.set_values(
+                    [(node["node_id"], _write_value(node)) for node in writable]
+                )
+
+            if writable:
+                with self.phase("write_during_poll") as result:
+                    result.update(await self.write_during_poll(hub, writable[0]))
+
+            with self.phase("platform_setup") as result:
+                result["entities"] = await self.setup_platforms(hass, hub, nodes)
+
+            await hub.stop_worker()
+            await hub.disconnect()
+        finally:
+            tracemalloc.stop()
+            self.counter.uninstall()
+            await hass.async_stop(force=True)
+            await stop_server()
+
+        get_values = [
+            result
+            for name, result in self.results.items()
+            if name.startswith("get_values_")
+        ]
+        wall_times = [result["wall_time"] for result in get_values]
+        return {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "version": json.loads(
+                (REPO_ROOT / "custom_components" / DOMAIN / "manifest.json").read_text()
+            ).get("version"),
+            "python": platform.python_version(),
+            "parameters": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("output", "compare", "verbose")
+            },
+            "address_space": address_space,
+            "results": self.results,
+            "summary": {
+                "discover_nodes_per_second": round(
+                    self.results["discover_nodes"]["nodes"]
+                    / self.results["discover_nodes"]["wall_time"]
+                ),
+                "get_values_mean": round(sum(wall_times) / len(wall_times), 4),
+                "get_values_min": min(wall_times),
+                # The first get_values starts the worker process
+                "loop_stall_max": max(
+                    result["loop_stall_max"] for result in get_values[1:] or get_values
+                ),
+            },
+        }
+
+    async def write_during_poll(self, hub: OpcuaHub, node: dict) -> dict:
+        """Write a node over and over while every node is polled, like a user
+        toggling a switch during a long poll, and return the write latencies."""
+        latencies = []
+        poll = asyncio.ensure_future(hub.get_values(range(len(hub.registry))))
+        while not poll.done():
+            start = time.perf_counter()
+            await hub.set_value(node["node_id"], _write_value(node))
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+        await poll
+        latencies.sort()
+        return {
+            "writes": len(latencies),
+            "write_latency_mean": round(sum(latencies) / len(latencies), 4),
+            "write_latency_p95": round(latencies[int(len(latencies) * 0.95)], 4),
+            "write_latency_max": round(latencies[-1], 4),
+        }
+
+    async def setup_platforms(
+        self, hass: HomeAssistant, hub: OpcuaHub, nodes: list[dict]
+    ) -> int:
+        """Create the coordinator and add the sensor and switch entities to HA."""
+        for registry in (
+            area_registry,
+            floor_registry,
+            label_registry,
+            category_registry,
+            device_registry,
+            entity_registry,
+        ):
+            await registry.async_load(hass)
+
+        coordinator = AsyncuaCoordinator(
+            hass=hass,
+            name=HUB_ID,
+            hub=hub,
+            update_interval_in_second=timedelta(seconds=3600),
+        )
+        # Measure what the coordinator keeps per node, from a private copy of
+        # the nodes as the discovery cache would load them
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        coordinator.set_nodes(json.loads(json.dumps(nodes)))
+        await coordinator.async_refresh()
+        self.results["node_table"] = {
+            "nodes": len(nodes),
+            "retained_memory": tracemalloc.get_traced_memory()[0] - before,
+        }
+        if not tracing:
+            tracemalloc.stop()
+        hass.data.setdefault(DOMAIN, {})[HUB_ID] = coordinator
+
+        # The platforms disconnect their dispatcher signals on unload
+        unload_callbacks = []
+        entry = SimpleNamespace(
+            data={CONF_HUB_ID: HUB_ID},
+            entry_id=HUB_ID,
+            async_on_unload=unload_callbacks.append,
+        )
+        entities = 0
+        for domain, module in ((PLATFORM_SENSOR, sensor), (PLATFORM_SWITCH, switch)):
+            entity_platform_ = entity_platform.EntityPlatform(
+                hass=hass,
+                logger=_LOGGER,
+                domain=domain,
+                platform_name=DOMAIN,
+                platform=None,
+                scan_interval=timedelta(seconds=30),
+                entity_namespace=None,
+            )
+            added = []
+
+            def _add_entities(new_entities, update_before_add=False, added=added):
+                added.extend(new_entities)
+
+            await module.async_setup_entry(hass, entry, _add_entities)
+            await entity_platform_.async_add_entities(added)
+            entities += len(added)
+        for unload_callback in unload_callbacks:
+            unload_callback()
+        await coordinator.async_shutdown()
+        return entities
+
+
+def _peak_rss() -> int:
+    """Return the peak resident set size of the process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _parse_types(value: str) -> dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip().lower()
+        if name not in TYPES:
+            raise argparse.ArgumentTypeError(
+                f"Unknown type '{name}', expected one of {', '.join(TYPES)}"
+            )
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _write_value(node: dict):
+    if node["variant_type"] == "Boolean":
+        return True
+    if node["variant_type"] == "String":
+        return "benchmark"
+    return 1
+
+
+def _compare(current: dict, previous: dict):
+    """Print the relative change of every phase against a previous run."""
+    print(f"{'phase':<20} {'wall time':>18} {'round trips':>18} {'peak rss':>18}")
+    for name, result in current["results"].items():
+        old = previous.get("results", {}).get(name)
+        if not old:
+            continue
+        columns = []
+        for key in ("wall_time", "round_trips", "peak_rss"):
+            if old.get(key):
+                change = (result[key] - old[key]) / old[key] * 100
+                columns.append(f"{change:+17.1f}%")
+            else:
+                columns.append(f"{'n/a':>18}")
+        print(f"{name:<20} {' '.join(columns)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=1000, help="variables")
+    parser.add_argument("--depth", type=int, default=2, help="object tree depth")
+    parser.add_argument("--fanout", type=int, default=10, help="children per object")
+    parser.add_argument(
+        "--types",
+        default="double=4,int32=2,boolean=2,float=1,uint16=1,string=1",
+        help="type mix as name=weight pairs (%(default)s)",
+    )
+    parser.add_argument(
+        "--writable", type=float, default=0.25, help="share of writable variables"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="added latency per request in ms"
+    )
+    parser.add_argument("--iterations", type=int, default=5, help="get_values runs")
+    parser.add_argument("--writes", type=int, default=100, help="nodes written")
+    parser.add_argument("--sessions", type=int, default=1)
+    parser.add_argument(
+        "--string-node-ids",
+        action="store_true",
+        help="give the variables PLC style string node ids",
+    )
+    parser.add_argument(
+        "--register-nodes",
+        action="store_true",
+        help="read and write through RegisterNodes handles",
+    )
+    parser.add_argument(
+        "--server-process",
+        action="store_true",
+        help="run the server in a child process",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="poll in the worker process of the hub",
+    )
+    parser.add_argument("--discovery-concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=48480)
+    parser.add_argument("--output", default="benchmark.json", help="JSON result file")
+    parser.add_argument("--compare", help="previous JSON result to compare against")
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="trace the peak Python allocations of every phase (slower)",
+    )
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+    _parse_types(args.types)
+
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s %(message)s"
+    )
+    if not args.verbose:
+        logging.getLogger("asyncua").setLevel(logging.ERROR)
+        logging.getLogger("ha_opcua_discovery").setLevel(logging.ERROR)
+        logging.getLogger("homeassistant").setLevel(logging.ERROR)
+
+    report = asyncio.run(Benchmark(args).run())
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    _LOGGER.info(f"Results saved to {args.output}")
+    print(json.dumps(report["summary"], indent=2))
+
+    if args.compare:
+        _compare(report, json.loads(Path(args.compare).read_text()))
+
+
+if __name__ == "__main__":
+    main()